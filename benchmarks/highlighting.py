@@ -0,0 +1,45 @@
+import random
+
+from nvpy import nvpy, highlighting
+from benchmarks import Benchmark
+
+rng = random.Random(0)
+words = ['lorem', 'ipsum', 'dolor', 'sit', 'amet', 'http://example.com/', '[[Other note]]', '# heading\n', '\n']
+# About 1MB of text.
+content_1mb = ''.join(rng.choice(words) + ' ' for _ in range(150000)) + '\n'
+
+
+def make_highlighters():
+    return [
+        highlighting.PatternHighlighter(highlighting.LINK_RE, lookback=highlighting.link_lookback),
+        highlighting.PatternHighlighter(highlighting.MARKDOWN_RE),
+    ]
+
+
+def full_pass(highlighters, content):
+    for highlighter in highlighters:
+        highlighter.highlight(content)
+
+
+def type_char(highlighters, content, typed, pos):
+    # Type a character and delete it again.
+    for highlighter in highlighters:
+        highlighter.update(typed, highlighting.Edit(pos, 0, 'x'))
+    for highlighter in highlighters:
+        highlighter.update(content, highlighting.Edit(pos, 1, ''))
+
+
+def main():
+    highlighters = make_highlighters()
+    full_pass(highlighters, content_1mb)
+    Benchmark(label='highlighting/1mb/full_pass', setup=lambda: None,
+              func=lambda: full_pass(highlighters, content_1mb)).run()
+    pos = len(content_1mb) // 2
+    typed = content_1mb[:pos] + 'x' + content_1mb[pos:]
+    Benchmark(label='highlighting/1mb/type_char',
+              setup=lambda: None,
+              func=lambda: type_char(highlighters, content_1mb, typed, pos)).run()
+
+
+if __name__ == '__main__':
+    main()
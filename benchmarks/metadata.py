@@ -0,0 +1,65 @@
+import functools
+import random
+
+from nvpy import nvpy, notes_db, indexes, utils
+from benchmarks import Benchmark
+
+rng = random.Random(0)
+notes_100k = {
+    f'key{i}': {
+        'content': f'note {i}',
+        'modifydate': rng.uniform(0, 1000),
+        'createdate': rng.uniform(0, 1000),
+        'savedate': rng.uniform(0, 1000),
+        'syncdate': rng.uniform(0, 1000),
+        'systemtags': ['pinned'] if i % 100 == 0 else [],
+    }
+    for i in range(100000)
+}
+
+
+def need_save_dict(notes):
+    return [k for k, n in notes.items() if notes_db.Note(n).need_save]
+
+
+def need_sync_dict(notes, now, idle):
+    return [
+        k for k, n in notes.items()
+        if float(n.get('modifydate', -1)) > float(n.get('syncdate', -1)) and now - float(n['modifydate']) > idle
+    ]
+
+
+def keys_by_date_dict(notes):
+    sorter = notes_db.MergedSorter(notes_db.PinnedSorter(), notes_db.DateSorter(nvpy.SortMode.MODIFICATION_DATE))
+    return [o.key for o in sorted((notes_db.NoteInfo(k, n, 0) for k, n in notes.items()), key=sorter)]
+
+
+def nop():
+    pass
+
+
+def main():
+    if not indexes.HAVE_NUMPY:
+        print('NumPy is not installed')
+        return
+
+    store = indexes.MetadataStore(utils.note_pinned)
+    for k, n in notes_100k.items():
+        store.update(k, n)
+    assert sorted(store.need_save()) == sorted(need_save_dict(notes_100k))
+    assert store.keys_by_date('modifydate', pinned_first=True) == keys_by_date_dict(notes_100k)
+
+    benchmarks = [
+        ('need_save/dict', functools.partial(need_save_dict, notes_100k)),
+        ('need_save/numpy', store.need_save),
+        ('need_sync/dict', functools.partial(need_sync_dict, notes_100k, 1000, 3)),
+        ('need_sync/numpy', functools.partial(store.need_sync, 1000, 3)),
+        ('keys_by_date/dict', functools.partial(keys_by_date_dict, notes_100k)),
+        ('keys_by_date/numpy', functools.partial(store.keys_by_date, 'modifydate', True)),
+    ]
+    for label, func in benchmarks:
+        Benchmark(label=f'metadata/notes_100k/{label}', setup=nop, func=func).run()
+
+
+if __name__ == '__main__':
+    main()
@@ -9,7 +9,7 @@ from nvpy.notes_db import NoteInfo
 from benchmarks import Benchmark
 
 
-def __mock_config():
+def __mock_config(list_virtual):
     app_dir = os.path.abspath('nvpy')
 
     mockConfig = Config(app_dir, [])
@@ -18,14 +18,17 @@ def __mock_config():
     mockConfig.db_path = '/tmp/.nvpyUnitTests'
     mockConfig.txt_path = '/tmp/.nvpyUnitTests/notes'
     mockConfig.simplenote_sync = 0
+    mockConfig.list_virtual = list_virtual
     return mockConfig
 
 
 notes_list: typing.Optional[NotesListModel] = None
 view: typing.Optional[View] = None
+# Views by list_virtual.
+views: typing.Dict[int, View] = {}
 
 
-def setup(notes_count):
+def setup(notes_count, list_virtual=0):
     if os.path.isdir('/tmp/.nvpyUnitTests'):
         shutil.rmtree('/tmp/.nvpyUnitTests')
 
@@ -47,8 +50,9 @@ def setup(notes_count):
     ])
 
     global view
-    if not view:
-        view = View(__mock_config(), notes_list)
+    if list_virtual not in views:
+        views[list_virtual] = View(__mock_config(list_virtual), notes_list)
+    view = views[list_virtual]
 
 
 def bench_refresh_notes_list_view():
@@ -57,13 +61,31 @@ def bench_refresh_notes_list_view():
         view.notes_list.append(ni.note, NoteConfig(tagfound=ni.tagfound, match_regexp=None))
 
 
+def bench_refresh_notes_list_view_batch():
+    view.notes_list.clear()
+    view.notes_list.extend([(ni.key, ni.note, NoteConfig(tagfound=ni.tagfound, match_regexp=None))
+                            for ni in notes_list.list])
+
+
 def main():
-    for count in [10, 100, 1000, 10000]:
+    for count in [10, 100, 1000, 10000, 100000]:
         Benchmark(
             label=f'refresh_notes_list_view/{count}_notes',
             setup=functools.partial(setup, count),
             func=bench_refresh_notes_list_view,
         ).run()
+    for count in [10, 100, 1000, 10000, 100000]:
+        Benchmark(
+            label=f'refresh_notes_list_view/batch/{count}_notes',
+            setup=functools.partial(setup, count),
+            func=bench_refresh_notes_list_view_batch,
+        ).run()
+    for count in [10, 100, 1000, 10000, 100000]:
+        Benchmark(
+            label=f'refresh_notes_list_view/virtual/{count}_notes',
+            setup=functools.partial(setup, count, list_virtual=1),
+            func=bench_refresh_notes_list_view,
+        ).run()
 
 
 if __name__ == '__main__':
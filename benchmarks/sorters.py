@@ -1,12 +1,12 @@
 import functools
 import unittest
 
-from nvpy import nvpy, notes_db
+from nvpy import nvpy, notes_db, indexes
 from benchmarks import Benchmark
 
 notes_10k = [
     notes_db.NoteInfo(
-        key='',
+        key=f'{y}-{x}',
         note={
             'content': chr(ord('a') + y) + str(x),
         },
@@ -16,6 +16,18 @@ notes_10k = [
 assert len(notes_10k) == 10000
 
 
+def cached_sort_key(sorter):
+    """ Return a sort key function that looks up keys cached in a SortedOrder, like NotesDB does. """
+    order = indexes.SortedOrder(lambda key, note: notes_db.NoteInfo(key, note, 0))
+    order.rebuild(sorter, {o.key: o.note for o in notes_10k})
+    return lambda o: order.sort_key(o.key)
+
+
+def update_sorted_order(order, notes):
+    for o in notes:
+        order.update(o.key, o.note)
+
+
 class BenchmarkSorters(unittest.TestCase):
 
     def test_nop_10k_10times(self):
@@ -34,6 +46,16 @@ class BenchmarkSorters(unittest.TestCase):
         for i in range(10):
             sorted(notes_10k, key=notes_db.AlphaNumSorter())
 
+    def test_alphanum_cached_10k_10times(self):
+        key_func = cached_sort_key(notes_db.AlphaNumSorter())
+        for i in range(10):
+            sorted(notes_10k, key=key_func)
+
+    def test_collation_10k_10times(self):
+        sorter = notes_db.CollationSorter()
+        for i in range(10):
+            sorted(notes_10k, key=sorter)
+
     def test_date_10k_10times(self):
         for i in range(10):
             sorted(notes_10k, key=notes_db.DateSorter(nvpy.SortMode.MODIFICATION_DATE))
@@ -53,6 +75,7 @@ def main():
         notes_db.PinnedSorter(),
         notes_db.AlphaSorter(),
         notes_db.AlphaNumSorter(),
+        notes_db.CollationSorter(),
         notes_db.DateSorter(nvpy.SortMode.MODIFICATION_DATE),
     ]
     for sorter in sorters:
@@ -61,6 +84,25 @@ def main():
             setup=nop,
             func=functools.partial(bench_sorter, notes_10k, sorter),
         ).run()
+    # Sort keys cached by NotesDB between searches.
+    Benchmark(
+        label='sorter/notes_10k/AlphaNumSorter(cached)',
+        setup=nop,
+        func=functools.partial(bench_sorter, notes_10k, cached_sort_key(notes_db.AlphaNumSorter())),
+    ).run()
+    Benchmark(
+        label='sorter/notes_10k/CollationSorter(cached)',
+        setup=nop,
+        func=functools.partial(bench_sorter, notes_10k, cached_sort_key(notes_db.CollationSorter())),
+    ).run()
+    # Moving 100 changed notes in the presorted order, instead of sorting again.
+    order = indexes.SortedOrder(lambda key, note: notes_db.NoteInfo(key, note, 0))
+    order.rebuild(notes_db.AlphaNumSorter(), {o.key: o.note for o in notes_10k})
+    Benchmark(
+        label='sorter/notes_10k/SortedOrder.update*100',
+        setup=nop,
+        func=functools.partial(update_sorted_order, order, notes_10k[::100]),
+    ).run()
 
 
 if __name__ == '__main__':
@@ -11,6 +11,9 @@
 #   # Download all notes to local.
 #   ./nvpy-db-utils.py update --direction download --all
 #
+#   # List groups of near-duplicate notes.
+#   ./nvpy-db-utils.py similar --threshold 0.8
+#
 #   # Use custom configuration.
 #   ./nvpy-db-utils.py --cfg ~/nvpy-backup.cfg update --direction download --all
 
@@ -23,7 +26,7 @@ import typing
 
 import simplenote  # type:ignore
 
-from nvpy import nvpy
+from nvpy import indexes, nvpy, utils
 
 
 class APIError(Exception):
@@ -182,6 +185,30 @@ class UpdateCmd:
             raise RuntimeError('bug: invalid direction', args.direction)
 
 
+class SimilarCmd:
+
+    def run(self, args, config):
+        local = LocalDB(config.db_path)
+        notes = {}
+        index = indexes.MinHashIndex()
+        for file in local.target_files([], is_all=True):
+            with open(file) as f:
+                note = json.load(f)
+            if note.get('deleted'):
+                continue
+            key = local.key_from_path(file)
+            notes[key] = note
+            index.update(key, note)
+
+        clusters = [sorted(c) for c in index.clusters(notes, args.threshold)]
+        clusters.sort(key=len, reverse=True)
+        for c in clusters:
+            for key in c:
+                print('{}  {}'.format(key, utils.get_note_title(notes[key])))
+            print('')
+        print('Done.  Found {} groups of similar notes.'.format(len(clusters)))
+
+
 def parse_cmd_line_args():
     p = argparse.ArgumentParser()
     p.add_argument('--cfg', '-c', dest='cfg', type=pathlib.Path, metavar='nvpy.cfg', help='path to config file')
@@ -204,6 +231,10 @@ def parse_cmd_line_args():
     update.add_argument('--direction', '-d', choices=('download', 'upload'), required=True)
     update.add_argument('keys', nargs='*')
 
+    similar = sp.add_parser('similar')
+    similar.set_defaults(clazz=SimilarCmd)
+    similar.add_argument('--threshold', '-t', type=float, default=0.8)
+
     return p.parse_args()
 
 
@@ -2,7 +2,7 @@
 
 import typing
 
-from . import nvpy
+from . import highlighting, nvpy
 
 
 class NoteCreatedEvent(typing.NamedTuple):
@@ -14,6 +14,11 @@ class NoteSelectionChangedEvent(typing.NamedTuple):
     sel: int
 
 
+class NoteJumpEvent(typing.NamedTuple):
+    # LOCAL key of the note to jump to.
+    key: str
+
+
 class CheckboxChangedEvent(typing.NamedTuple):
     value: bool
 
@@ -32,6 +37,19 @@ class TagRemovedEvent(typing.NamedTuple):
     tag: str
 
 
+class SavedSearchAddedEvent(typing.NamedTuple):
+    name: str
+    query: str
+
+
+class SavedSearchSelectedEvent(typing.NamedTuple):
+    name: str
+
+
+class SavedSearchRemovedEvent(typing.NamedTuple):
+    name: str
+
+
 class NoteStatusChangedEvent(typing.NamedTuple):
     what: str
     key: str
@@ -64,3 +82,8 @@ class SortModeChangedEvent(typing.NamedTuple):
 
 class PinnedOnTopChangedEvent(typing.NamedTuple):
     pinned_on_top: bool
+
+
+class MatchesFoundEvent(typing.NamedTuple):
+    job: 'highlighting.MatchJob'
+    matches: typing.List[typing.Match]
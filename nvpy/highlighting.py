@@ -0,0 +1,351 @@
+# nvPY: cross-platform note-taking app with simplenote syncing
+# copyright 2012 by Charl P. Botha <cpbotha@vxlabs.com>
+# new BSD license
+""" Highlighting of links, search results and markdown in the note editor
+
+The highlighters only work on offsets into the text.  The view turns their changes into Tk tags.
+"""
+
+import bisect
+import re
+import typing
+from queue import Queue
+from threading import Thread
+
+from . import utils
+from .debug import wrap_buggy_function
+
+# List of Regex patterns to match various link types to be activated
+LINK_PATTERNS = [
+    r"(\[\[[^][]*\]\])",  # Inter-note Links
+    r"\b((https?|ftp|file)://[-\w+&@#/%?=~|!:,.;]*[\w+&@#/%=~|])",  # Http(s) / FTP / File Links
+    r"(mailto:[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+)",  # Mailto Links
+    r"((?:tel|mid):[^\s]+)",  # Tel / Mid Links
+    r"((?:thunderlink|irc|ircs|irc6)://[^\s]+)",  # Thunderbird and IRC Links
+    r"(message:(?://)?(?:%3c|<).*(?:%3e|>))"  # Leopard Mail Message Links
+]
+LINK_RE = re.compile('|'.join(LINK_PATTERNS))
+
+# The title is the first non whitespace line.  It is followed by the headings.
+MARKDOWN_RE = re.compile(r'\A(?:%s)|^#.*$' % (utils.note_title_re.pattern, ), re.MULTILINE)
+
+_NEWLINE_RE = re.compile('\n')
+
+# Characters outside the Basic Multilingual Plane.  Tk counts each of them as two columns.
+_ASTRAL_RE = re.compile('[\U00010000-\U0010ffff]')
+
+# A pattern that only consists of literal text without newlines, and alternatives of it.
+_LITERAL_RE = re.compile(r'(?:\\[^\w\n]|[^\\\n.^$*+?{}\[\]()])+(?:\|(?:\\[^\w\n]|[^\\\n.^$*+?{}\[\]()])+)*')
+
+
+class Edit(typing.NamedTuple):
+    """ The characters from start to start + removed were replaced by the inserted text. """
+    start: int
+    removed: int
+    inserted: str
+
+
+class Change(typing.NamedTuple):
+    """ The spans that a highlighter removed and added in the text from start to end. """
+    start: int
+    end: int
+    # Values of the removed spans.
+    removed: typing.List[typing.Any]
+    # (start, end, value) of the added spans.
+    added: typing.List[typing.Tuple[int, int, typing.Any]]
+
+
+class LineTable:
+    """ The offsets at which the lines of a text start, to convert between offsets and Tk's line.column indices
+    without counting characters from the start of the text.
+
+    Offsets count code points, but Tk counts a character outside the BMP (an emoji) as two columns.  The conversions
+    take the text to find such characters before the column in its line.
+    """
+
+    def __init__(self, content: str):
+        self.starts = [0] + [mo.end() for mo in _NEWLINE_RE.finditer(content)]
+
+    def update(self, edit: Edit):
+        """ Update the line starts after edit. """
+        starts = self.starts
+        # Lines that start in the removed text are gone, and the lines after it move.
+        i = bisect.bisect_right(starts, edit.start)
+        j = bisect.bisect_right(starts, edit.start + edit.removed, i)
+        delta = len(edit.inserted) - edit.removed
+        starts[i:] = [edit.start + mo.end()
+                      for mo in _NEWLINE_RE.finditer(edit.inserted)] + [start + delta for start in starts[j:]]
+
+    def index(self, offset: int, content: str) -> str:
+        """ Return the line.column index of offset in content. """
+        line = bisect.bisect_right(self.starts, offset) - 1
+        start = self.starts[line]
+        column = offset - start + len(_ASTRAL_RE.findall(content, start, offset))
+        return '%d.%d' % (line + 1, column)
+
+    def offset(self, index: str, content: str) -> int:
+        """ Return the offset of a line.column index in content. """
+        line, column = index.split('.')
+        pos = start = self.starts[int(line) - 1]
+        end = start + int(column)
+        # Each character outside the BMP before the column takes two of its columns.
+        mo = _ASTRAL_RE.search(content, pos, end)
+        while mo is not None:
+            end -= 1
+            mo = _ASTRAL_RE.search(content, mo.end(), end)
+        return end
+
+
+def is_line_local(pattern: typing.Pattern) -> bool:
+    """ Return True if pattern can only match literal text within a line, like the patterns of gstyle searches. """
+    return _LITERAL_RE.fullmatch(pattern.pattern) is not None
+
+
+def link_lookback(content: str, pos: int) -> typing.Optional[int]:
+    """ Return the start of the only [[note link]] before the line of pos that an edit at pos could change.
+
+    A "[[" can match up to the next bracket, across any number of lines.  Only a "[[" that is not followed by another
+    bracket before pos can reach pos.
+    """
+    last = max(content.rfind('[', 0, pos - 1), content.rfind(']', 0, pos - 1))
+    if last > 0 and content[last - 1:last + 1] == '[[':
+        return last - 1
+    return None
+
+
+class PatternHighlighter:
+    """ The spans of all matches of a pattern in a text.  The spans are updated after an edit without matching the
+    whole text again.
+
+    A match attempt at a position reads the characters after it, and for \\b or ^ the one before it.  If the pattern
+    is line local, an attempt that fails is assumed to read no further than the end of its line.  lookback(content,
+    pos) returns an earlier position whose attempt can fail further on, if any.  Patterns must not match empty
+    strings.
+
+    A value is computed with value(match) for each span when it is added, and returned again when it is removed.
+    """
+
+    # An edit larger than 1/FULL_PASS_RATIO of the text is followed by a full pass.
+    FULL_PASS_RATIO = 16
+
+    def __init__(self,
+                 pattern: typing.Optional[typing.Pattern],
+                 value: typing.Callable[[typing.Match], typing.Any] = lambda mo: None,
+                 line_local: bool = True,
+                 lookback: typing.Optional[typing.Callable[[str, int], typing.Optional[int]]] = None):
+        self.pattern = pattern
+        self.value = value
+        self.line_local = line_local
+        self.lookback = lookback
+        # The spans are sorted and do not overlap.  Span i is from starts[i] to ends[i], plus shift if i is shift_from
+        # or later.  It is the size change of the edits since the last full pass, so that a series of edits in the
+        # same place does not move all spans after it one by one.  values[i] belongs to span i.
+        self.starts: typing.List[int] = []
+        self.ends: typing.List[int] = []
+        self.values: typing.List[typing.Any] = []
+        self.shift_from = 0
+        self.shift = 0
+
+    def _start(self, i: int) -> int:
+        return self.starts[i] + self.shift if i >= self.shift_from else self.starts[i]
+
+    def _end(self, i: int) -> int:
+        return self.ends[i] + self.shift if i >= self.shift_from else self.ends[i]
+
+    def _first_ending_after(self, pos: int) -> int:
+        """ Return the index of the first span that ends after pos. """
+        if self.shift_from < len(self.ends) and self._end(self.shift_from) <= pos:
+            return bisect.bisect_right(self.ends, pos - self.shift, self.shift_from)
+        return bisect.bisect_right(self.ends, pos, 0, self.shift_from)
+
+    def _first_starting_from(self, pos: int) -> int:
+        """ Return the index of the first span that starts at or after pos. """
+        if self.shift_from < len(self.starts) and self._start(self.shift_from) < pos:
+            return bisect.bisect_left(self.starts, pos - self.shift, self.shift_from)
+        return bisect.bisect_left(self.starts, pos, 0, self.shift_from)
+
+    def _move_shift(self, i: int):
+        """ Shift the spans between shift_from and i, so that the shift applies from span i on. """
+        starts, ends, shift = self.starts, self.ends, self.shift
+        if not shift:
+            self.shift_from = i
+            return
+        if i > self.shift_from:
+            shift = -shift
+        for j in range(min(i, self.shift_from), max(i, self.shift_from)):
+            starts[j] -= shift
+            ends[j] -= shift
+        self.shift_from = i
+
+    def __len__(self):
+        return len(self.starts)
+
+    def span(self, i: int) -> typing.Tuple[int, int, typing.Any]:
+        """ Return (start, end, value) of the i'th span. """
+        return self._start(i), self._end(i), self.values[i]
+
+    def span_at(self, pos: int) -> typing.Optional[typing.Tuple[int, int, typing.Any]]:
+        """ Return (start, end, value) of the span that contains the character at pos, or None. """
+        i = self._first_ending_after(pos)
+        if i < len(self.starts) and self._start(i) <= pos:
+            return self.span(i)
+        return None
+
+    def spans(self,
+              start: int = 0,
+              end: typing.Optional[int] = None) -> typing.List[typing.Tuple[int, int, typing.Any]]:
+        """ Return (start, end, value) of the spans that overlap the text from start to end. """
+        i = self._first_ending_after(start)
+        j = len(self.starts) if end is None else self._first_starting_from(end)
+        return [(self._start(x), self._end(x), self.values[x]) for x in range(i, j)]
+
+    def clear(self) -> typing.List[typing.Any]:
+        """ Remove all spans, and return their values. """
+        removed = self.values
+        self.starts = []
+        self.ends = []
+        self.values = []
+        self.shift_from = 0
+        self.shift = 0
+        return removed
+
+    def matches(self, content: str) -> typing.List[typing.Match]:
+        """ Return all matches of the pattern in content.  Only reads the highlighter, so it can run on another thread.
+        """
+        return [] if self.pattern is None else list(self.pattern.finditer(content))
+
+    def highlight(self, content: str, matches: typing.Optional[typing.List[typing.Match]] = None) -> Change:
+        """ Match the whole text, and replace all spans.  matches are the result of matches(content), if it was called
+        already. """
+        if matches is None:
+            matches = self.matches(content)
+        removed = self.clear()
+        for mo in matches:
+            self.starts.append(mo.start())
+            self.ends.append(mo.end())
+            self.values.append(self.value(mo))
+        return Change(0, len(content), removed, list(zip(self.starts, self.ends, self.values)))
+
+    def needs_full_pass(self, content: str, edit: Edit) -> bool:
+        """ Return True if update(content, edit) would match the whole text again. """
+        return self.pattern is not None and (not self.line_local or
+                                             (edit.removed + len(edit.inserted)) * self.FULL_PASS_RATIO > len(content))
+
+    def update(self, content: str, edit: Edit) -> Change:
+        """ Update the spans after edit, which gave content.  The result is the same as a full pass. """
+        if self.pattern is None:
+            return Change(0, 0, [], [])
+        if self.needs_full_pass(content, edit):
+            return self.highlight(content)
+        inserted = len(edit.inserted)
+
+        count = len(self.starts)
+        delta = inserted - edit.removed
+        # Nothing changes before the line of the edit, except for matches that overlap it.
+        start = content.rfind('\n', 0, edit.start) + 1
+        i = self._first_ending_after(start)
+        if i < count and self._start(i) < start:
+            start = self._start(i)
+        pos = self.lookback(content, edit.start) if self.lookback is not None else None
+        if pos is not None and pos < start:
+            j = self._first_ending_after(pos)
+            if j == count or self._start(j) >= pos:
+                # The old and the full pass attempt a match at pos.
+                mo = self.pattern.match(content, pos)
+                span = mo.span() if mo else None
+                old_span = (pos, self._end(j)) if j < count and self._start(j) == pos else None
+                if span != old_span:
+                    start = pos
+                    i = j
+
+        # Match until both passes attempt a match at the same character after the edit.  From there on they find the
+        # same matches.  k is the first old span that ends after pos.
+        matches = []
+        pos = start
+        k = i
+        edit_end = edit.start + inserted
+        while True:
+            if pos >= len(content):
+                k = count
+                break
+            if pos > edit_end:
+                old_pos = pos - delta
+                while k < count and self._end(k) <= old_pos:
+                    k += 1
+                if k == count or self._start(k) >= old_pos:
+                    break
+            mo = self.pattern.match(content, pos)
+            if mo:
+                matches.append(mo)
+                pos = mo.end()
+            else:
+                pos += 1
+
+        # Keep the old spans that were found again.  Spans that overlap the edit are always replaced.
+        old_values = {}
+        removed = []
+        old_end = edit.start + edit.removed
+        for j in range(i, k):
+            span_start, span_end = self._start(j), self._end(j)
+            if span_end <= edit.start:
+                old_values[(span_start, span_end)] = self.values[j]
+            elif span_start >= old_end:
+                old_values[(span_start + delta, span_end + delta)] = self.values[j]
+            else:
+                removed.append(self.values[j])
+        new_starts = []
+        new_ends = []
+        new_values = []
+        added = []
+        for mo in matches:
+            span = mo.span()
+            if span in old_values:
+                value = old_values.pop(span)
+            else:
+                value = self.value(mo)
+                added.append((span[0], span[1], value))
+            new_starts.append(span[0])
+            new_ends.append(span[1])
+            new_values.append(value)
+        removed.extend(old_values.values())
+
+        # The spans before i are not shifted, and the spans from k on are shifted by delta more than before.
+        self._move_shift(i)
+        self.starts[i:k] = new_starts
+        self.ends[i:k] = new_ends
+        self.values[i:k] = new_values
+        self.shift_from = i + len(new_starts)
+        self.shift += delta
+        return Change(start, pos, removed, added)
+
+
+class MatchJob(typing.NamedTuple):
+    """ Find the matches of highlighter in content, which is the text of the editor at revision. """
+    highlighter: PatternHighlighter
+    content: str
+    revision: int
+
+
+class MatchWorker:
+    """ A background thread that runs the full passes of large texts.
+
+    done(job, matches) is called on the worker thread when the matches of a job were found.  It must hand them over
+    to the main thread, which calls job.highlighter.highlight(job.content, matches) if the text is still at
+    job.revision.
+    """
+
+    def __init__(self, done: typing.Callable[[MatchJob, typing.List[typing.Match]], None]):
+        self.done = done
+        self.jobs: 'Queue[MatchJob]' = Queue()
+
+        thread = Thread(target=wrap_buggy_function(self.worker))
+        thread.daemon = True
+        thread.start()
+
+    def submit(self, job: MatchJob):
+        self.jobs.put(job)
+
+    def worker(self):
+        while True:
+            job = self.jobs.get()
+            self.done(job, job.highlighter.matches(job.content))
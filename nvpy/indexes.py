@@ -0,0 +1,763 @@
+# nvPY: cross-platform note-taking app with simplenote syncing
+# copyright 2012 by Charl P. Botha <cpbotha@vxlabs.com>
+# new BSD license
+""" Secondary indexes over the notes dict
+
+NotesDB keeps these indexes up to date one note at a time.  They are not thread safe.  Callers must hold the notes_lock
+of the NotesDB.
+"""
+
+import bisect
+import random
+import re
+import typing
+import zlib
+
+try:
+    import numpy  # type:ignore
+except ImportError:
+    HAVE_NUMPY = False
+else:
+    HAVE_NUMPY = True
+
+
+class DateIndex:
+    """ Local keys of notes sorted by a date field, for range lookups with bisect. """
+
+    def __init__(self, field: str):
+        self.field = field
+        # _stamps is sorted.  _keys[i] is the local key of the note with timestamp _stamps[i].
+        self._stamps: typing.List[float] = []
+        self._keys: typing.List[str] = []
+        self._stamp_of: typing.Dict[str, float] = {}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def clear(self):
+        self._stamps = []
+        self._keys = []
+        self._stamp_of = {}
+
+    def update(self, key: str, note: typing.Optional[dict]):
+        """ Add, move or remove the note.  Pass None as note to remove it. """
+        stamp = None
+        if note is not None:
+            try:
+                stamp = float(note[self.field])
+            except (KeyError, TypeError, ValueError):
+                # Notes without a valid date are not indexed.
+                pass
+
+        old = self._stamp_of.get(key)
+        if old is not None:
+            if old == stamp:
+                return
+            i = bisect.bisect_left(self._stamps, old)
+            i = self._keys.index(key, i, bisect.bisect_right(self._stamps, old))
+            del self._stamps[i]
+            del self._keys[i]
+            del self._stamp_of[key]
+
+        if stamp is not None:
+            i = bisect.bisect_right(self._stamps, stamp)
+            self._stamps.insert(i, stamp)
+            self._keys.insert(i, key)
+            self._stamp_of[key] = stamp
+
+    def stamp(self, key: str) -> typing.Optional[float]:
+        return self._stamp_of.get(key)
+
+    def _bounds(self, r: 'DateRange') -> typing.Tuple[int, int]:
+        find_start = bisect.bisect_left if r.include_lo else bisect.bisect_right
+        find_end = bisect.bisect_right if r.include_hi else bisect.bisect_left
+        start = find_start(self._stamps, r.lo)
+        return start, max(find_end(self._stamps, r.hi), start)
+
+    def count(self, r: 'DateRange') -> int:
+        """ Return the number of notes in the range. """
+        start, end = self._bounds(r)
+        return end - start
+
+    def keys(self, r: 'DateRange') -> typing.List[str]:
+        """ Return local keys of notes in the range. """
+        start, end = self._bounds(r)
+        return self._keys[start:end]
+
+
+class DateRange(typing.NamedTuple):
+    """ Range of timestamps.  By default, it is half-open: [lo, hi) """
+    lo: float = float('-inf')
+    hi: float = float('inf')
+    include_lo: bool = True
+    include_hi: bool = False
+
+    def includes(self, stamp: float) -> bool:
+        if stamp < self.lo or (stamp == self.lo and not self.include_lo):
+            return False
+        if stamp > self.hi or (stamp == self.hi and not self.include_hi):
+            return False
+        return True
+
+
+class FlagIndex:
+    """ Local keys of notes for which the predicate is true. """
+
+    def __init__(self, predicate: typing.Callable[[dict], typing.Any]):
+        self.predicate = predicate
+        self.keys: typing.Set[str] = set()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return key in self.keys
+
+    def clear(self):
+        self.keys.clear()
+
+    def update(self, key: str, note: typing.Optional[dict]):
+        """ Add or remove the note.  Pass None as note to remove it. """
+        if note is not None and self.predicate(note):
+            self.keys.add(key)
+        else:
+            self.keys.discard(key)
+
+
+class SlotMap:
+    """ Assigns a stable row number (slot) to each local key, for indexes stored in arrays.
+
+    Slots of removed keys are reused.
+    """
+
+    def __init__(self):
+        self.slot_of: typing.Dict[str, int] = {}
+        # key_of[slot] is the local key in the slot, or None if the slot is free.
+        self.key_of: typing.List[typing.Optional[str]] = []
+        self._free: typing.List[int] = []
+
+    def __len__(self):
+        return len(self.slot_of)
+
+    @property
+    def capacity(self) -> int:
+        return len(self.key_of)
+
+    def clear(self):
+        self.slot_of = {}
+        self.key_of = []
+        self._free = []
+
+    def acquire(self, key: str) -> int:
+        """ Return the slot of the key.  A new slot is assigned if the key does not have one. """
+        slot = self.slot_of.get(key)
+        if slot is None:
+            if self._free:
+                slot = self._free.pop()
+                self.key_of[slot] = key
+            else:
+                slot = len(self.key_of)
+                self.key_of.append(key)
+            self.slot_of[key] = slot
+        return slot
+
+    def release(self, key: str) -> typing.Optional[int]:
+        """ Free the slot of the key and return it, or None if the key does not have one. """
+        slot = self.slot_of.pop(key, None)
+        if slot is not None:
+            self.key_of[slot] = None
+            self._free.append(slot)
+        return slot
+
+
+class SignatureIndex:
+    """ Bloom-style bitsets of content trigrams, stored as rows of one NumPy array.
+
+    If a note contains a word, the signature of the note contains all bits of the signature of the word.  Testing it
+    for all notes is a single vectorized operation, which rejects most notes before the exact substring checks.
+    Signatures are built from case folded text, so they serve both case sensitive and insensitive searches.
+
+    Requires NumPy.  Signatures are computed lazily, on the first lookup after the note has been changed.
+    """
+
+    BITS = 1024
+    # Minimum length of words that can be looked up.
+    NGRAM = 3
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._slots = SlotMap()
+        self._sigs = numpy.zeros((0, self.BITS // 64), dtype=numpy.uint64)
+        # False for free slots.
+        self._valid = numpy.zeros(0, dtype=bool)
+        # Content each signature was computed from.  Used to skip changes that do not touch the content.
+        self._content_of: typing.Dict[str, str] = {}
+        # Local keys of notes whose signatures must be recomputed.
+        self._dirty: typing.Set[str] = set()
+
+    def update(self, key: str, note: typing.Optional[dict]):
+        """ Add, update or remove the note.  Pass None as note to remove it. """
+        if note is None:
+            self._dirty.discard(key)
+            self._content_of.pop(key, None)
+            slot = self._slots.release(key)
+            if slot is not None:
+                self._valid[slot] = False
+            return
+
+        if key not in self._content_of or self._content_of[key] is not note.get('content'):
+            self._dirty.add(key)
+
+    def _flush(self, notes: typing.Dict[str, dict]):
+        for key in self._dirty:
+            content = notes[key].get('content') or ''
+            slot = self._slots.acquire(key)
+            if slot >= len(self._valid):
+                self._grow(max(2 * len(self._valid), 64))
+            self._sigs[slot] = self.signature([content])
+            self._valid[slot] = True
+            self._content_of[key] = content
+        self._dirty.clear()
+
+    def _grow(self, capacity: int):
+        sigs = numpy.zeros((capacity, self._sigs.shape[1]), dtype=numpy.uint64)
+        sigs[:len(self._sigs)] = self._sigs
+        valid = numpy.zeros(capacity, dtype=bool)
+        valid[:len(self._valid)] = self._valid
+        self._sigs, self._valid = sigs, valid
+
+    @classmethod
+    def signature(cls, texts: typing.Iterable[str]):
+        """ Return the signature of all trigrams in texts, as an array of uint64. """
+        bits = numpy.zeros(cls.BITS, dtype=bool)
+        for text in texts:
+            codes = numpy.frombuffer(text.casefold().encode('utf-32-le'), dtype=numpy.uint32)
+            if len(codes) < cls.NGRAM:
+                continue
+            h = (codes[:-2] * numpy.uint32(0x9E3779B1)) ^ (codes[1:-1] * numpy.uint32(0x85EBCA77)) ^ \
+                (codes[2:] * numpy.uint32(0xC2B2AE3D))
+            h ^= h >> numpy.uint32(15)
+            bits[h & numpy.uint32(cls.BITS - 1)] = True
+        return numpy.packbits(bits, bitorder='little').view(numpy.uint64)
+
+    def candidates(self, notes: typing.Dict[str, dict],
+                   words: typing.Iterable[str]) -> typing.Optional[typing.List[str]]:
+        """ Return local keys of notes that may contain all the words.
+
+        Returns None if no word is long enough to be looked up.  In that case, all notes are candidates.
+        """
+        words = [w for w in words if len(w) >= self.NGRAM]
+        if not words:
+            return None
+
+        self._flush(notes)
+        query = self.signature(words)
+        hits = numpy.flatnonzero(((self._sigs & query) == query).all(axis=1) & self._valid)
+        key_of = self._slots.key_of
+        return [key_of[slot] for slot in hits.tolist()]  # type:ignore
+
+
+class _TrieNode:
+    __slots__ = ('children', 'tag_ids')
+
+    def __init__(self):
+        self.children: typing.Dict[str, '_TrieNode'] = {}
+        # Ids of all tags below this node.
+        self.tag_ids: typing.Set[int] = set()
+
+
+class TagCatalog:
+    """ Tags of all active notes.
+
+    Tag names are interned as integer ids.  Each tag has a posting set of local keys of notes having it; its size is
+    the usage count.  A prefix trie over case folded names finds tags by prefix without scanning all tags.  Tags that
+    are not used by any note are removed from the trie, but keep their ids.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._ids: typing.Dict[str, int] = {}
+        self._names: typing.List[str] = []
+        self._postings: typing.List[typing.Set[str]] = []
+        self._tags_of: typing.Dict[str, typing.FrozenSet[int]] = {}
+        self._trie = _TrieNode()
+
+    def _intern(self, tag: str) -> int:
+        tag_id = self._ids.get(tag)
+        if tag_id is None:
+            tag_id = self._ids[tag] = len(self._names)
+            self._names.append(tag)
+            self._postings.append(set())
+        return tag_id
+
+    def update(self, key: str, note: typing.Optional[dict]):
+        """ Add, update or remove the note.  Pass None as note to remove it. """
+        new = frozenset(self._intern(t) for t in note.get('tags') or []) if note is not None else frozenset()
+        old = self._tags_of.get(key, frozenset())
+        if new == old:
+            return
+
+        for tag_id in old - new:
+            postings = self._postings[tag_id]
+            postings.discard(key)
+            if not postings:
+                self._trie_update(tag_id, add=False)
+        for tag_id in new - old:
+            postings = self._postings[tag_id]
+            if not postings:
+                self._trie_update(tag_id, add=True)
+            postings.add(key)
+
+        if new:
+            self._tags_of[key] = new
+        else:
+            self._tags_of.pop(key, None)
+
+    def _trie_update(self, tag_id: int, add: bool):
+        node = self._trie
+        for c in self._names[tag_id].casefold():
+            if add:
+                node.tag_ids.add(tag_id)
+                node = node.children.setdefault(c, _TrieNode())
+            else:
+                node.tag_ids.discard(tag_id)
+                child = node.children[c]
+                if len(child.tag_ids) == 1:
+                    # tag_id is the only tag below the child.
+                    del node.children[c]
+                    return
+                node = child
+        if add:
+            node.tag_ids.add(tag_id)
+        else:
+            node.tag_ids.discard(tag_id)
+
+    def _ids_with_prefix(self, prefix: str, case_sensitive: bool) -> typing.Iterable[int]:
+        node = self._trie
+        for c in prefix.casefold():
+            child = node.children.get(c)
+            if child is None:
+                return ()
+            node = child
+        if case_sensitive:
+            return [i for i in node.tag_ids if self._names[i].startswith(prefix)]
+        return node.tag_ids
+
+    def tags(self) -> typing.List[str]:
+        """ Return names of the tags in use. """
+        return [self._names[i] for i in self._trie.tag_ids]
+
+    def count(self, tag: str) -> int:
+        """ Return the number of notes having the tag. """
+        tag_id = self._ids.get(tag)
+        return 0 if tag_id is None else len(self._postings[tag_id])
+
+    def tags_with_prefix(self, prefix: str, case_sensitive=True) -> typing.List[str]:
+        return [self._names[i] for i in self._ids_with_prefix(prefix, case_sensitive)]
+
+    def keys_with_prefix(self, prefix: str) -> typing.Set[str]:
+        """ Return local keys of notes having a tag that starts with prefix. """
+        keys: typing.Set[str] = set()
+        for i in self._ids_with_prefix(prefix, True):
+            keys |= self._postings[i]
+        return keys
+
+
+class TitleIndex:
+    """ Local keys of notes by title, with sorted arrays of titles for prefix lookups with bisect. """
+
+    def __init__(self, get_title: typing.Callable[[dict], str]):
+        self.get_title = get_title
+        self.clear()
+
+    def clear(self):
+        self._keys_of: typing.Dict[str, typing.Set[str]] = {}
+        self._title_of: typing.Dict[str, str] = {}
+        # Distinct titles, sorted.
+        self._titles: typing.List[str] = []
+        # (case folded title, title) of distinct titles, sorted.
+        self._folded: typing.List[typing.Tuple[str, str]] = []
+
+    def update(self, key: str, note: typing.Optional[dict]):
+        """ Add, update or remove the note.  Pass None as note to remove it. """
+        title = self.get_title(note) if note is not None else ''
+        old = self._title_of.get(key)
+        if old == title:
+            return
+
+        if old is not None:
+            keys = self._keys_of[old]
+            keys.discard(key)
+            if not keys:
+                del self._keys_of[old]
+                del self._titles[bisect.bisect_left(self._titles, old)]
+                del self._folded[bisect.bisect_left(self._folded, (old.casefold(), old))]
+            del self._title_of[key]
+
+        if title:
+            if title not in self._keys_of:
+                self._keys_of[title] = set()
+                bisect.insort(self._titles, title)
+                bisect.insort(self._folded, (title.casefold(), title))
+            self._keys_of[title].add(key)
+            self._title_of[key] = title
+
+    def keys(self, title: str) -> typing.Set[str]:
+        """ Return local keys of notes with the title. """
+        return self._keys_of.get(title, set())
+
+    def titles_with_prefix(self, prefix: str, case_sensitive=True) -> typing.List[str]:
+        """ Return titles starting with prefix, in sorted order. """
+        result = []
+        if case_sensitive:
+            for i in range(bisect.bisect_left(self._titles, prefix), len(self._titles)):
+                if not self._titles[i].startswith(prefix):
+                    break
+                result.append(self._titles[i])
+        else:
+            folded_prefix = prefix.casefold()
+            for i in range(bisect.bisect_left(self._folded, (folded_prefix, )), len(self._folded)):
+                folded, title = self._folded[i]
+                if not folded.startswith(folded_prefix):
+                    break
+                result.append(title)
+        return result
+
+
+class LinkGraph:
+    """ [[note links]] between notes.
+
+    Outgoing links of a note are parsed once per content change, when the graph is next queried.  Reverse edges map a
+    link target (a note title) to the local keys of notes linking to it, so backlinks are found without scanning the
+    notes.
+    """
+
+    def __init__(self, parse_links: typing.Callable[[str], typing.Iterable[str]]):
+        self.parse_links = parse_links
+        self.clear()
+
+    def clear(self):
+        self._links_of: typing.Dict[str, typing.FrozenSet[str]] = {}
+        self._linked_from: typing.Dict[str, typing.Set[str]] = {}
+        # Content the links were parsed from.  Used to skip changes that do not touch the content.
+        self._content_of: typing.Dict[str, str] = {}
+        # Local keys of notes whose links must be parsed again.
+        self._dirty: typing.Set[str] = set()
+
+    def update(self, key: str, note: typing.Optional[dict]):
+        """ Add, update or remove the note.  Pass None as note to remove it. """
+        if note is None:
+            self._dirty.discard(key)
+            self._content_of.pop(key, None)
+            self._set_links(key, frozenset())
+        elif key not in self._content_of or self._content_of[key] is not note.get('content'):
+            self._dirty.add(key)
+
+    def _flush(self, notes: typing.Dict[str, dict]):
+        for key in self._dirty:
+            content = notes[key].get('content') or ''
+            self._content_of[key] = content
+            self._set_links(key, frozenset(self.parse_links(content)))
+        self._dirty.clear()
+
+    def _set_links(self, key: str, new: typing.FrozenSet[str]):
+        old = self._links_of.get(key, frozenset())
+        for target in old - new:
+            keys = self._linked_from[target]
+            keys.discard(key)
+            if not keys:
+                del self._linked_from[target]
+        for target in new - old:
+            self._linked_from.setdefault(target, set()).add(key)
+
+        if new:
+            self._links_of[key] = new
+        else:
+            self._links_of.pop(key, None)
+
+    def links(self, notes: typing.Dict[str, dict], key: str) -> typing.FrozenSet[str]:
+        """ Return link targets of the note. """
+        self._flush(notes)
+        return self._links_of.get(key, frozenset())
+
+    def linked_from(self, notes: typing.Dict[str, dict], target: str) -> typing.Set[str]:
+        """ Return local keys of notes linking to the target. """
+        self._flush(notes)
+        return self._linked_from.get(target, set())
+
+
+class MetadataStore:
+    """ Dates and flags of all notes, deleted ones included, stored as NumPy columns indexed by slot.
+
+    Questions that otherwise need a loop over the notes dict, like which notes need saving or syncing and the order
+    of notes by date, become array operations.  Unlike the other indexes, it is updated with deleted notes too,
+    because they still have to be saved and synced.  Requires NumPy.
+    """
+
+    DATE_COLUMNS = ('modifydate', 'createdate', 'savedate', 'syncdate')
+
+    def __init__(self, is_pinned: typing.Callable[[dict], typing.Any]):
+        self.is_pinned = is_pinned
+        self.clear()
+
+    def __len__(self):
+        return len(self._slots)
+
+    def clear(self):
+        self._slots = SlotMap()
+        self._dates = {c: numpy.zeros(0) for c in self.DATE_COLUMNS}
+        self._pinned = numpy.zeros(0, dtype=bool)
+        self._deleted = numpy.zeros(0, dtype=bool)
+        # False for free slots.
+        self._valid = numpy.zeros(0, dtype=bool)
+
+    def update(self, key: str, note: typing.Optional[dict]):
+        """ Add, update or remove the note.  Pass None as note to remove it from the notes dict. """
+        if note is None:
+            slot = self._slots.release(key)
+            if slot is not None:
+                self._valid[slot] = False
+            return
+
+        slot = self._slots.acquire(key)
+        if slot >= len(self._valid):
+            self._grow(max(2 * len(self._valid), 64))
+        for c in self.DATE_COLUMNS:
+            self._dates[c][slot] = float(note.get(c, 0))
+        self._pinned[slot] = bool(self.is_pinned(note))
+        self._deleted[slot] = bool(note.get('deleted'))
+        self._valid[slot] = True
+
+    def _grow(self, capacity: int):
+
+        def grown(a):
+            b = numpy.zeros(capacity, dtype=a.dtype)
+            b[:len(a)] = a
+            return b
+
+        self._dates = {c: grown(a) for c, a in self._dates.items()}
+        self._pinned = grown(self._pinned)
+        self._deleted = grown(self._deleted)
+        self._valid = grown(self._valid)
+
+    def _keys(self, slots) -> typing.List[str]:
+        key_of = self._slots.key_of
+        return [key_of[slot] for slot in slots.tolist()]  # type:ignore
+
+    def need_save(self) -> typing.List[str]:
+        """ Return local keys of notes that have been modified or synced since they were saved. """
+        d = self._dates
+        return self._keys(
+            numpy.flatnonzero(((d['modifydate'] > d['savedate']) | (d['syncdate'] > d['savedate'])) & self._valid))
+
+    def need_sync(self, now: float, idle: float) -> typing.List[str]:
+        """ Return local keys of notes that have been modified since they were synced, but not in the last idle
+        seconds. """
+        modifydate = self._dates['modifydate']
+        mask = (modifydate > self._dates['syncdate']) & (now - modifydate > idle) & self._valid
+        return self._keys(numpy.flatnonzero(mask))
+
+    def keys_by_date(self, column: str, pinned_first=False) -> typing.List[str]:
+        """ Return local keys of active notes, most recent first.  Notes with the same date are in slot order. """
+        slots = numpy.flatnonzero(self._valid & ~self._deleted)
+        dates = -self._dates[column][slots]
+        if pinned_first:
+            order = numpy.lexsort((dates, ~self._pinned[slots]))
+        else:
+            order = numpy.argsort(dates, kind='stable')
+        return self._keys(slots[order])
+
+
+def _minhash_coefficients(n: int) -> typing.Tuple[typing.List[int], typing.List[int]]:
+    rng = random.Random(0)
+    return [rng.randrange(1, 2**31) for _ in range(n)], [rng.randrange(0, 2**31) for _ in range(n)]
+
+
+class MinHashIndex:
+    """ MinHash signatures of word shingles with LSH buckets, for finding near-duplicate notes.
+
+    Signatures are computed lazily and cached until the content of the note changes.  Notes sharing all rows of
+    any band fall into the same bucket; only notes in the same bucket are compared, so clustering takes roughly
+    linear time as long as buckets stay small.  NumPy is used to compute signatures if it is available.
+    """
+
+    NUM_PERM = 64
+    BANDS = 16
+    ROWS = NUM_PERM // BANDS
+    SHINGLE_SIZE = 3
+    # Prime larger than 2**32, the range of shingle hashes.
+    PRIME = 4294967311
+
+    # Hash functions h(x) = (a * x + b) % PRIME.  a and b are small enough for a * x + b to fit in uint64.
+    _A, _B = _minhash_coefficients(NUM_PERM)
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._sig_of: typing.Dict[str, typing.Tuple[int, ...]] = {}
+        self._buckets: typing.Dict[typing.Tuple[int, typing.Tuple[int, ...]], typing.Set[str]] = {}
+        # Content each signature was computed from.  Used to skip changes that do not touch the content.
+        self._content_of: typing.Dict[str, str] = {}
+        # Local keys of notes whose signatures must be recomputed.
+        self._dirty: typing.Set[str] = set()
+
+    def update(self, key: str, note: typing.Optional[dict]):
+        """ Add, update or remove the note.  Pass None as note to remove it. """
+        if note is None:
+            self._dirty.discard(key)
+            self._content_of.pop(key, None)
+            self._set_signature(key, None)
+        elif key not in self._content_of or self._content_of[key] is not note.get('content'):
+            self._dirty.add(key)
+
+    def _flush(self, notes: typing.Dict[str, dict]):
+        for key in self._dirty:
+            content = notes[key].get('content') or ''
+            self._content_of[key] = content
+            self._set_signature(key, self.signature(content))
+        self._dirty.clear()
+
+    def _set_signature(self, key: str, sig: typing.Optional[typing.Tuple[int, ...]]):
+        old = self._sig_of.pop(key, None)
+        if old is not None:
+            for band in self._bands(old):
+                bucket = self._buckets[band]
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band]
+        if sig is not None:
+            self._sig_of[key] = sig
+            for band in self._bands(sig):
+                self._buckets.setdefault(band, set()).add(key)
+
+    @classmethod
+    def _bands(cls, sig: typing.Tuple[int, ...]):
+        return [(i, sig[i * cls.ROWS:(i + 1) * cls.ROWS]) for i in range(cls.BANDS)]
+
+    @classmethod
+    def shingles(cls, content: str) -> typing.Set[str]:
+        words = re.findall(r'\w+', content.casefold())
+        if len(words) <= cls.SHINGLE_SIZE:
+            return {' '.join(words)} if words else set()
+        return {' '.join(words[i:i + cls.SHINGLE_SIZE]) for i in range(len(words) - cls.SHINGLE_SIZE + 1)}
+
+    @classmethod
+    def signature(cls, content: str) -> typing.Optional[typing.Tuple[int, ...]]:
+        """ Return the MinHash signature of the content, or None if it has no words. """
+        # crc32 rather than hash() so that signatures do not change between runs.
+        hashes = [zlib.crc32(s.encode('utf-8')) for s in cls.shingles(content)]
+        if not hashes:
+            return None
+
+        if HAVE_NUMPY:
+            x = numpy.array(hashes, dtype=numpy.uint64)
+            a = numpy.array(cls._A, dtype=numpy.uint64)[:, None]
+            b = numpy.array(cls._B, dtype=numpy.uint64)[:, None]
+            return tuple(((a * x + b) % numpy.uint64(cls.PRIME)).min(axis=1).tolist())
+        return tuple(min((a * x + b) % cls.PRIME for x in hashes) for a, b in zip(cls._A, cls._B))
+
+    @staticmethod
+    def similarity(sig1: typing.Tuple[int, ...], sig2: typing.Tuple[int, ...]) -> float:
+        """ Estimate the Jaccard similarity of shingles from their signatures. """
+        return sum(1 for h1, h2 in zip(sig1, sig2) if h1 == h2) / len(sig1)
+
+    def clusters(self, notes: typing.Dict[str, dict], threshold: float) -> typing.List[typing.Set[str]]:
+        """ Return groups of notes whose estimated similarity to another member is at least threshold. """
+        self._flush(notes)
+
+        parent: typing.Dict[str, str] = {}
+
+        def find(k):
+            while parent.get(k, k) != k:
+                k = parent[k]
+            return k
+
+        # Buckets and their members are visited in sorted order, so that the result does not depend on the order
+        # of sets.
+        for band in sorted(self._buckets):
+            bucket = self._buckets[band]
+            if len(bucket) < 2:
+                continue
+            # Any member may share the bucket by chance, so compare all pairs that are not in one group yet.
+            members = sorted(bucket)
+            for i, k in enumerate(members):
+                for j in members[:i]:
+                    if find(k) != find(j) and self.similarity(self._sig_of[j], self._sig_of[k]) >= threshold:
+                        parent[find(k)] = find(j)
+
+        groups: typing.Dict[str, typing.Set[str]] = {}
+        for k in parent:
+            groups.setdefault(find(k), {find(k)}).add(k)
+        return list(groups.values())
+
+
+class SortedOrder:
+    """ Local keys of active notes in display order.
+
+    The order is built for a sorter on first use.  After that, a changed note is moved to its new position with
+    bisect, and the order is only rebuilt when another sorter is used.  Notes with equal sort keys are kept in the
+    order they were added.
+    """
+
+    def __init__(self, note_info: typing.Callable[[str, dict], typing.Any]):
+        """
+        @param note_info: Returns the object that sorters take, for a local key and a note.
+        """
+        self._note_info = note_info
+        self.clear()
+
+    def clear(self):
+        # Sorter the order was built for, or None if it has not been built.
+        self.sorter: typing.Optional[typing.Callable] = None
+        # Parallel lists, sorted by sort key.
+        self._sort_keys: typing.List[typing.Any] = []
+        self._keys: typing.List[str] = []
+        self._sort_key_of: typing.Dict[str, typing.Any] = {}
+
+    def rebuild(self,
+                sorter: typing.Callable,
+                notes: typing.Dict[str, dict],
+                keys: typing.Optional[typing.List[str]] = None):
+        """ Sort the notes with sorter.  notes must contain active notes only.
+
+        @param keys: Local keys of notes, if they are already known to be in sorter order.
+        """
+        self.sorter = sorter
+        self._sort_key_of = {k: sorter(self._note_info(k, n)) for k, n in notes.items()}
+        if keys is None:
+            keys = sorted(self._sort_key_of, key=self._sort_key_of.__getitem__)
+        self._keys = keys
+        self._sort_keys = [self._sort_key_of[k] for k in self._keys]
+
+    def update(self, key: str, note: typing.Optional[dict]):
+        """ Add, move or remove the note.  Pass None as note to remove it. """
+        if self.sorter is None:
+            return
+
+        old = self._sort_key_of.pop(key, None)
+        if old is not None:
+            i = self._keys.index(key, bisect.bisect_left(self._sort_keys, old))
+            del self._sort_keys[i]
+            del self._keys[i]
+        if note is not None:
+            sort_key = self._sort_key_of[key] = self.sorter(self._note_info(key, note))
+            i = bisect.bisect_right(self._sort_keys, sort_key)
+            self._sort_keys.insert(i, sort_key)
+            self._keys.insert(i, key)
+
+    def keys(self) -> typing.List[str]:
+        """ Return a copy of the order. """
+        return list(self._keys)
+
+    def sort_key(self, key: str) -> typing.Any:
+        """ Return the cached sort key of the note, or None if it is not in the order. """
+        return self._sort_key_of.get(key)
+
+
+# Indexes that are updated by NotesDB one note at a time.
+Index = typing.Union[DateIndex, FlagIndex, TagCatalog, TitleIndex, LinkGraph, SignatureIndex, MinHashIndex, SortedOrder]
@@ -5,13 +5,15 @@
 
 import sys
 import codecs
+import collections
 import copy
 import glob
+import heapq
+import locale
 import os
 import json
 import logging
 import abc
-import unicodedata
 import pathlib
 import threading
 from queue import Queue, Empty
@@ -21,10 +23,12 @@ import time
 import typing
 import re
 import base64
+import datetime
 
 import simplenote  # type:ignore
 
 from . import events
+from . import indexes
 from . import utils
 from . import nvpy
 from .debug import wrap_buggy_function
@@ -104,6 +108,200 @@ class NoteInfo(typing.NamedTuple):
     key: str
     note: typing.Any
     tagfound: int
+    # Offset of the first search match in the content, or None if the note did not match on its content.
+    match_offset: typing.Optional[int] = None
+
+
+class FilterStream(typing.NamedTuple):
+    """ Result of NotesDB.filter_notes_stream(). """
+    # Lists of notes in display order.
+    chunks: typing.Iterator[typing.List[NoteInfo]]
+    match_regexp: typing.Optional[typing.Pattern]
+    active_notes: int
+
+
+class SavedSearch(typing.NamedTuple):
+    name: str
+    query: str
+
+
+# tagfound and match_offset of NoteInfo.
+_Match = typing.Tuple[int, typing.Optional[int]]
+
+
+class _Query(typing.NamedTuple):
+    """ Compiled search string. """
+    # Returns a _Match if the note matches, or None if not.  It does not check the deleted flag.
+    match: typing.Callable[[typing.Any], typing.Optional[_Match]]
+    # Regular expression for highlighting strings in the text widget.
+    regexp: typing.Optional[typing.Pattern]
+    # Returns local keys of candidate notes, looked up from the indexes.  Caller MUST acquire the notes_lock.
+    # Candidates are tested with match_candidate instead of match.  None means all notes are candidates, either
+    # because candidates is None or because it returned None.
+    candidates: typing.Optional[typing.Callable[[], typing.Optional[typing.Iterable[str]]]] = None
+    match_candidate: typing.Optional[typing.Callable[[typing.Any], typing.Optional[_Match]]] = None
+    # True if the result depends on the current time.  Such results must not be cached.
+    volatile: bool = False
+
+
+class _DateFieldFilter:
+    """ gstyle field operator for dates, e.g. modified:>2024-01-01 """
+
+    def __init__(self, index: indexes.DateIndex, date_range: indexes.DateRange):
+        self.index = index
+        self.range = date_range
+
+    def count(self) -> int:
+        return self.index.count(self.range)
+
+    def keys(self) -> typing.Iterable[str]:
+        return self.index.keys(self.range)
+
+    def contains(self, key) -> bool:
+        stamp = self.index.stamp(key)
+        return stamp is not None and self.range.includes(stamp)
+
+    def match(self, note) -> bool:
+        try:
+            return self.range.includes(float(note[self.index.field]))
+        except (KeyError, TypeError, ValueError):
+            return False
+
+
+class _FlagFieldFilter:
+    """ gstyle field operator for system tags, e.g. pinned:yes """
+
+    def __init__(self, index: indexes.FlagIndex, value: bool, active_keys: typing.Set[str]):
+        self.index = index
+        self.value = value
+        self.active_keys = active_keys
+
+    def count(self) -> int:
+        return len(self.index) if self.value else len(self.active_keys) - len(self.index)
+
+    def keys(self) -> typing.Iterable[str]:
+        return list(self.index.keys) if self.value else list(self.active_keys - self.index.keys)
+
+    def contains(self, key) -> bool:
+        return (key in self.index) == self.value
+
+    def match(self, note) -> bool:
+        return bool(self.index.predicate(note)) == self.value
+
+
+class _KeySetFilter:
+    """ Candidate notes looked up from an index, e.g. notes having a tag. """
+
+    def __init__(self, keys: typing.Collection[str]):
+        self._keys = keys
+
+    def count(self) -> int:
+        return len(self._keys)
+
+    def keys(self) -> typing.Iterable[str]:
+        return self._keys
+
+    def contains(self, key) -> bool:
+        return key in self._keys
+
+
+_FieldFilter = typing.Union[_DateFieldFilter, _FlagFieldFilter]
+
+_DATE_OPERATOR_RE = re.compile(r'(<=|>=|<|>|=)?(.+)$')
+_ABSOLUTE_DATE_RE = re.compile(r'\d{4}-\d{1,2}-\d{1,2}$')
+_RELATIVE_DATE_RE = re.compile(r'(?:<=|>=|<|>|=)?(\d+)([hdw])$')
+_RELATIVE_DATE_UNITS = {'h': 3600, 'd': 86400, 'w': 7 * 86400}
+_FLAG_VALUES = {'yes': True, 'true': True, '1': True, 'no': False, 'false': False, '0': False}
+
+
+def _parse_date_range(value: str, now: float) -> typing.Optional[indexes.DateRange]:
+    """ Parse the value of a date field operator.  See NotesDB._compile_field_operator(). """
+    m = _DATE_OPERATOR_RE.match(value)
+    if m is None:
+        return None
+    op, operand = m.group(1) or '=', m.group(2)
+
+    if _ABSOLUTE_DATE_RE.match(operand):
+        try:
+            day = datetime.datetime.strptime(operand, '%Y-%m-%d')
+        except ValueError:
+            return None
+        start = day.timestamp()
+        end = (day + datetime.timedelta(days=1)).timestamp()
+        return {
+            '<': indexes.DateRange(hi=start),
+            '<=': indexes.DateRange(hi=end),
+            '>': indexes.DateRange(lo=end),
+            '>=': indexes.DateRange(lo=start),
+            '=': indexes.DateRange(lo=start, hi=end),
+        }[op]
+
+    m = _RELATIVE_DATE_RE.match(operand)
+    if m is None:
+        return None
+    # Compare ages.  created:<30d means the note is younger than 30 days.
+    threshold = now - int(m.group(1)) * _RELATIVE_DATE_UNITS[m.group(2)]
+    return {
+        '<': indexes.DateRange(lo=threshold, include_lo=False),
+        '<=': indexes.DateRange(lo=threshold),
+        '>': indexes.DateRange(hi=threshold),
+        '>=': indexes.DateRange(hi=threshold, include_hi=True),
+        # A bare age means "within", same as <=.
+        '=': indexes.DateRange(lo=threshold),
+    }[op]
+
+
+class _MaterializedView:
+    """ Result of a saved search, kept up to date one note at a time by NotesDB.  Changed notes are only evaluated
+    again when the view is read. """
+
+    def __init__(self, search: SavedSearch):
+        self.search = search
+        # Search options the query was compiled with.  See NotesDB._search_options().
+        self.options: typing.Optional[tuple] = None
+        self.query: typing.Optional[_Query] = None
+        # Local keys of matching notes.
+        self.matches: typing.Dict[str, _Match] = {}
+        # Local keys of notes that must be evaluated again.
+        self._dirty: typing.Set[str] = set()
+
+    @property
+    def is_stale(self) -> bool:
+        return self.query is None
+
+    def invalidate(self):
+        self.options = None
+        self.query = None
+        self.matches = {}
+        self._dirty.clear()
+
+    def rebuild(self, options: tuple, query: _Query, matches: typing.Dict[str, _Match]):
+        self.options = options
+        self.query = query
+        self.matches = matches
+        self._dirty.clear()
+
+    def update(self, key: str):
+        """ Evaluate the note against the query again before the view is read next. """
+        self._dirty.add(key)
+
+    def flush(self, notes: typing.Dict[str, typing.Any]):
+        """ Evaluate the changed notes against the query. """
+        assert self.query is not None
+        for key in self._dirty:
+            n = notes.get(key)
+            m = None if n is None or n.get('deleted') else self.query.match(n)
+            if m is None:
+                self.matches.pop(key, None)
+            else:
+                self.matches[key] = m
+        self._dirty.clear()
+
+
+class _CachedQuery(typing.NamedTuple):
+    # Value of NotesDB._generation when the result was computed.
+    generation: int
+    result: FilterResult
 
 
 class _BackgroundTask(typing.NamedTuple):
@@ -164,109 +362,42 @@ class AlphaSorter(Sorter):
         return utils.get_note_title(o.note)
 
 
-T = typing.TypeVar('T')
-
-
 class AlphaNumSorter(Sorter):
-    """ Sort in alphanumeric order on note title. """
+    """ Sort in alphanumeric order on note title.
 
-    class Nullable(typing.Generic[T]):
-        """ Null-safe comparable object for any types.
+    The title is split into runs of digits, letters and other characters.  Runs of digits are compared by their
+    value.  Runs of other characters come before letters, and letters come before digits.
+    """
 
-        Built-in types can not compare with None. For example, if you try to execute `1 < None`, it will raise a
-        TypeError. The Nullable solves this problem, and further simplifies of comparison logic.
-        """
+    # Digits are Unicode category Nd.  Letters are the other N* and L* categories.
+    _runs_re = re.compile(r'(\d+)|([^\W\d_]+)|([\W_]+)')
 
-        @classmethod
-        def __class_getitem__(cls, item):
-            return typing.TypeAlias(AlphaNumSorter.Nullable)
+    def __call__(self, o: NoteInfo):
+        return self.sort_key(utils.get_note_title(o.note))
+
+    @classmethod
+    def sort_key(cls, title: str) -> tuple:
+        """ Return a flat tuple of (rank, run) pairs.  Ranks keep runs of different kinds from being compared. """
+        key: typing.List[typing.Any] = []
+        for digits, letters, other in cls._runs_re.findall(title):
+            if digits:
+                key += (2, int(digits))
+            elif letters:
+                key += (1, letters)
+            else:
+                key += (0, other)
+        return tuple(key)
 
-        def __init__(self, val):
-            self.val = val
 
-        def __eq__(self, other):
-            if not isinstance(other, AlphaNumSorter.Nullable):
-                return NotImplemented
-            return self.val == other.val
+class CollationSorter(Sorter):
+    """ Sort on note title in the collation order of the current locale (LC_COLLATE).
 
-        def __gt__(self, other):
-            if not isinstance(other, AlphaNumSorter.Nullable):
-                return NotImplemented
-            if self.val is None:
-                return False
-            else:
-                if other.val is None:
-                    return True
-                return self.val > other.val
-
-        def __repr__(self):
-            return f'Nullable({repr(self.val)})'
-
-    class Element(typing.NamedTuple):
-        digits: 'AlphaNumSorter.Nullable[int]'
-        letters: 'AlphaNumSorter.Nullable[str]'
-        other: 'AlphaNumSorter.Nullable[str]'
-
-    def _enumerate_chars_with_category(self, s: str):
-        for c in s:
-            category = unicodedata.category(c)
-            if category == 'Nd':
-                yield 'numeric', c
-            elif category[0] == 'N' or category[0] == 'L':
-                yield 'letter', c
-            else:
-                yield 'other', c
-
-    def _make_groups(self, iter_):
-        # 連続した同じグループをグループ化
-        s = ''
-        last_category = ''
-        for category, c in iter_:
-            if last_category == category:
-                s += c
-            elif last_category != '':
-                yield last_category, s
-                last_category = category
-                s = c
-            elif last_category == '':
-                last_category = category
-                s = c
-            else:
-                raise RuntimeError('bug')
-        yield last_category, s
-
-    def _str2elements(self, s: str):
-        if s == '':
-            # The _make_groups() will yield an empty string ('') if s is ''. This behavior causes a crash on this
-            # function. We should handle this case before executing _make_gropus().
-            return AlphaNumSorter.Element(
-                digits=AlphaNumSorter.Nullable(None),
-                letters=AlphaNumSorter.Nullable(None),
-                other=AlphaNumSorter.Nullable(None),
-            )
-        iter_ = self._enumerate_chars_with_category(s)
-        groups = self._make_groups(iter_)
-        for category, s in groups:
-            digits = None
-            letters = None
-            others = None
-            if category == 'numeric':
-                digits = int(s)
-            elif category == 'letter':
-                letters = s
-            elif category == 'other':
-                others = s
-            else:
-                raise RuntimeError('bug')
-            yield AlphaNumSorter.Element(
-                digits=AlphaNumSorter.Nullable(digits),
-                letters=AlphaNumSorter.Nullable(letters),
-                other=AlphaNumSorter.Nullable(others),
-            )
+    Collation keys are not cached here.  NotesDB keeps the sort key of each note in its SortedOrder and recomputes
+    it only when the note changes.
+    """
 
     def __call__(self, o: NoteInfo):
-        title = utils.get_note_title(o.note)
-        return tuple(self._str2elements(title))
+        return locale.strxfrm(utils.get_note_title(o.note))
 
 
 class DateSorter(Sorter):
@@ -297,11 +428,50 @@ class NotesDB(utils.SubjectMixin):
     """NotesDB will take care of the local notes database and syncing with SN.
     """
 
+    # Maximum number of filter_notes() results kept in the query cache.
+    QUERY_CACHE_SIZE = 16
+    # Candidates of a search are sorted if they are fewer than 1/SORT_CANDIDATES_RATIO of active notes.  Otherwise,
+    # they are picked from the sorted order of all notes.
+    SORT_CANDIDATES_RATIO = 8
+
     def __init__(self, config: 'nvpy.Config'):
         utils.SubjectMixin.__init__(self)
 
         self.config = config
 
+        # The generation is incremented whenever a note is changed in a way that could change the result of
+        # filter_notes().  Cached query results are only valid for the generation they were computed in.
+        self._generation = 0
+        # Generation in which each note was last changed.  Notes that are not in it have not been changed since the
+        # generation in _reset_generation.
+        self._note_generations: typing.Dict[str, int] = {}
+        self._reset_generation = 0
+        self._query_cache: 'collections.OrderedDict[tuple, _CachedQuery]' = collections.OrderedDict()
+        # Local keys of all notes not marked as deleted.  The indexes below only contain these notes.
+        self._active_keys: typing.Set[str] = set()
+        self._date_indexes = {
+            'modified': indexes.DateIndex('modifydate'),
+            'created': indexes.DateIndex('createdate'),
+        }
+        self._flag_indexes = {
+            'pinned': indexes.FlagIndex(utils.note_pinned),
+            'markdown': indexes.FlagIndex(utils.note_markdown),
+        }
+        self._tag_catalog = indexes.TagCatalog()
+        self._title_index = indexes.TitleIndex(lambda note: utils.get_note_title(note).strip())
+        self._link_graph = indexes.LinkGraph(utils.get_note_links)
+        # Prefilter for word search.  It is not available without NumPy.
+        self._signature_index = indexes.SignatureIndex() if indexes.HAVE_NUMPY else None
+        # Near-duplicate detection.
+        self._minhash_index = indexes.MinHashIndex()
+        # Dates and flags of all notes as NumPy arrays.  It is not available without NumPy.
+        self._metadata = indexes.MetadataStore(utils.note_pinned) if indexes.HAVE_NUMPY else None
+        # Active notes in display order.  Search results are produced by walking it.
+        self._sorted_order = indexes.SortedOrder(lambda key, note: NoteInfo(key, note, 0))
+        # Saved searches, maintained as materialized views.
+        self._saved_searches: typing.Dict[str, _MaterializedView] = {}
+        self.notes_lock = threading.Lock()
+
         # create db dir if it does not exist
         if not os.path.exists(config.db_path):
             os.mkdir(config.db_path)
@@ -329,7 +499,6 @@ class NotesDB(utils.SubjectMixin):
             fnlist = []
 
         self.notes = {}
-        self.notes_lock = threading.Lock()
 
         if self.config.notes_as_txt:
             self.titlelist = {}
@@ -401,6 +570,8 @@ class NotesDB(utils.SubjectMixin):
 
                     os.unlink(tfn)
 
+        self._on_notes_reset()
+
         # save and sync queue
         self.q_save: 'Queue[_BackgroundTask]' = Queue()
         self.q_save_res: 'Queue[_BackgroundTask]' = Queue()
@@ -430,6 +601,138 @@ class NotesDB(utils.SubjectMixin):
             thread_sync.daemon = True
             thread_sync.start()
 
+    @property
+    def notes(self) -> typing.Dict[str, typing.Any]:
+        return self._notes
+
+    @notes.setter
+    def notes(self, notes: typing.Dict[str, typing.Any]):
+        self._notes = notes
+        self._on_notes_reset()
+
+    def _on_note_changed(self, key):
+        """ Update derived state after the note has been created, modified, replaced or removed.
+
+        Every code path that changes a note in a way that could change the result of filter_notes() MUST call it.
+        Caller MUST acquire the notes_lock.
+        """
+        self._generation += 1
+        self._note_generations[key] = self._generation
+
+        n = self.notes.get(key)
+        if self._metadata is not None:
+            self._metadata.update(key, n)
+        if n is None or n.get('deleted'):
+            n = None
+            self._active_keys.discard(key)
+        else:
+            self._active_keys.add(key)
+        for index in self._indexes():
+            index.update(key, n)
+
+        for view in self._saved_searches.values():
+            if not view.is_stale:
+                view.update(key)
+
+    def _on_notes_reset(self):
+        """ Discard all derived state.  It is called when the whole notes dict has been replaced. """
+        self._generation += 1
+        self._note_generations.clear()
+        self._reset_generation = self._generation
+        self._query_cache.clear()
+        # Update the indexes in place.  Compiled queries hold references to them.
+        self._active_keys.clear()
+        for index in self._indexes():
+            index.clear()
+        if self._metadata is not None:
+            self._metadata.clear()
+        for k, n in self.notes.items():
+            if self._metadata is not None:
+                self._metadata.update(k, n)
+            if not n.get('deleted'):
+                self._active_keys.add(k)
+                for index in self._indexes():
+                    index.update(k, n)
+
+        for view in self._saved_searches.values():
+            view.invalidate()
+
+    def get_generation(self) -> int:
+        """ Return the current generation.  It changes whenever a note is changed in a way that could change the
+        result of filter_notes(). """
+        return self._generation
+
+    def get_note_generation(self, key) -> int:
+        """ Return the generation in which the note was last changed in a way that could change the result of
+        filter_notes().  Saving and syncing a note without getting a newer version from the server do not count. """
+        return self._note_generations.get(key, self._reset_generation)
+
+    def _on_note_dates_changed(self, key):
+        """ Update derived state after savedate or syncdate of the note has been changed.
+
+        These dates do not change search results, so _on_note_changed() is not needed for them.
+        Caller MUST acquire the notes_lock.
+        """
+        if self._metadata is not None:
+            self._metadata.update(key, self.notes.get(key))
+
+    def _indexes(self) -> typing.Iterable[indexes.Index]:
+        yield from self._date_indexes.values()
+        yield from self._flag_indexes.values()
+        yield self._tag_catalog
+        yield self._title_index
+        yield self._link_graph
+        yield self._minhash_index
+        yield self._sorted_order
+        if self._signature_index is not None:
+            yield self._signature_index
+
+    def _search_options(self) -> tuple:
+        """ Return config values that change the meaning of a search string. """
+        return self.config.search_mode, self.config.case_sensitive, self.config.search_tags
+
+    def add_saved_search(self, name: str, query: str):
+        """ Save the search string as a named search.  An existing saved search with the same name is replaced.
+
+        The result of a saved search is maintained incrementally.  When a saved search is used, only the notes that
+        have been changed since it was last used are evaluated against it.
+        """
+        with self.notes_lock:
+            self._saved_searches[name] = _MaterializedView(SavedSearch(name=name, query=query))
+
+    def remove_saved_search(self, name: str):
+        with self.notes_lock:
+            del self._saved_searches[name]
+
+    def get_saved_searches(self) -> typing.List[SavedSearch]:
+        return [view.search for view in self._saved_searches.values()]
+
+    def _find_saved_search(self, search_string) -> typing.Optional[_MaterializedView]:
+        """ Return the up-to-date materialized view for the search string, if it has been saved.
+
+        Caller MUST acquire the notes_lock.
+        """
+        if not search_string:
+            return None
+
+        view = next((v for v in self._saved_searches.values() if v.search.query == search_string), None)
+        if view is None:
+            return None
+
+        options = self._search_options()
+        if view.is_stale or view.options != options or view.query.volatile:  # type:ignore
+            # First use, or the search options have been changed since the view was built.
+            query = self._compile_query(search_string)
+            filtered_notes, _ = self._evaluate_query(query)
+            view.rebuild(options, query, {o.key: (o.tagfound, o.match_offset) for o in filtered_notes})
+        else:
+            view.flush(self.notes)
+        return view
+
+    def filter_saved_search(self, name: str) -> FilterResult:
+        """ Return the notes matching the saved search, in the same form as filter_notes(). """
+        return self.filter_notes(self._saved_searches[name].search.query)
+
     def create_note(self, title):
         # need to get a key unique to this database. not really important
         # what it is, as long as it's unique.
@@ -449,14 +752,18 @@ class NotesDB(utils.SubjectMixin):
             'tags': []
         }
 
-        self.notes[new_key] = new_note
+        with self.notes_lock:
+            self.notes[new_key] = new_note
+            self._on_note_changed(new_key)
 
         return new_key
 
     def delete_note(self, key):
-        n = self.notes[key]
-        n['deleted'] = 1
-        n['modifydate'] = time.time()
+        with self.notes_lock:
+            n = self.notes[key]
+            n['deleted'] = 1
+            n['modifydate'] = time.time()
+            self._on_note_changed(key)
 
     def filter_notes(self, search_string=None) -> FilterResult:
         """Return list of notes filtered with search string.
@@ -465,6 +772,10 @@ class NotesDB(utils.SubjectMixin):
         this method will call the appropriate helper method to do the
         actual work of filtering the notes.
 
+        Results are kept in a small LRU cache.  A cached result is reused as
+        long as no note has been changed since it was computed.  Saved
+        searches are served from their materialized views.
+
         @param search_string: String that will be used for searching.
          Different meaning depending on the search mode.
         @return: notes filtered with selected search mode and sorted according
@@ -472,14 +783,160 @@ class NotesDB(utils.SubjectMixin):
         that can be used for highlighting strings in the text widget; the
         total number of notes in memory.
         """
+        stream = self.filter_notes_stream(search_string)
+        filtered_notes = [o for chunk in stream.chunks for o in chunk]
+        return filtered_notes, stream.match_regexp, stream.active_notes
 
-        if self.config.search_mode == 'regexp':
-            filtered_notes, match_regexp, active_notes = self.filter_notes_regexp(search_string)
+    def filter_notes_stream(self, search_string=None, chunk_size=None) -> FilterStream:
+        """Same as filter_notes(), but return the notes in chunks of chunk_size notes.
+
+        Chunks are produced in display order.  The first chunk is available without filtering and sorting all the
+        notes, so callers can show it right away and fetch the rest later.  If chunk_size is None, all notes are
+        returned in one chunk.  The total number of notes is known when the last chunk has been consumed.
+        """
+
+        cache_key = (
+            search_string or '',
+            self.config.search_mode,
+            self.config.case_sensitive,
+            self.config.search_tags,
+            self.config.sort_mode,
+            self.config.pinned_ontop,
+        )
+        # Read the generation before filtering.  If a note is changed during filtering, the result is stored with
+        # an outdated generation and will never be used.
+        generation = self._generation
+        cached = self._query_cache.get(cache_key)
+        if cached is not None and cached.generation == generation:
+            self._query_cache.move_to_end(cache_key)
+            filtered_notes, match_regexp, active_notes = cached.result
+            return FilterStream(self._chunks(filtered_notes, chunk_size), match_regexp, active_notes)
+
+        with self.notes_lock:
+            view = self._find_saved_search(search_string)
+            if view is not None:
+                assert view.query is not None
+                match_regexp = view.query.regexp
+                active_notes = len(self._active_keys)
+                filtered_notes = [NoteInfo(k, self.notes[k], *m) for k, m in view.matches.items()]
+
+        volatile = False
+        order = None
+        if view is None:
+            query = self._compile_query(search_string)
+            volatile = query.volatile
+            match_regexp = query.regexp
+            with self.notes_lock:
+                active_notes = len(self._active_keys)
+                keys = query.candidates() if query.candidates is not None else None
+                if keys is None:
+                    order = self._sorted_keys()
+                    match = query.match
+                else:
+                    keys = set(keys)
+                    if len(keys) * self.SORT_CANDIDATES_RATIO < active_notes:
+                        filtered_notes = self._match_candidates(query, keys)
+                    else:
+                        order = [k for k in self._sorted_keys() if k in keys]
+                        assert query.match_candidate is not None
+                        match = query.match_candidate
+
+        def store(sorted_notes):
+            if volatile:
+                return
+            self._query_cache.pop(cache_key, None)
+            self._query_cache[cache_key] = _CachedQuery(generation=generation,
+                                                        result=(sorted_notes, match_regexp, active_notes))
+            while len(self._query_cache) > self.QUERY_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
+
+        if order is not None:
+            # Matches come out already sorted.
+            return FilterStream(self._walk_chunks(order, match, chunk_size, store), match_regexp, active_notes)
+        return FilterStream(self._sorted_chunks(filtered_notes, chunk_size, store), match_regexp, active_notes)
+
+    def _walk_chunks(self, order: typing.List[str], match: typing.Callable[[typing.Any], typing.Optional[_Match]],
+                     chunk_size, store: typing.Callable[[typing.List[NoteInfo]],
+                                                        None]) -> typing.Iterator[typing.List[NoteInfo]]:
+        """ Match notes in the order of local keys, and yield matches in chunks as soon as they are found. """
+        filtered_notes: typing.List[NoteInfo] = []
+        i = 0
+        while i < len(order):
+            start = len(filtered_notes)
+            with self.notes_lock:
+                while i < len(order) and (chunk_size is None or len(filtered_notes) - start < chunk_size):
+                    k = order[i]
+                    i += 1
+                    # The note may have been deleted since the order was copied.
+                    n = self.notes.get(k)
+                    if n is None or n.get('deleted'):
+                        continue
+                    m = match(n)
+                    if m is not None:
+                        filtered_notes.append(NoteInfo(k, n, *m))
+            if len(filtered_notes) > start:
+                yield filtered_notes[start:]
+        store(filtered_notes)
+
+    @staticmethod
+    def _chunks(notes: typing.List[NoteInfo], chunk_size) -> typing.Iterator[typing.List[NoteInfo]]:
+        """ Split notes into chunks.  Chunks are copies, so callers own them. """
+        if chunk_size is None:
+            yield list(notes)
+            return
+        for i in range(0, len(notes), chunk_size):
+            yield notes[i:i + chunk_size]
+
+    def _sorted_chunks(self, notes: typing.List[NoteInfo], chunk_size,
+                       store: typing.Callable[[typing.List[NoteInfo]], None]) -> typing.Iterator[typing.List[NoteInfo]]:
+        """ Sort notes and split them into chunks.  The sorted list is passed to store() when it is complete. """
+        if chunk_size is not None and chunk_size < len(notes):
+            # Same as the head of the sorted list, but does not wait for sorting all notes.
+            with self.notes_lock:
+                head = heapq.nsmallest(chunk_size, notes, key=self._sort_key_func())
+            yield head
+            self._sort_notes(notes)
+            store(list(notes))
+            yield from self._chunks(notes[chunk_size:], chunk_size)
         else:
-            filtered_notes, match_regexp, active_notes = self.filter_notes_gstyle(search_string)
+            self._sort_notes(notes)
+            store(list(notes))
+            yield notes
+
+    def _sort_notes(self, notes: typing.List[NoteInfo]):
+        """ Sort notes in display order, with sort keys cached in the sorted order. """
+        with self.notes_lock:
+            notes.sort(key=self._sort_key_func())
+
+    def _sort_key_func(self) -> typing.Callable[[NoteInfo], typing.Any]:
+        """ Caller MUST acquire the notes_lock. """
+        self._sorted_keys()
+        sorted_order = self._sorted_order
+        sorter = self.config.sorter
+
+        def sort_key(o: NoteInfo):
+            k = sorted_order.sort_key(o.key)
+            # The note may have been deleted since it matched.
+            return sorter(o) if k is None else k
 
-        filtered_notes.sort(key=self.config.sorter)
-        return filtered_notes, match_regexp, active_notes
+        return sort_key
+
+    def _sorted_keys(self) -> typing.List[str]:
+        """ Return local keys of active notes in display order.
+
+        Caller MUST acquire the notes_lock.
+        """
+        sorter = self.config.sorter
+        if self._sorted_order.sorter is not sorter:
+            keys = None
+            column = {
+                nvpy.SortMode.MODIFICATION_DATE: 'modifydate',
+                nvpy.SortMode.CREATION_DATE: 'createdate',
+            }.get(self.config.sort_mode)
+            if self._metadata is not None and column is not None:
+                keys = self._metadata.keys_by_date(column, pinned_first=bool(self.config.pinned_ontop))
+            self._sorted_order.rebuild(sorter, {k: n for k, n in self.notes.items() if k in self._active_keys}, keys)
+        return self._sorted_order.keys()
 
     def _helper_gstyle_tagmatch(self, tag_pats, note):
         if tag_pats:
@@ -517,96 +974,170 @@ class NotesDB(utils.SubjectMixin):
         """If all words / multi-words in msword_pats are found in the content,
         the note goes through, otherwise not.
 
-        @param msword_pats:
+        @param msword_pats: non-empty list of patterns
         @param content:
-        @return:
+        @return: offset of the first occurrence of any pattern, or None if
+        the note does not go through.
         """
 
-        # no search patterns, so note goes through
-        if not msword_pats:
-            return True
-
-        # search for the first p that does NOT occur in content
-        if next((p for p in msword_pats if p not in content), None) is None:
-            # we only found pats that DO occur in content so note goes through
-            return True
+        offset = None
+        for p in msword_pats:
+            i = content.find(p)
+            if i < 0:
+                # we found the first p that does not occur in content
+                return None
+            if offset is None or i < offset:
+                offset = i
 
-        else:
-            # we found the first p that does not occur in content
-            return False
+        # we only found pats that DO occur in content so note goes through
+        return offset
 
-    def filter_notes_gstyle(self, search_string=None) -> FilterResult:
-        filtered_notes = []
-        # total number of notes, excluding deleted
-        active_notes = 0
+    def _compile_query(self, search_string=None) -> '_Query':
+        """ Compile the search string with the search mode that has been selected in self.config. """
+        if self.config.search_mode == 'regexp':
+            return self._compile_query_regexp(search_string)
+        return self._compile_query_gstyle(search_string)
 
+    def _compile_query_gstyle(self, search_string=None) -> '_Query':
         if not search_string:
-            with self.notes_lock:
-                for k in self.notes:
-                    n = self.notes[k]
-                    if not n.get('deleted'):
-                        active_notes += 1
-                        filtered_notes.append(NoteInfo(key=k, note=n, tagfound=0))
-
-            return filtered_notes, None, active_notes
-
-        # group0: ag - not used
-        # group1: t(ag)?:([^\s]+)
-        # group2: multiple words in quotes
-        # group3: single words
-        # example result for 't:tag1 t:tag2 word1 "word2 word3" tag:tag3' ==
-        # [('', 'tag1', '', ''), ('', 'tag2', '', ''), ('', '', '', 'word1'), ('', '', 'word2 word3', ''), ('ag', 'tag3', '', '')]
-
-        groups = re.findall('t(ag)?:([^\s]+)|"([^"]+)"|([^\s]+)', search_string)
+            return _Query(match=lambda note: (0, None), regexp=None)
+
+        # group0: field name of field operators
+        # group1: field value of field operators
+        # group2: ag - not used
+        # group3: t(ag)?:([^\s]+)
+        # group4: multiple words in quotes
+        # group5: single words
+        # example result for 't:tag1 t:tag2 word1 "word2 word3" tag:tag3 pinned:yes' ==
+        # [('', '', '', 'tag1', '', ''), ('', '', '', 'tag2', '', ''), ('', '', '', '', '', 'word1'),
+        #  ('', '', '', '', 'word2 word3', ''), ('', '', 'ag', 'tag3', '', ''), ('pinned', 'yes', '', '', '', '')]
+
+        groups = re.findall('(modified|created|pinned|markdown):([^\s]+)|t(ag)?:([^\s]+)|"([^"]+)"|([^\s]+)',
+                            search_string)
         tms_pats: typing.List[typing.List[str]] = [[] for _ in range(3)]
+        field_filters: typing.List[_FieldFilter] = []
+        now = time.time()
+        volatile = False
 
         # we end up with [[tag_pats],[multi_word_pats],[single_word_pats]]
         for gi in groups:
-            for mi in range(1, 4):
+            if gi[0]:
+                field_filter = self._compile_field_operator(gi[0], gi[1], now)
+                if field_filter is None:
+                    # not a valid field operator.  search it as a single word.
+                    tms_pats[2].append(gi[0] + ':' + gi[1])
+                else:
+                    field_filters.append(field_filter)
+                    volatile = volatile or _RELATIVE_DATE_RE.match(gi[1]) is not None
+                continue
+
+            for mi in range(3, 6):
                 if gi[mi]:
-                    tms_pats[mi - 1].append(gi[mi])
+                    tms_pats[mi - 3].append(gi[mi])
+
+        tag_pats = tms_pats[0]
+        case_sensitive = self.config.case_sensitive
+        # case insensitive mode: WARNING - SLOW!
+        msword_pats = tms_pats[1] + tms_pats[2] if case_sensitive else [p.lower() for p in tms_pats[1] + tms_pats[2]]
+
+        def match_content(note, tagfound):
+            content = c = note.get('content')
+
+            # case insensitive mode: WARNING - SLOW!
+            if not case_sensitive and c:
+                c = c.lower()
+
+            # no search patterns, so note goes through
+            offset = None
+            if msword_pats:
+                offset = self._helper_gstyle_mswordmatch(msword_pats, c)
+                if offset is None:
+                    return None
+                if len(c) != len(content):
+                    # lower() changed the length of some characters ('İ'), so the offset is not one in the content.
+                    mo = regexp.search(content) if regexp is not None else None
+                    offset = None if mo is None else mo.start()
+
+            # we have a note that can go through!
+            return tagfound, offset
+
+        def match_text(note):
+            tagmatch = self._helper_gstyle_tagmatch(tag_pats, note)
+            if not tagmatch:
+                return None
 
-        with self.notes_lock:
-            for k in self.notes:
-                n = self.notes[k]
-
-                if not n.get('deleted'):
-                    active_notes += 1
-                    c = n.get('content')
-
-                    # case insensitive mode: WARNING - SLOW!
-                    if not self.config.case_sensitive and c:
-                        c = c.lower()
-
-                    tagmatch = self._helper_gstyle_tagmatch(tms_pats[0], n)
-                    # case insensitive mode: WARNING - SLOW!
-                    msword_pats = tms_pats[1] + tms_pats[2] if self.config.case_sensitive else [
-                        p.lower() for p in tms_pats[1] + tms_pats[2]
-                    ]
-                    if tagmatch and self._helper_gstyle_mswordmatch(msword_pats, c):
-                        # we have a note that can go through!
-
-                        # tagmatch == 1 if a tag was specced and found
-                        # tagmatch == 2 if no tag was specced (so all notes go through)
-                        tagfound = 1 if tagmatch == 1 else 0
-                        # we have to store our local key also
-                        filtered_notes.append(NoteInfo(key=k, note=n, tagfound=tagfound))
+            # tagmatch == 1 if a tag was specced and found
+            # tagmatch == 2 if no tag was specced (so all notes go through)
+            return match_content(note, 1 if tagmatch == 1 else 0)
+
+        def match_candidate(note):
+            # Candidates were looked up in the tag catalog, so they have a tag for each of tag_pats.
+            return match_content(note, 1 if tag_pats else 0)
 
         regexp = None
         if tms_pats[1] + tms_pats[2]:
             regexp_pattern = '|'.join(re.escape(p) for p in tms_pats[1] + tms_pats[2])
-            regexp_flag = 0 if self.config.case_sensitive else re.I
+            regexp_flag = 0 if case_sensitive else re.I
             try:
                 regexp = re.compile(regexp_pattern, regexp_flag)
             except re.error:
                 logging.error('Failed to compile regular expression: %r', regexp_pattern)
-        return filtered_notes, regexp, active_notes
 
-    def filter_notes_regexp(self, search_string=None) -> FilterResult:
-        """Return list of notes filtered with search_string,
-        a regular expression, each a tuple with (local_key, note).
+        tag_catalog = self._tag_catalog
+        signature_index = self._signature_index
+        words = tms_pats[1] + tms_pats[2]
+        if not field_filters and not tag_pats and (signature_index is None or not words):
+            return _Query(match=match_text, regexp=regexp)
+
+        def match(note):
+            if all(f.match(note) for f in field_filters):
+                return match_text(note)
+            return None
+
+        def candidates():
+            filters: typing.List[typing.Union[_FieldFilter, _KeySetFilter]] = list(field_filters)
+            for tp in tag_pats:
+                filters.append(_KeySetFilter(tag_catalog.keys_with_prefix(tp)))
+            if signature_index is not None:
+                # Reject notes that cannot contain all the words.  Survivors still need the exact check.
+                survivors = signature_index.candidates(self.notes, words)
+                if survivors is not None:
+                    filters.append(_KeySetFilter(set(survivors)))
+            if not filters:
+                return None
+
+            # Start from the most selective filter.  The others are tested by key, without touching notes.
+            filters.sort(key=lambda f: f.count())
+            keys = filters[0].keys()
+            for f in filters[1:]:
+                keys = [k for k in keys if f.contains(k)]
+            return keys
+
+        return _Query(match=match,
+                      regexp=regexp,
+                      candidates=candidates,
+                      match_candidate=match_candidate,
+                      volatile=volatile)
+
+    def _compile_field_operator(self, name, value, now) -> typing.Optional[_FieldFilter]:
+        """ Compile a gstyle field operator, or return None if the value is not valid.
+
+        Dates are YYYY-MM-DD in local time, or an age such as 30d (h: hours, d: days, w: weeks).  They can be prefixed
+        by <, <=, >, >= or =.  For example, modified:>2024-01-01 finds notes modified after 2024-01-01, and
+        created:<30d finds notes created less than 30 days ago.  System tags take yes or no, e.g. pinned:yes.
         """
+        if name in self._flag_indexes:
+            flag = _FLAG_VALUES.get(value.lower())
+            if flag is None:
+                return None
+            return _FlagFieldFilter(self._flag_indexes[name], flag, self._active_keys)
 
+        date_range = _parse_date_range(value, now)
+        if date_range is None:
+            return None
+        return _DateFieldFilter(self._date_indexes[name], date_range)
+
+    def _compile_query_regexp(self, search_string=None) -> '_Query':
         sspat: typing.Optional[typing.Pattern]
         if search_string:
             try:
@@ -620,42 +1151,132 @@ class NotesDB(utils.SubjectMixin):
         else:
             sspat = None
 
+        search_tags = self.config.search_tags
+
+        def match(note):
+            if sspat is None:
+                return 0, None
+
+            if search_tags == 1:
+                t = note.get('tags')
+                if t and any(filter(lambda ti: sspat.search(ti), t)):  # type:ignore
+                    return 1, None
+
+            mo = sspat.search(note.get('content'))
+            if mo:
+                return 0, mo.start()
+            return None
+
+        return _Query(match=match, regexp=sspat)
+
+    def _filter_notes_with_query(self, query: '_Query') -> FilterResult:
+        with self.notes_lock:
+            filtered_notes, active_notes = self._evaluate_query(query)
+        return filtered_notes, query.regexp, active_notes
+
+    def _evaluate_query(self, query: '_Query') -> typing.Tuple[typing.List[NoteInfo], int]:
+        """ Return matching notes and the number of active notes.
+
+        Caller MUST acquire the notes_lock.
+        """
+        keys = query.candidates() if query.candidates is not None else None
+        if keys is not None:
+            return self._match_candidates(query, keys), len(self._active_keys)
+
         filtered_notes = []
+
         # total number of notes, excluding deleted ones
         active_notes = 0
+        match = query.match
+        for k, n in self.notes.items():
+            # we don't do anything with deleted notes (yet)
+            if n.get('deleted'):
+                continue
+
+            active_notes += 1
+            m = match(n)
+            if m is not None:
+                # we have to store our local key also
+                filtered_notes.append(NoteInfo(k, n, *m))
+
+        return filtered_notes, active_notes
+
+    def _match_candidates(self, query: '_Query', keys: typing.Iterable[str]) -> typing.List[NoteInfo]:
+        """ Caller MUST acquire the notes_lock. """
+        assert query.match_candidate is not None
+        match_candidate = query.match_candidate
+        filtered_notes = []
+        for k in keys:
+            n = self.notes[k]
+            m = match_candidate(n)
+            if m is not None:
+                filtered_notes.append(NoteInfo(k, n, *m))
+        return filtered_notes
+
+    def filter_notes_gstyle(self, search_string=None) -> FilterResult:
+        return self._filter_notes_with_query(self._compile_query_gstyle(search_string))
+
+    def filter_notes_regexp(self, search_string=None) -> FilterResult:
+        """Return list of notes filtered with search_string,
+        a regular expression, each a tuple with (local_key, note).
+        """
+        return self._filter_notes_with_query(self._compile_query_regexp(search_string))
+
+    def get_note(self, key):
+        return self.notes[key]
+
+    def get_tags(self) -> typing.List[typing.Tuple[str, int]]:
+        """ Return (tag, usage count) of all tags of active notes, sorted case-insensitively. """
         with self.notes_lock:
-            for k in self.notes:
-                n = self.notes[k]
-                # we don't do anything with deleted notes (yet)
-                if n.get('deleted'):
-                    continue
+            tags = [(t, self._tag_catalog.count(t)) for t in self._tag_catalog.tags()]
+        tags.sort(key=lambda x: x[0].upper())
+        return tags
 
-                active_notes += 1
+    def find_notes_by_title(self, title: str) -> typing.List[str]:
+        """ Return local keys of active notes with the title, most recently modified first. """
+        with self.notes_lock:
+            return self._most_recent_first(self._title_index.keys(title.strip()))
 
-                c = n.get('content')
-                if self.config.search_tags == 1:
-                    t = n.get('tags')
-                    if sspat:
-                        if t and any(filter(lambda ti: sspat.search(ti), t)):  # type:ignore
-                            # we have to store our local key also
-                            filtered_notes.append(NoteInfo(key=k, note=n, tagfound=1))
+    def get_backlinks(self, key) -> typing.List[str]:
+        """ Return local keys of active notes that link to the note with [[its title]], most recently modified first.
+        """
+        with self.notes_lock:
+            title = utils.get_note_title(self.notes[key]).strip()
+            return self._most_recent_first(k for k in self._link_graph.linked_from(self.notes, title) if k != key)
 
-                        elif sspat.search(c):
-                            # we have to store our local key also
-                            filtered_notes.append(NoteInfo(key=k, note=n, tagfound=0))
+    def find_similar_notes(self, threshold=0.8) -> typing.List[typing.List[str]]:
+        """ Return groups of local keys of active notes with nearly the same content.
 
-                    else:
-                        # we have to store our local key also
-                        filtered_notes.append(NoteInfo(key=k, note=n, tagfound=0))
-                else:
-                    if not sspat or sspat.search(c):
-                        # we have to store our local key also
-                        filtered_notes.append(NoteInfo(key=k, note=n, tagfound=0))
+        Each group is ordered most recently modified first, and larger groups come first.  threshold is the
+        minimum estimated Jaccard similarity of word shingles.
+        """
+        with self.notes_lock:
+            clusters = [self._most_recent_first(c) for c in self._minhash_index.clusters(self.notes, threshold)]
+        clusters.sort(key=len, reverse=True)
+        return clusters
 
-        return filtered_notes, sspat, active_notes
+    def _most_recent_first(self, keys: typing.Iterable[str]) -> typing.List[str]:
+        """ Caller MUST acquire the notes_lock. """
+        return sorted(keys, key=lambda k: float(self.notes[k].get('modifydate', 0)), reverse=True)
 
-    def get_note(self, key):
-        return self.notes[key]
+    def complete_title(self, prefix: str, case_sensitive=True) -> typing.List[str]:
+        """ Return titles of active notes that start with prefix, in sorted order. """
+        with self.notes_lock:
+            return self._title_index.titles_with_prefix(prefix, case_sensitive)
+
+    def complete_tag(self, prefix: str, case_sensitive=True) -> typing.List[str]:
+        """ Return tags of active notes that start with prefix, sorted case-insensitively. """
+        with self.notes_lock:
+            tags = self._tag_catalog.tags_with_prefix(prefix, case_sensitive)
+        tags.sort(key=lambda x: x.upper())
+        return tags
+
+    def find_tags(self, word: str) -> typing.List[str]:
+        """ Return tags of active notes that contain word anywhere, sorted case-insensitively. """
+        with self.notes_lock:
+            tags = [tag for tag in self._tag_catalog.tags() if word in tag]
+        tags.sort(key=lambda x: x.upper())
+        return tags
 
     def get_note_content(self, key):
         with self.notes_lock:
@@ -764,7 +1385,9 @@ class NotesDB(utils.SubjectMixin):
                 n['syncdate'] = now
 
                 # update our existing note in-place!
-                note.update(n)
+                with self.notes_lock:
+                    note.update(n)
+                    self._on_note_changed(k)
 
                 # return the key
                 return (k, new_content)
@@ -781,7 +1404,9 @@ class NotesDB(utils.SubjectMixin):
 
                 if Note(n).is_newer_than(note):
                     n['syncdate'] = time.time()
-                    note.update(n)
+                    with self.notes_lock:
+                        note.update(n)
+                        self._on_note_changed(k)
                     return (k, True)
 
                 else:
@@ -792,12 +1417,15 @@ class NotesDB(utils.SubjectMixin):
 
     def save_threaded(self):
         with self.notes_lock:
-            for k, n in self.notes.items():
-                if Note(n).need_save:
-                    cn = copy.deepcopy(n)
-                    # put it on my queue as a save
-                    o = _BackgroundTask(action=ACTION_SAVE, key=k, note=cn)
-                    self.q_save.put(o)
+            if self._metadata is not None:
+                keys = self._metadata.need_save()
+            else:
+                keys = [k for k, n in self.notes.items() if Note(n).need_save]
+            for k in keys:
+                cn = copy.deepcopy(self.notes[k])
+                # put it on my queue as a save
+                o = _BackgroundTask(action=ACTION_SAVE, key=k, note=cn)
+                self.q_save.put(o)
 
         # in this same call, we process stuff that might have been put on the result queue
         nsaved = 0
@@ -812,7 +1440,9 @@ class NotesDB(utils.SubjectMixin):
             else:
                 # o (.action, .key, .note) is something that was written to disk
                 # we only record the savedate.
-                self.notes[o.key]['savedate'] = o.note['savedate']
+                with self.notes_lock:
+                    self.notes[o.key]['savedate'] = o.note['savedate']
+                    self._on_note_dates_changed(o.key)
                 self.notify_observers('change:note-status', events.NoteStatusChangedEvent(what='savedate', key=o.key))
                 self.notify_observers('saved:note', events.NoteSavedEvent(key=o.key))
                 nsaved += 1
@@ -845,17 +1475,22 @@ class NotesDB(utils.SubjectMixin):
         try:
             with self.notes_lock:
                 now = time.time()
-                for k, n in self.notes.items():
-                    # if note has been modified since the sync, we need to sync.
-                    # only do so if note hasn't been touched for 3 seconds
-                    # and if this note isn't still in the queue to be processed by the
-                    # worker (this last one very important)
-                    modifydate = float(n.get('modifydate', -1))
-                    syncdate = float(n.get('syncdate', -1))
-                    need_sync = modifydate > syncdate and now - modifydate > lastmod
-                    if need_sync:
-                        task = _BackgroundTask(action=ACTION_SYNC_PARTIAL_TO_SERVER, key=k, note=None)
-                        self.q_sync.put(task)
+                # if note has been modified since the sync, we need to sync.
+                # only do so if note hasn't been touched for 3 seconds
+                # and if this note isn't still in the queue to be processed by the
+                # worker (this last one very important)
+                if self._metadata is not None:
+                    keys = self._metadata.need_sync(now, lastmod)
+                else:
+                    keys = []
+                    for k, n in self.notes.items():
+                        modifydate = float(n.get('modifydate', -1))
+                        syncdate = float(n.get('syncdate', -1))
+                        if modifydate > syncdate and now - modifydate > lastmod:
+                            keys.append(k)
+                for k in keys:
+                    task = _BackgroundTask(action=ACTION_SYNC_PARTIAL_TO_SERVER, key=k, note=None)
+                    self.q_sync.put(task)
 
             # in this same call, we read out the result queue
             nsynced = 0
@@ -923,12 +1558,15 @@ class NotesDB(utils.SubjectMixin):
                         n.update(result.note)
                         # and put it at the new key slot
                         self.notes[k] = n
-
-                    # record that we just synced
-                    n['syncdate'] = time.time()
+                        # record that we just synced
+                        n['syncdate'] = time.time()
+                        self._on_note_changed(lk)
+                        self._on_note_changed(k)
 
                     # whatever the case may be, k is now updated
                     self.helper_save_note(k, n)
+                    with self.notes_lock:
+                        self._on_note_dates_changed(k)
                     if lk != k:
                         # if lk was a different (purely local) key, should be deleted
                         local_deletes[lk] = True
@@ -984,6 +1622,7 @@ class NotesDB(utils.SubjectMixin):
                             if os.path.isfile(tfn):
                                 os.unlink(tfn)
                         del self.notes[lk]
+                        self._on_note_changed(lk)
                         local_deletes[lk] = True
 
             self.notify_observers('progress:sync_full',
@@ -1006,9 +1645,13 @@ class NotesDB(utils.SubjectMixin):
                             self.waiting_for_simplenote = False
 
                         if err == 0:
-                            self.notes[k].update(n)
-                            self.notes[k]['syncdate'] = time.time()
+                            with self.notes_lock:
+                                self.notes[k].update(n)
+                                self.notes[k]['syncdate'] = time.time()
+                                self._on_note_changed(k)
                             self.helper_save_note(k, self.notes[k])
+                            with self.notes_lock:
+                                self._on_note_dates_changed(k)
                             self.notify_observers(
                                 'progress:sync_full',
                                 events.SyncProgressEvent(msg='Synced newer note %d (%d) from server.' % (ni, lennl)))
@@ -1033,7 +1676,9 @@ class NotesDB(utils.SubjectMixin):
                             self.notes[k] = n
                             n['savedate'] = 0  # never been written to disc
                             n['syncdate'] = time.time()
+                            self._on_note_changed(k)
                             self.helper_save_note(k, n)
+                            self._on_note_dates_changed(k)
                             self.notify_observers(
                                 'progress:sync_full',
                                 events.SyncProgressEvent(msg='Synced new note %d (%d) from server.' % (ni, lennl)))
@@ -1063,24 +1708,30 @@ class NotesDB(utils.SubjectMixin):
         n = self.notes[key]
         old_content = n.get('content')
         if content != old_content:
-            n['content'] = content
-            n['modifydate'] = time.time()
+            with self.notes_lock:
+                n['content'] = content
+                n['modifydate'] = time.time()
+                self._on_note_changed(key)
             self.notify_observers('change:note-status', events.NoteStatusChangedEvent(what='modifydate', key=key))
 
     def delete_note_tag(self, key, tag):
         note = self.notes[key]
         note_tags = note.get('tags')
         note_tags.remove(tag)
-        note['tags'] = note_tags
-        note['modifydate'] = time.time()
+        with self.notes_lock:
+            note['tags'] = note_tags
+            note['modifydate'] = time.time()
+            self._on_note_changed(key)
         self.notify_observers('change:note-status', events.NoteStatusChangedEvent(what='modifydate', key=key))
 
     def add_note_tags(self, key, comma_seperated_tags: str):
         new_tags = utils.sanitise_tags(comma_seperated_tags)
         note = self.notes[key]
         tags_set = set(note.get('tags')) | set(new_tags)
-        note['tags'] = sorted(tags_set)
-        note['modifydate'] = time.time()
+        with self.notes_lock:
+            note['tags'] = sorted(tags_set)
+            note['modifydate'] = time.time()
+            self._on_note_changed(key)
         self.notify_observers('change:note-status', events.NoteStatusChangedEvent(what='modifydate', key=key))
 
     def set_note_pinned(self, key, pinned):
@@ -1092,14 +1743,16 @@ class NotesDB(utils.SubjectMixin):
 
             systemtags = n['systemtags']
 
-            if pinned:
-                # which by definition means that it was NOT pinned
-                systemtags.append('pinned')
+            with self.notes_lock:
+                if pinned:
+                    # which by definition means that it was NOT pinned
+                    systemtags.append('pinned')
 
-            else:
-                systemtags.remove('pinned')
+                else:
+                    systemtags.remove('pinned')
 
-            n['modifydate'] = time.time()
+                n['modifydate'] = time.time()
+                self._on_note_changed(key)
             self.notify_observers('change:note-status', events.NoteStatusChangedEvent(what='modifydate', key=key))
 
     def is_different_note(self, local_note, remote_note):
@@ -1188,6 +1841,7 @@ class NotesDB(utils.SubjectMixin):
                 note['version'] = remote_note['version']
                 note['syncdate'] = syncdate
                 note['key'] = remote_note['key']
+                self._on_note_changed(key)
                 return _BackgroundTaskReslt(action=action, key=key, note=None, error=0)
 
             if result.is_updated:
@@ -1196,7 +1850,9 @@ class NotesDB(utils.SubjectMixin):
                     # we should remove the content from remote_note.
                     remote_note.pop('content', None)
                 note.update(remote_note)
+                self._on_note_changed(key)
             note['syncdate'] = syncdate
+            self._on_note_dates_changed(key)
             return _BackgroundTaskReslt(action=action, key=key, note=None, error=0)
 
     def update_note_to_server(self, note):
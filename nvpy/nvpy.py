@@ -32,6 +32,7 @@
 """ Controller and Config classes """
 import contextlib
 import enum
+import json
 import sys
 import codecs
 import time
@@ -39,6 +40,7 @@ from configparser import ConfigParser
 import logging
 from logging.handlers import RotatingFileHandler
 import argparse
+import locale
 import os
 import traceback
 import threading
@@ -50,9 +52,9 @@ import pathlib
 import platform
 
 from .notes_db import NotesDB, SyncError, ReadError, WriteError, MergedSorter, PinnedSorter, AlphaSorter, DateSorter, \
-    AlphaNumSorter, Sorter, NoteInfo
+    AlphaNumSorter, CollationSorter, Sorter, NoteInfo, SavedSearch, FilterStream
 from . import tk
-from .utils import SubjectMixin
+from .utils import SubjectMixin, get_note_title
 from . import view
 from .version import VERSION
 from . import events
@@ -115,12 +117,15 @@ class SortMode(enum.Enum):
     CREATION_DATE = 2
     # Sort in alphanumeric order.
     ALPHA_NUM = 3
+    # Sort in the collation order of the current locale.
+    COLLATION = 4
 
     @classmethod
     def human_friendly_names(cls) -> typing.Dict[str, 'SortMode']:
         return {
             'title (alphabetical order)': cls.ALPHA,
             'title (alphanumerical order)': cls.ALPHA_NUM,
+            'title (locale order)': cls.COLLATION,
             'modification date': cls.MODIFICATION_DATE,
             'creation date': cls.CREATION_DATE,
         }
@@ -142,6 +147,8 @@ class Config:
         is_linux = platform.system() == "Linux"
 
         self.app_dir = app_dir
+        # Cached value of the sorter property and the options it was made for.
+        self._sorter: typing.Optional[typing.Tuple[typing.Tuple[SortMode, bool], Sorter]] = None
         # cross-platform way of getting home dir!
         # http://stackoverflow.com/a/4028943/532513
         home = pathlib.Path.home()
@@ -184,6 +191,8 @@ class Config:
             'list_font_size': '10',
             'list_hide_time': '0',
             'list_hide_tags': '0',
+            'list_virtual': '0',
+            'lazy_highlight_size': '0',
             'underline_urls': 'true',
             'layout': 'horizontal',
             'print_columns': '0',
@@ -256,6 +265,8 @@ class Config:
 
         self.list_hide_time = cp.getint(cfg_sec, 'list_hide_time')
         self.list_hide_tags = cp.getint(cfg_sec, 'list_hide_tags')
+        self.list_virtual = cp.getint(cfg_sec, 'list_virtual')
+        self.lazy_highlight_size = cp.getint(cfg_sec, 'lazy_highlight_size')
 
         self.underline_urls = cp.getboolean(cfg_sec, 'underline_urls')
 
@@ -336,11 +347,21 @@ class Config:
         return str(pathlib.Path(path).expanduser().absolute())
 
     @property
-    def sorter(self):
-        mode = SortMode(self.sort_mode)
+    def sorter(self) -> Sorter:
+        """ Sorter for the current sort_mode and pinned_ontop.
+
+        The same object is returned until either option changes, so callers can use it to cache sort keys.
+        """
+        options = (SortMode(self.sort_mode), bool(self.pinned_ontop))
+        if self._sorter is None or self._sorter[0] != options:
+            self._sorter = (options, self._make_sorter(*options))
+        return self._sorter[1]
+
+    @staticmethod
+    def _make_sorter(mode: SortMode, pinned_ontop: bool) -> Sorter:
 
         sorters: typing.List[Sorter] = []
-        if self.pinned_ontop:
+        if pinned_ontop:
             sorters.append(PinnedSorter())
 
         if mode == SortMode.ALPHA:
@@ -349,6 +370,8 @@ class Config:
             sorters.append(DateSorter(mode=mode))
         elif mode == SortMode.ALPHA_NUM:
             sorters.append(AlphaNumSorter())
+        elif mode == SortMode.COLLATION:
+            sorters.append(CollationSorter())
         else:
             raise ValueError(f'invalid sort_mode: {mode}')
 
@@ -371,7 +394,8 @@ class Config:
         if not cp.has_section(section):
             cp.add_section(section)
 
-        cp.set(section, key, "%s" % value)
+        # Escape '%' so that values round-trip through the interpolation of read_setting().
+        cp.set(section, key, ("%s" % value).replace('%', '%%'))
         with open(self.settings_file, 'w') as configfile:
             cp.write(configfile)
 
@@ -389,6 +413,27 @@ class Config:
                 return cp.get(section, key)
         return None
 
+    def read_saved_searches(self) -> typing.List[SavedSearch]:
+        """
+        Read the saved searches from the settings file.
+        Returns an empty list if there are none or the setting is broken.
+        """
+        value = self.read_setting('search', 'saved_searches')
+        if not value:
+            return []
+        try:
+            return [SavedSearch(name=name, query=query) for name, query in json.loads(value)]
+        except (ValueError, TypeError) as e:
+            logging.warning('Ignored broken saved searches in %s: %s' % (self.settings_file, e))
+            return []
+
+    def write_saved_searches(self, searches: typing.Iterable[SavedSearch]):
+        """
+        Write the saved searches to the settings file.
+        They are stored as a JSON list of [name, query] pairs because option names are not case-preserving.
+        """
+        self.write_setting('search', 'saved_searches', json.dumps([[s.name, s.query] for s in searches]))
+
 
 class NotesListModel(SubjectMixin):
     """
@@ -401,20 +446,31 @@ class NotesListModel(SubjectMixin):
 
         self.list: typing.List[NoteInfo] = []
         self.match_regexp: typing.Optional[typing.Pattern] = None
+        # LOCAL key -> index in list.  Kept in sync by set_list() and extend_list().
+        self._idx: typing.Dict[str, int] = {}
 
     def set_list(self, alist: typing.List[NoteInfo]):
         self.list = alist
+        self._idx = {}
+        self._index_from(0)
         self.notify_observers('set:list', None)
 
+    def extend_list(self, alist: typing.List[NoteInfo]):
+        """ Append notes to the list.  Observers get the appended notes as the event. """
+        start = len(self.list)
+        self.list.extend(alist)
+        self._index_from(start)
+        self.notify_observers('extend:list', alist)
+
+    def _index_from(self, start):
+        for i in range(start, len(self.list)):
+            # the first one wins, if a key is in the list twice.
+            self._idx.setdefault(self.list[i].key, i)
+
     def get_idx(self, key):
         """Find idx for passed LOCAL key.
         """
-        found = [i for i, e in enumerate(self.list) if e.key == key]
-        if found:
-            return found[0]
-
-        else:
-            return -1
+        return self._idx.get(key, -1)
 
     def get(self, key):
         idx = self.get_idx(key)
@@ -424,10 +480,19 @@ class NotesListModel(SubjectMixin):
         return self.list[idx]
 
 
+class _NotesStream(typing.NamedTuple):
+    """ Notes that have not been appended to the notes list yet.  See Controller.show_notes_list(). """
+    stream: FilterStream
+    on_complete: typing.Optional[typing.Callable[[], None]]
+
+
 class Controller:
     """Main application class.
     """
 
+    # Number of notes appended to the notes list at once.
+    NOTES_LIST_CHUNK_SIZE = 100
+
     def __init__(self, config: Config):
         self.config = config
 
@@ -458,6 +523,13 @@ class Controller:
             self.config.simplenote_sync = 0
 
         self.notes_list_model = NotesListModel()
+        # Notes list being filled by show_notes_list().
+        self._notes_stream: typing.Optional[_NotesStream] = None
+        # Search string of the notes list.  None is a valid search string.
+        self._listed_search_string: typing.Any = object()
+        # NotesDB generation the notes list was filtered in.
+        self._listed_generation = -1
+        self._refresh_pending = False
         # create the interface
         self.view = view.View(self.config, self.notes_list_model)
 
@@ -471,6 +543,9 @@ class Controller:
                 self.view.show_error('Sync error', emsg)
                 exit(1)
 
+            self.view.set_tag_catalog(self.notes_db)
+            self.view.set_title_catalog(self.notes_db)
+
             self.notes_db.add_observer('saved:note', self.observer_notes_db_saved_note)
             self.notes_db.add_observer('synced:note', self.observer_notes_db_synced_note)
             self.notes_db.add_observer('change:note-status', self.observer_notes_db_change_note_status)
@@ -495,6 +570,12 @@ class Controller:
             self.view.add_observer('add:tag', self.observer_view_add_tag)
             self.view.add_observer('change:sort_mode', self.observer_view_change_sort_mode)
             self.view.add_observer('change:pinned_on_top', self.observer_view_change_pinned_on_top)
+            self.view.add_observer('command:backlinks', self.observer_view_backlinks)
+            self.view.add_observer('command:find_similar', self.observer_view_find_similar)
+            self.view.add_observer('jump:note', self.observer_view_jump_note)
+            self.view.add_observer('add:saved_search', self.observer_view_add_saved_search)
+            self.view.add_observer('select:saved_search', self.observer_view_select_saved_search)
+            self.view.add_observer('remove:saved_search', self.observer_view_remove_saved_search)
 
             if self.config.simplenote_sync:
                 self.view.add_observer('command:sync_full', lambda v, et, e: self.sync_full())
@@ -509,12 +590,12 @@ class Controller:
             self.view.add_observer('change:cs', self.observer_view_change_cs)
             self.view.add_observer('change:search_mode', self.observer_view_change_search_mode)
 
-            # nn is a list of (key, note) objects
-            nn, match_regexp, active_notes = self.notes_db.filter_notes()
+            for saved_search in self.config.read_saved_searches():
+                self.notes_db.add_saved_search(saved_search.name, saved_search.query)
+            self.view.set_saved_searches(self.notes_db.get_saved_searches())
+
             # this will trigger the list_change event
-            self.notes_list_model.set_list(nn)
-            self.notes_list_model.match_regexp = match_regexp
-            self.view.set_note_tally(len(nn), active_notes, len(self.notes_db.notes))
+            self.show_notes_list()
 
             # we'll use this to keep track of the currently selected note
             # we only use idx, because key could change from right under us.
@@ -544,8 +625,10 @@ class Controller:
             self.view.show_warning('Rename config section', wmsg)
 
         def poll_notifies():
-            self.view.after(100, poll_notifies)
+            # Poll sooner while the view waits for matches from the background, so that they are shown right away.
+            self.view.after(10 if self.view.pending_matches else 100, poll_notifies)
             self.notes_db.handle_notifies()
+            self.view.handle_notifies()
 
         self.view.after(0, poll_notifies)
         try:
@@ -603,7 +686,7 @@ class Controller:
         self.update_note_status()
 
     def observer_notes_db_saved_note(self, notes_db, evt_type, evt: events.NoteSavedEvent):
-        self.view.refresh_notes_list()
+        self.update_notes_list_row(evt.key)
 
     def observer_notes_db_synced_note(self, notes_db, evt_type, evt: events.NoteSyncedEvent):
         """This observer gets called only when a note returns from
@@ -613,6 +696,7 @@ class Controller:
         # if the note synced back matches our currently selected note,
         # we overwrite.
         if self.selected_note_key is not None and self.selected_note_key == evt.lkey:
+            self.finish_notes_list()
             selected_note_o = self.notes_list_model.get(self.selected_note_key)
             content = self.notes_db.get_note_content(evt.lkey)
             if selected_note_o.note['content'] != content:
@@ -621,21 +705,130 @@ class Controller:
                 # can undo synced back changes if they would want to.
                 self.view.set_note_data(selected_note_o.note, reset_undo=False)
                 self.view.unmute_note_data_changes()
+        self.update_notes_list_row(evt.lkey)
+
+    def update_notes_list_row(self, key):
+        """ Show the changes of the note with the LOCAL key in the notes list.
+
+        If the note has not been changed in a way that could change the search results since the list was filtered,
+        only its row is updated.  Otherwise the list is filtered again, once for all the notes that come in together.
+        """
+        if self.notes_db.get_note_generation(key) <= self._listed_generation:
+            idx = self.notes_list_model.get_idx(key)
+            if idx >= 0:
+                self.view.update_note_row(idx)
+        elif not self._refresh_pending:
+            self._refresh_pending = True
+            self.view.after(0, self._refresh_notes_list)
+
+    def _refresh_notes_list(self):
+        self._refresh_pending = False
         self.view.refresh_notes_list()
 
     def observer_view_click_notelink(self, view, evt_type, note_name: str):
-        # find note_name in titles, try to jump to that note
-        # if not in current list, change search string in case
-        # it's somewhere else
-        # FIXME: implement find_note_by_name
-        idx = self.view.select_note_by_name(note_name)
+        # find note_name in titles of all notes and jump to that note,
+        # even if it is not in the current list.
+        keys = self.notes_db.find_notes_by_title(note_name)
 
-        if idx < 0:
+        if keys:
+            self.jump_to_note(keys[0])
+        else:
             # this means a note with that name was not found
             # because nvpy kicks ass, it then assumes the contents of [[]]
             # to be a new regular expression to search for in the notes db.
             self.view.set_search_entry_text(note_name)
 
+    def observer_view_backlinks(self, view, evt_type, evt):
+        if self.selected_note_key is None:
+            return
+
+        keys = self.notes_db.get_backlinks(self.selected_note_key)
+        self.view.show_note_list('Backlinks', self._note_titles(keys), 'No notes link to this note')
+
+    def observer_view_find_similar(self, view, evt_type, evt):
+        notes = []
+        for i, keys in enumerate(self.notes_db.find_similar_notes(), 1):
+            notes.extend((k, '%d: %s' % (i, title)) for k, title in self._note_titles(keys))
+        self.view.show_note_list('Similar notes', notes, 'No similar notes found')
+
+    def observer_view_jump_note(self, view, evt_type, evt: events.NoteJumpEvent):
+        self.jump_to_note(evt.key)
+
+    def show_notes_list(self, search_string=None):
+        """ Filter notes with search_string and show them in the notes list.
+
+        The first chunk of notes is shown right away.  The rest are appended one chunk at a time from timer callbacks,
+        so that the UI stays responsive while a long list is rendered.  The tally is complete after the last chunk.
+        If the list already shows search_string, it is set at once instead.
+        """
+        # Notes changed after this are filtered again by update_notes_list_row().
+        self._listed_generation = self.notes_db.get_generation()
+        stream = self.notes_db.filter_notes_stream(search_string, self.NOTES_LIST_CHUNK_SIZE)
+        self.notes_list_model.match_regexp = stream.match_regexp
+        if search_string == self._listed_search_string and self._notes_stream is None:
+            # the same search again, e.g. after a save or a sync.  set the whole list at once, so the view only
+            # renders the rows that have changed.
+            self.notes_list_model.set_list([o for chunk in stream.chunks for o in chunk])
+            self.view.set_note_tally(len(self.notes_list_model.list), stream.active_notes, len(self.notes_db.notes))
+            return
+
+        self._listed_search_string = search_string
+        self._notes_stream = _NotesStream(stream, None)
+        self.notes_list_model.set_list(next(stream.chunks, []))
+        self.view.set_note_tally(len(self.notes_list_model.list),
+                                 stream.active_notes,
+                                 len(self.notes_db.notes),
+                                 complete=False)
+        self.view.after(0, lambda: self._append_notes_chunk(stream))
+
+    def _append_notes_chunk(self, stream: FilterStream):
+        if self._notes_stream is None or self._notes_stream.stream is not stream:
+            # the stream has been replaced by a newer search, or is finished.
+            return
+
+        chunk = next(stream.chunks, None)
+        if chunk is not None:
+            self.notes_list_model.extend_list(chunk)
+            self.view.after(0, lambda: self._append_notes_chunk(stream))
+            return
+
+        on_complete = self._notes_stream.on_complete
+        self._notes_stream = None
+        self.view.set_note_tally(len(self.notes_list_model.list), stream.active_notes, len(self.notes_db.notes))
+        if on_complete is not None:
+            on_complete()
+
+    def finish_notes_list(self):
+        """ Append the rest of the notes list right now. """
+        while self._notes_stream is not None:
+            self._append_notes_chunk(self._notes_stream.stream)
+
+    def when_notes_listed(self, callback):
+        """ Call callback() after the notes list has been filled, or now if it is already filled. """
+        if self._notes_stream is None:
+            callback()
+        else:
+            self._notes_stream = self._notes_stream._replace(on_complete=callback)
+
+    def _note_titles(self, keys):
+        """ Return (key, title) of notes for View.show_note_list(). """
+        return [(k, get_note_title(self.notes_db.get_note(k))) for k in keys]
+
+    def jump_to_note(self, key):
+        """ Select the note with the LOCAL key.
+
+        If the note is not in the current list, the search string is cleared so that it shows up.
+        """
+        self.finish_notes_list()
+        idx = self.notes_list_model.get_idx(key)
+        if idx < 0:
+            self.view.set_search_entry_text('')
+            self.finish_notes_list()
+            idx = self.notes_list_model.get_idx(key)
+
+        if idx >= 0:
+            self.view.select_note(idx, silent=False)
+
     def observer_view_delete_note(self, view, evt_type, evt: events.NoteSelectionChangedEvent):
         # delete note from notes_db
         # remove the note from the notes_list_model.list
@@ -808,10 +1001,19 @@ class Controller:
         k = self.selected_note_key
         # for each new evt.value coming in, get a new list from the notes_db
         # and set it in the notes_list_model
-        nn, match_regexp, active_notes = self.notes_db.filter_notes(evt.value)
-        self.notes_list_model.match_regexp = match_regexp
-        self.notes_list_model.set_list(nn)
-        self.view.set_note_tally(len(nn), active_notes, len(self.notes_db.notes))
+        self.show_notes_list(evt.value)
+
+        if self.notes_list_model.get_idx(k) >= 0:
+            self._reselect_note(k)
+        else:
+            # the note may be further down the list, which is still being filled.
+            self.when_notes_listed(lambda: self._reselect_note(k))
+
+    def _reselect_note(self, k):
+        """ Select the note with the LOCAL key k again after the notes list has been replaced. """
+        if self.selected_note_key != k:
+            # the user has selected another note in the meantime.
+            return
 
         idx = self.notes_list_model.get_idx(k)
 
@@ -877,6 +1079,32 @@ class Controller:
         self.config.pinned_ontop = evt.pinned_on_top
         self.view.refresh_notes_list()
 
+    def observer_view_add_saved_search(self, view, evt_type, evt: events.SavedSearchAddedEvent):
+        self.notes_db.add_saved_search(evt.name, evt.query)
+        self.saved_searches_changed()
+
+    def observer_view_select_saved_search(self, view, evt_type, evt: events.SavedSearchSelectedEvent):
+        self.select_saved_search(evt.name)
+
+    def observer_view_remove_saved_search(self, view, evt_type, evt: events.SavedSearchRemovedEvent):
+        self.notes_db.remove_saved_search(evt.name)
+        self.saved_searches_changed()
+
+    def saved_searches_changed(self):
+        """ Persist the saved searches and update the menu. """
+        searches = self.notes_db.get_saved_searches()
+        self.config.write_saved_searches(searches)
+        self.view.set_saved_searches(searches)
+
+    def select_saved_search(self, name: str):
+        """ Show the result of the saved search in the notes list. """
+        for saved_search in self.notes_db.get_saved_searches():
+            if saved_search.name == name:
+                # NotesDB serves the search string from the materialized view of the saved search.
+                self.view.set_search_entry_text(saved_search.query)
+                return
+        logging.warning('Saved search %s is not found' % (name, ))
+
     def observer_view_close(self, view, evt_type, evt):
         # check that everything has been saved and synced before exiting
 
@@ -916,6 +1144,7 @@ class Controller:
         if self.config.keep_search_keyword:
             keyword = self.view.get_search_entry_text()
         self.view.set_search_entry_text(keyword)
+        self.finish_notes_list()
         # we should focus on our thingy
         idx = self.notes_list_model.get_idx(new_key)
         self.view.select_note(idx)
@@ -1051,6 +1280,12 @@ def main(args: typing.Optional[typing.List] = None):
         cfg_files = [ns.cfg]
     config = Config(get_appdir(), cfg_files)
 
+    # Collate titles by the user's locale instead of the C locale.
+    try:
+        locale.setlocale(locale.LC_COLLATE, '')
+    except locale.Error as e:
+        logging.warning(f'cannot set the collation locale: {e}')
+
     # Setup profiler.
     profiler: typing.ContextManager = nullcontext()
     if config.use_profiler:
@@ -2,6 +2,7 @@
 # copyright 2012 by Charl P. Botha <cpbotha@vxlabs.com>
 # new BSD license
 import datetime
+import functools
 import random
 import re
 from urllib.error import URLError
@@ -13,6 +14,8 @@ from . import tk
 
 # first line with non-whitespace should be the title
 note_title_re = re.compile('\s*(.*)\n?')
+# [[note title]] links between notes
+note_link_re = re.compile(r'\[\[([^][]*)\]\]')
 
 
 def generate_random_key():
@@ -31,6 +34,35 @@ def get_note_title(note):
         return ''
 
 
+def get_match_snippet(note, offset, length=60):
+    """
+    Return a short excerpt of the note content around offset, with
+    whitespace collapsed. Returns an empty string if offset is None or
+    lies in the title, which is already shown.
+    """
+    content = note.get('content', '')
+    # note_title_re always matches.
+    mo = note_title_re.match(content)
+    if offset is None or offset < mo.end(1):
+        return ''
+
+    start = max(offset - length // 3, mo.end())
+    end = start + length
+    snippet = ' '.join(content[start:end].split())
+    if start > mo.end():
+        snippet = '...' + snippet
+    if end < len(content):
+        snippet += '...'
+    return snippet
+
+
+def get_note_links(content):
+    """
+    Return titles of notes linked from content with [[note title]].
+    """
+    return [title.strip() for title in note_link_re.findall(content) if title.strip()]
+
+
 def get_note_title_file(note, replace_filename_spaces):
     mo = note_title_re.match(note.get('content', ''))
     if mo:
@@ -59,25 +91,30 @@ def human_date(timestamp):
     * today, then do "15:11"
     * else if it is this year, then do "Aug 4"
     * else do "Dec 11, 2011"
-    """
 
+    Dates other than today are cached by day, so notes of the same day share an entry.
+    """
     # this will also give us timestamp in the local timezone
     dt = datetime.datetime.fromtimestamp(timestamp)
-    # this returns localtime
-    now = datetime.datetime.now()
+    today = datetime.date.today()
 
-    if dt.date() == now.date():
+    if dt.date() == today:
         # today: 15:11
         return dt.strftime('%H:%M')
 
-    elif dt.year == now.year:
+    return _human_day(dt.date(), today)
+
+
+@functools.lru_cache(maxsize=1024)
+def _human_day(day, today):
+    if day.year == today.year:
         # this year: Aug 6
         # format code %d unfortunately 0-pads
-        return dt.strftime('%b') + ' ' + str(dt.day)
+        return day.strftime('%b') + ' ' + str(day.day)
 
     else:
         # not today or this year, so we do "Dec 11, 2011"
-        return '%s %d, %d' % (dt.strftime('%b'), dt.day, dt.year)
+        return '%s %d, %d' % (day.strftime('%b'), day.day, day.year)
 
 
 def note_pinned(n):
@@ -3,16 +3,19 @@
 # new BSD license
 """ View classes """
 
+import collections
+import datetime
 import logging
 import os
-import re
 from tkinter import messagebox as tkMessageBox
+from tkinter import simpledialog as tkSimpleDialog
 import tkinter.font as tkFont  # type:ignore
 import threading
 import typing
 import subprocess
 import platform
 
+from . import highlighting
 from . import search_entry
 from . import tk
 from . import utils
@@ -117,14 +120,68 @@ class RedirectedText(tk.Text):
         self.orig_delete = self.redir.register("delete", self.new_delete)
         self.fonts = [kw['font']]
 
-    def new_insert(self, *args):
-        self.orig_insert(*args)
+        # A copy of the text, including the newline that Tk adds at the end.  The edits that were made to it since
+        # the last take_edits() are recorded with the text after each of them, so that the highlighters do not have
+        # to get the whole text again.
+        self.content = '\n'
+        self.edits: typing.List[typing.Tuple[highlighting.Edit, str]] = []
+        # Counts the edits, so that results that were computed for an older text can be told apart.
+        self.revision = 0
+        # Line starts of the text at the current revision.
+        self.lines = highlighting.LineTable(self.content)
+
+    def new_insert(self, index, *args):
+        if self.cget('state') == tk.NORMAL:
+            # Text inserted at the end goes before the final newline.
+            start = min(self.get_offset(index), len(self.content) - 1)
+            self.orig_insert(index, *args)
+            # args are chars, tagList, chars, tagList, ...
+            self.record_edit(start, 0, ''.join(args[0::2]))
+        else:
+            self.orig_insert(index, *args)
         self.event_generate('<<Change>>')
 
-    def new_delete(self, *args):
-        self.orig_delete(*args)
+    def new_delete(self, index1, index2=None, *args):
+        if args:
+            # Several ranges are deleted at once.  Copy the whole text again.
+            self.orig_delete(index1, index2, *args)
+            self.record_edit(0, len(self.content), self.get('1.0', 'end'))
+        elif self.cget('state') == tk.NORMAL:
+            start = self.get_offset(index1)
+            end = min(start + 1, len(self.content)) if index2 is None else self.get_offset(index2)
+            if start < end == len(self.content):
+                # Tk never deletes the final newline.  If the range starts a line, the newline before it goes instead.
+                end -= 1
+                if 0 < start and self.content[start - 1] == '\n':
+                    start -= 1
+            self.orig_delete(index1, index2)
+            if start < end:
+                self.record_edit(start, end - start, '')
+        else:
+            self.orig_delete(index1, index2)
         self.event_generate('<<Change>>')
 
+    def get_offset(self, index) -> int:
+        """ Return the number of characters before index. """
+        return self.lines.offset(self.index(index), self.content)
+
+    def offset_index(self, offset: int) -> str:
+        """ Return the line.column index of the character at offset. """
+        return self.lines.index(offset, self.content)
+
+    def record_edit(self, start: int, removed: int, inserted: str):
+        self.content = self.content[:start] + inserted + self.content[start + removed:]
+        self.revision += 1
+        edit = highlighting.Edit(start, removed, inserted)
+        self.lines.update(edit)
+        self.edits.append((edit, self.content))
+
+    def take_edits(self) -> typing.List[typing.Tuple[highlighting.Edit, str]]:
+        """ Return the edits that were made since the last call, in order, with the text after each of them. """
+        edits = self.edits
+        self.edits = []
+        return edits
+
 
 class HelpBindings(tk.Toplevel):
     """ Show help window. """
@@ -325,21 +382,23 @@ class TagList(tk.Toplevel):
         sel = box.curselection()
         if len(sel) != 1: return
         for idx in sel:
-            item = box.get(idx)
+            item = self.tags[idx]
             view.set_search_entry_text("t:%s" % item)
         self.destroy()
 
     def __init__(self, parent, taglist, view):
+        """
+        @param taglist: list of (tag, usage count), sorted for display.
+        """
         tk.Toplevel.__init__(self, parent)
         self.title("List all tags")
         self.bind("<Escape>", lambda a: self.destroy())
 
         box = tk.Listbox(self, width=30, selectmode=tk.BROWSE)
+        self.tags = [tag for tag, _ in taglist]
         if taglist:
-            alltags = list(set(taglist))
-            alltags.sort(key=lambda x: x.upper())
-            for item in alltags:
-                box.insert(tk.END, item)
+            for tag, count in taglist:
+                box.insert(tk.END, '%s (%d)' % (tag, count))
             # bind double click and Enter (on box)
             box.bind("<Double-Button-1>", lambda a: self.tagsel(box, view))
             box.bind("<Return>", lambda a: self.tagsel(box, view))
@@ -357,6 +416,45 @@ class TagList(tk.Toplevel):
         self.geometry("+%d+%d" % (x, y))  # Put me over root window
 
 
+class NoteListDialog(tk.Toplevel):
+    """ Dialog listing notes.  Selecting one jumps to it. """
+
+    def __init__(self, parent, title, notes, empty_message, view):
+        """
+        @param notes: list of (LOCAL key, note title).
+        """
+        tk.Toplevel.__init__(self, parent)
+        self.title(title)
+        self.bind("<Escape>", lambda a: self.destroy())
+
+        self.keys = [key for key, _ in notes]
+        box = tk.Listbox(self, width=50, selectmode=tk.BROWSE)
+        if notes:
+            for _, note_title in notes:
+                box.insert(tk.END, note_title)
+            # bind double click and Enter (on box)
+            box.bind("<Double-Button-1>", lambda a: self.notesel(box, view))
+            box.bind("<Return>", lambda a: self.notesel(box, view))
+            box.focus()
+        else:
+            box.insert(tk.END, empty_message)
+
+        box.pack(fill=tk.BOTH, expand=1)
+
+        button = tk.Button(self, text="Dismiss", command=self.destroy)
+        button.pack()
+        x = parent.winfo_x() + 100
+        y = parent.winfo_y() + 100
+
+        self.geometry("+%d+%d" % (x, y))  # Put me over root window
+
+    def notesel(self, box, view):
+        sel = box.curselection()
+        if len(sel) != 1: return
+        view.notify_observers('jump:note', events.NoteJumpEvent(key=self.keys[sel[0]]))
+        self.destroy()
+
+
 #########################################################################
 class StatusBar(tk.Frame):
     """Adapted from the tkinterbook.
@@ -425,17 +523,36 @@ class NotesListConfig(typing.NamedTuple):
     print_columns: int
     hide_time: int
     hide_tags: int
+    # Only put the visible rows into the text widget.  See NotesList.
+    virtual: int = 0
 
 
 class NoteConfig(typing.NamedTuple):
     tagfound: int
     match_regexp: typing.Optional[typing.Pattern]
+    # Offset of the first search match in the content.  See notes_db.NoteInfo.
+    match_offset: typing.Optional[int] = None
+
+
+class NoteRow(typing.NamedTuple):
+    """ A row of NotesList.  See NotesList._make_row(). """
+    note: dict
+    config: NoteConfig
+    # title, joined tags, modifydate, pinned and createdate of the note.
+    fields: tuple
+    # everything the rendered row depends on.  If it is the same, the row does not have to be rendered again.
+    looks: tuple
 
 
 class NotesList(tk.Frame):
     """
     @ivar note_headers: list containing tuples with each note's title, tags,
     modified date and so forth. Always in sync with what is displayed.
+
+    In virtual mode, note_headers is the backing model of the list and the
+    text widget only contains the rows around the visible ones, from
+    row_start up to row_end.  The scrollbar is driven by the position in
+    note_headers instead of the position in the text widget.
     """
 
     TITLE_COL = 0
@@ -444,11 +561,19 @@ class NotesList(tk.Frame):
     PINNED_COL = 3
     CREATEDATE_COL = 4
 
+    # Rows that are put into the text widget above and below the visible rows in virtual mode.
+    VIRTUAL_MARGIN = 50
+    # set_rows() renders all rows between the common head and tail again if it takes more edits than this.
+    DIFF_MAX_EDITS = 100
+
     def __init__(self, master, font_family, font_size, config: NotesListConfig):
         tk.Frame.__init__(self, master)
 
+        self.virtual = config.virtual
+
         yscrollbar = tk.Scrollbar(self)
         yscrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.yscrollbar = yscrollbar
 
         f = tkFont.Font(family=font_family, size=font_size)
 
@@ -459,7 +584,7 @@ class NotesList(tk.Frame):
                             height=25,
                             wrap=tk.NONE,
                             font=f,
-                            yscrollcommand=yscrollbar.set,
+                            yscrollcommand=self.cmd_text_yscroll if self.virtual else yscrollbar.set,
                             undo=False,
                             foreground=config.colors.text,
                             background=config.colors.background)
@@ -493,14 +618,25 @@ class NotesList(tk.Frame):
                              background=config.colors.highlight_note_info)
 
         self.text.tag_config("modifydate", foreground=config.colors.note_info)
+        self.text.tag_config("snippet", foreground=config.colors.note_info)
 
-        yscrollbar.config(command=self.text.yview)
+        yscrollbar.config(command=self.cmd_yview if self.virtual else self.text.yview)
 
         self._bind_events()
 
         self.selected_idx = -1
         # list containing tuples with each note's title, tags,
         self.note_headers: typing.List[tuple] = []
+        # to render each row again.
+        self.note_rows: typing.List[NoteRow] = []
+        # local key -> (revision, fields) of the notes in the list.  See _note_fields().
+        self._fields_cache: typing.Dict[str, typing.Tuple[tuple, tuple]] = {}
+        # local key of each row.
+        self.note_keys: typing.List[typing.Optional[str]] = []
+        # rows note_headers[row_start:row_end] are in the text widget.
+        self.row_start = 0
+        self.row_end = 0
+        self._scrollbar_update_pending = False
 
         self.layout = config.layout
         self.hide_time = config.hide_time
@@ -511,87 +647,169 @@ class NotesList(tk.Frame):
         else:
             self.cwidth = f.measure(' ')
         self.fonts = [f, italic_font, bold_font]
+        self.linespace = max(font.metrics('linespace') for font in self.fonts)
 
-    def append(self, note, config):
+    def append(self, note, config, key=None):
         """
         @param note: The complete note dictionary.
+        @param key: Local key of the note.  set_rows() uses it to find the rows that have changed.
         """
+        self.extend([(key, note, config)])
+
+    def extend(self, rows: typing.Sequence[typing.Tuple[typing.Optional[str], dict, NoteConfig]]):
+        """ Append rows of (key, note, config).  They are rendered in one go. """
+        today = datetime.date.today()
+        start = len(self.note_keys)
+        for key, note, config in rows:
+            header, row = self._make_row(key, note, config, today)
+            self.note_headers.append(header)
+            self.note_rows.append(row)
+            self.note_keys.append(key)
+
+        end = len(self.note_keys)
+        if self.virtual:
+            # only rows that continue the rows in the text widget, up to the size of the window.
+            if start == self.row_end:
+                end = min(end, self.row_start + self.get_window_size())
+            else:
+                end = start
+        if start < end:
+            self.enable_text()
+            self._insert_rows_text(start, end - start)
+            self.disable_text()
+            self.row_end = end
+        if self.virtual:
+            self._schedule_scrollbar_update()
+
+    def _make_row(self, key, note, config, today) -> typing.Tuple[tuple, NoteRow]:
+        """ Return the header and the row of a note.
+
+        today is part of the looks of the row, because human_date() depends on it.
+        """
+        fields = self._note_fields(key, note)
+        title, _, modifydate, pinned, createdate = fields
+        header = (title, note.get('tags'), modifydate, pinned, createdate)
+
+        regexp = config.match_regexp
+        looks = (fields, bool(config.tagfound), regexp and (regexp.pattern, regexp.flags), config.match_offset,
+                 note.get('content') if config.match_offset is not None else None, today)
+        return header, NoteRow(note, config, fields, looks)
 
-        title = utils.get_note_title(note)
+    def _note_fields(self, key, note):
+        """ Return title, joined tags, modifydate, pinned and createdate of the note.
+
+        They are cached by the local key and computed again only when a new revision of the note comes in.
+        """
         tags = note.get('tags')
-        modifydate = float(note.get('modifydate'))
-        pinned = utils.note_pinned(note)
-        createdate = float(note.get('createdate'))
-        self.note_headers.append((title, tags, modifydate, pinned, createdate))
-        line_number = len(self.note_headers)
+        revision = (note.get('content'), tuple(tags or ()), note.get('modifydate'), note.get('createdate'),
+                    tuple(note.get('systemtags') or ()))
+        cached = self._fields_cache.get(key) if key is not None else None
+        if cached is not None and cached[0] == revision:
+            return cached[1]
+
+        fields = (utils.get_note_title(note), ','.join(tags or ()), float(note.get('modifydate')),
+                  utils.note_pinned(note), float(note.get('createdate')))
+        if key is not None:
+            self._fields_cache[key] = (revision, fields)
+        return fields
+
+    def _insert_rows_text(self, idx, count):
+        """ Insert count notes from the idx'th into the text widget, above the row that is there now.
+
+        The rows are built as one string together with the ranges of each tag, so the text widget gets one insert
+        and one tag_add per tag however many rows there are.  Caller has to enable the text widget.
+        """
+        first_line = idx - self.row_start + 1
+        cellwidth = self._get_cell_width() if self.layout == "vertical" and self.print_columns == 1 else None
+
+        lines = []
+        ranges: typing.Dict[str, typing.List[str]] = collections.defaultdict(list)
+        for line_number, i in enumerate(range(idx, idx + count), first_line):
+            segments, highlights = self._row_segments(i, cellwidth)
+            column = 0
+            for text, tag in segments:
+                if tag and text:
+                    ranges[tag] += ('%d.%d' % (line_number, column), '%d.%d' % (line_number, column + len(text)))
+                column += len(text)
+            for start, end in highlights:
+                ranges['title-highlight'] += ('%d.%d' % (line_number, start), '%d.%d' % (line_number, end))
+            lines.append(''.join(text for text, _ in segments))
+            lines.append('\n')
+
+        self.text.insert('%d.0' % (first_line, ), ''.join(lines), ())
+        for tag, indices in ranges.items():
+            self.text.tag_add(tag, *indices)
+
+    def _get_cell_width(self):
+        """ Width of the title and tags columns in characters, for the vertical layout with print_columns. """
+        nrchars, rem = divmod(self.text.winfo_width(), self.cwidth)
+        if self.hide_time:
+            nrchars = int(nrchars)
+        else:
+            nrchars = int(nrchars) - 8
 
-        self.enable_text()
+        if self.hide_tags:
+            return int(nrchars)
+        else:
+            return int(nrchars) // 2
 
-        if self.layout == "vertical" and self.print_columns == 1:
-            nrchars, rem = divmod(self.text.winfo_width(), self.cwidth)
-            if self.hide_time:
-                nrchars = int(nrchars)
-            else:
-                nrchars = int(nrchars) - 8
+    def _row_segments(self, idx, cellwidth):
+        """ Return the (text, tag) segments of the idx'th row, and the column ranges of search matches in the title.
 
-            if self.hide_tags:
-                cellwidth = int(nrchars)
-            else:
-                cellwidth = int(nrchars) // 2
+        @param cellwidth: See _get_cell_width(), or None for other layouts.
+        """
+        note, config, fields, _ = self.note_rows[idx]
+        title, tags, modifydate, pinned, createdate = fields
+        segments: typing.List[typing.Tuple[str, typing.Optional[str]]] = []
+        highlights: typing.List[typing.Tuple[int, int]] = []
 
+        if cellwidth is not None:
             title_length = cellwidth
             if pinned:
                 title_length -= 2
 
-            self.text.insert(tk.END, u'{0:<{w}}'.format(title[:title_length - 1], w=title_length), ("title", ))
+            segments.append((u'{0:<{w}}'.format(title[:title_length - 1], w=title_length), "title"))
             if config.match_regexp:
                 for mo in config.match_regexp.finditer(title):
-                    start = '{}.{}'.format(line_number, min(mo.start(), title_length - 1))
-                    end = '{}.{}'.format(line_number, min(mo.end(), title_length - 1))
-                    self.text.tag_add('title-highlight', start, end)
+                    highlights.append((min(mo.start(), title_length - 1), min(mo.end(), title_length - 1)))
 
             if pinned:
-                self.text.insert(tk.END, ' *', ("pinned", ))
+                segments.append((' *', "pinned"))
 
+            # tags are joined with commas.  they are '' if the note has none.
             if not self.hide_tags:
-                if config.tagfound:
-                    self.text.insert(tk.END, u'{0:<{w}}'.format(','.join(tags)[:cellwidth - 1], w=cellwidth),
-                                     ("found", ))
-                else:
-                    self.text.insert(tk.END, u'{0:<{w}}'.format(','.join(tags)[:cellwidth - 1], w=cellwidth),
-                                     ("tags", ))
+                segments.append((u'{0:<{w}}'.format(tags[:cellwidth - 1],
+                                                    w=cellwidth), "found" if config.tagfound else "tags"))
 
             if not self.hide_time:
-                self.text.insert(tk.END, ' ' + utils.human_date(createdate), ("createdate", ))
+                segments.append((' ' + utils.human_date(createdate), "createdate"))
 
-            # tags can be None (newly created note) or [] or ['tag1', 'tag2']
         else:
-            self.text.insert(tk.END, title, ("title", ))
+            segments.append((title, "title"))
             if config.match_regexp:
                 for mo in config.match_regexp.finditer(title):
-                    start = '{}.{}'.format(line_number, mo.start())
-                    end = '{}.{}'.format(line_number, mo.end())
-                    self.text.tag_add('title-highlight', start, end)
+                    highlights.append((mo.start(), mo.end()))
 
             if pinned:
-                self.text.insert(tk.END, ' *', ("pinned", ))
+                segments.append((' *', "pinned"))
 
             # latest modified first is the default mode
             # we could consider showing createddate here IF the sort mode
             # is configured to be latest created first
             if not self.hide_time:
-                self.text.insert(tk.END, ' ' + utils.human_date(modifydate), ("modifydate", ))
+                segments.append((' ' + utils.human_date(modifydate), "modifydate"))
 
-            # tags can be None (newly created note) or [] or ['tag1', 'tag2']
+            # tags are joined with commas.  they are '' if the note has none.
             if tags and not self.hide_tags:
-                if config.tagfound:
-                    self.text.insert(tk.END, ' ' + ','.join(tags), ("found", ))
-                else:
-                    self.text.insert(tk.END, ' ' + ','.join(tags), ("tags", ))
+                segments.append((' ' + tags, "found" if config.tagfound else "tags"))
 
-        self.text.insert(tk.END, '\n')
+            # context of the search match in the content.  it is built here, so
+            # only notes that are actually shown pay for it.
+            snippet = utils.get_match_snippet(note, config.match_offset)
+            if snippet:
+                segments.append((' ' + snippet, "snippet"))
 
-        self.disable_text()
+        return segments, highlights
 
     def _bind_events(self):
         # Text widget events ##########################################
@@ -633,9 +851,33 @@ class NotesList(tk.Frame):
         # find line that was clicked on
         text_index = self.text.index("@%d,%d" % (event.x, event.y))
         # go from event coordinate to tkinter text INDEX to note idx!
-        idx = int(text_index.split('.')[0]) - 1
+        idx = self.row_start + int(text_index.split('.')[0]) - 1
         self.select(idx, silent=False)
 
+    def cmd_yview(self, *args):
+        """ Scrollbar command in virtual mode.  Scroll by rows of note_headers, not by lines of the text widget. """
+        top = self.get_top_idx()
+        if args[0] == tk.MOVETO:
+            top = int(float(args[1]) * self.get_number_of_notes())
+        elif args[0] == tk.SCROLL:
+            step = self.get_visible_rows() if args[2] == tk.PAGES else 1
+            top += int(args[1]) * step
+        self.scroll_to(top)
+
+    def cmd_text_yscroll(self, first, last):
+        """ yscrollcommand of the text widget in virtual mode.
+
+        Scrolling inside the text widget, e.g. with the mouse wheel, lands here.  When it gets close to either end of
+        the rows in the text widget, the rows around the new position are rendered.
+        """
+        top = self.get_top_idx()
+        margin = self.VIRTUAL_MARGIN // 2
+        if (self.row_start > 0 and top < self.row_start + margin) or \
+                (self.row_end < self.get_number_of_notes() and top + self.get_visible_rows() > self.row_end - margin):
+            self.scroll_to(top)
+        else:
+            self._update_scrollbar()
+
     def cmd_text_copy(self, event):
         if self.selected_idx >= 0:
             self.text.clipboard_clear()
@@ -651,7 +893,13 @@ class NotesList(tk.Frame):
         self.text.delete(1.0, tk.END)
         # and make sure our backing store is in sync
         del self.note_headers[:]
+        del self.note_rows[:]
+        del self.note_keys[:]
+        self._fields_cache.clear()
+        self.row_start = self.row_end = 0
         self.disable_text()
+        if self.virtual:
+            self._schedule_scrollbar_update()
 
     def disable_text(self):
         self.text.config(state=tk.DISABLED)
@@ -659,28 +907,28 @@ class NotesList(tk.Frame):
     def enable_text(self):
         self.text.config(state=tk.NORMAL)
 
-    def find_note_by_title(self, title):
-        """
-        Find note with given title.
-
-        @returns: Note index if found, -1 otherwise.
-        """
-
-        idx = -1
-        for i, nh in enumerate(self.note_headers):
-            t = nh[NotesList.TITLE_COL]
-            if t == title:
-                idx = i
-                break
-
-        return idx
-
     def get_number_of_notes(self):
         # could also have used:
         # return int(self.text.index('end-1c').split('.')[0])
         # but we have the backing store!
         return len(self.note_headers)
 
+    def get_visible_rows(self):
+        """ Number of rows that fit in the text widget. """
+        height = self.text.winfo_height()
+        if height <= 1:
+            # not mapped yet.
+            return int(self.text.cget('height'))
+        return height // self.linespace + 1
+
+    def get_window_size(self):
+        """ Number of rows that are put into the text widget in virtual mode. """
+        return self.get_visible_rows() + 2 * self.VIRTUAL_MARGIN
+
+    def get_top_idx(self):
+        """ Index of the note on the top row of the text widget. """
+        return self.row_start + int(self.text.index('@0,0').split('.')[0]) - 1
+
     def get_pinned(self, idx):
         return self.note_headers[idx][NotesList.PINNED_COL]
 
@@ -716,7 +964,7 @@ class NotesList(tk.Frame):
         """
 
         # tkinter text first line is 1, but first column is 0
-        row = idx + 1
+        row = idx - self.row_start + 1
         start = "%d.0" % (row, )
         end = "%d.end" % (row, )
 
@@ -727,6 +975,14 @@ class NotesList(tk.Frame):
         @param idx: index of note to select. -1 if no selection.
         """
 
+        if self.virtual and 0 <= idx < self.get_number_of_notes():
+            # ensure that this is visible.  it also puts the row into the text widget.
+            top = self.get_top_idx()
+            if idx < top:
+                self.scroll_to(idx)
+            elif idx >= top + self.get_visible_rows() - 1:
+                self.scroll_to(idx - self.get_visible_rows() + 2)
+
         # remove tag selected from row 1 (first) and column 0 to the end of the buffer
         self.text.tag_remove("selected", "1.0", "end")
 
@@ -769,6 +1025,187 @@ class NotesList(tk.Frame):
         elif new_idx < 0:
             self.select(0, silent)
 
+    def set_rows(self, rows: typing.Sequence[typing.Tuple[str, dict, NoteConfig]]):
+        """ Replace the list with rows of (key, note, config).
+
+        Only the rows that have been inserted, deleted, moved or changed are rendered again, and the list stays
+        scrolled to the same note.  The selection stays on the same note, or is cleared if the note is gone.  No
+        event is generated for it.
+        """
+        today = datetime.date.today()
+        keys = [key for key, _, _ in rows]
+        made = [self._make_row(key, note, config, today) for key, note, config in rows]
+        headers = [header for header, _ in made]
+        new_rows = [row for _, row in made]
+        # forget the fields of notes that have left the list.
+        self._fields_cache = {key: self._fields_cache[key] for key in keys if key in self._fields_cache}
+
+        count = self.get_number_of_notes()
+        selected_key = self.note_keys[self.selected_idx] if 0 <= self.selected_idx < count else None
+        top = self.get_top_idx()
+        top_key = self.note_keys[top] if top < count else None
+
+        if self.virtual:
+            self.note_keys[:] = keys
+            self.note_headers[:] = headers
+            self.note_rows[:] = new_rows
+        else:
+            self.enable_text()
+            self._apply_diff(keys, headers, new_rows)
+            self.disable_text()
+
+        self.selected_idx = keys.index(selected_key) if selected_key is not None and selected_key in keys else -1
+        if top_key is not None and top_key in keys:
+            top = keys.index(top_key)
+        if self.virtual:
+            # render the rows around the same note.
+            self.scroll_to(top, render=True)
+        else:
+            self.text.tag_remove("selected", "1.0", "end")
+            if self.selected_idx >= 0:
+                start, end = self.idx_to_index_range(self.selected_idx)
+                self.text.tag_add("selected", start, end)
+            if top_key is not None and top_key in keys:
+                self.text.yview('%d.0' % (top + 1, ))
+
+    def update_row(self, idx, key, note, config):
+        """ Replace the idx'th row, and render it again if it looks different. """
+        header, row = self._make_row(key, note, config, datetime.date.today())
+        changed = row.looks != self.note_rows[idx].looks
+        self.note_keys[idx] = key
+        self.note_headers[idx] = header
+        self.note_rows[idx] = row
+        if changed and self.row_start <= idx < self.row_end:
+            line_number = idx - self.row_start + 1
+            self.enable_text()
+            self.text.delete('%d.0' % (line_number, ), '%d.0' % (line_number + 1, ))
+            self._insert_rows_text(idx, 1)
+            self.disable_text()
+            if idx == self.selected_idx:
+                start, end = self.idx_to_index_range(idx)
+                self.text.tag_add("selected", start, end)
+
+    def _apply_diff(self, keys, headers, rows):
+        """ Edit rows of the text widget and the backing store into keys, headers and rows.  Not in virtual mode. """
+        old_keys = self.note_keys
+        old_count, new_count = len(old_keys), len(keys)
+
+        # rows that are the same at the head and the tail.
+        head = 0
+        while head < min(old_count, new_count) and old_keys[head] == keys[head]:
+            head += 1
+        tail = 0
+        while tail < min(old_count, new_count) - head and old_keys[old_count - tail - 1] == keys[new_count - tail - 1]:
+            tail += 1
+
+        # plan the edits between them.  deleted rows go first, then moves and inserts from the top.
+        old_mid = old_keys[head:old_count - tail]
+        new_mid = keys[head:new_count - tail]
+        new_set = set(new_mid)
+        deleted = [i for i, k in enumerate(old_mid) if k not in new_set]
+        current = [k for k in old_mid if k in new_set]
+        kept = set(current)
+        edits: typing.List[typing.Tuple[str, int, int]] = []
+        max_edits = min(self.DIFF_MAX_EDITS, len(new_mid))
+        for i, k in enumerate(new_mid):
+            if len(edits) + len(deleted) > max_edits:
+                break
+            if i < len(current) and current[i] == k:
+                continue
+            if k in kept:
+                j = current.index(k, i + 1)
+                current.insert(i, current.pop(j))
+                edits.append(('move', j, i))
+            else:
+                current.insert(i, k)
+                edits.append(('insert', i, i))
+
+        if len(edits) + len(deleted) > max_edits:
+            # render the middle again.
+            self._delete_rows(head, head + len(old_mid))
+            self._insert_rows(head, keys[head:new_count - tail], headers[head:new_count - tail],
+                              rows[head:new_count - tail])
+        else:
+            for i in reversed(deleted):
+                self._delete_rows(head + i, head + i + 1)
+            for op, j, i in edits:
+                if op == 'move':
+                    self._delete_rows(head + j, head + j + 1)
+                # the row is in its final place, so it is rendered as it is in the new list.
+                self._insert_rows(head + i, [keys[head + i]], [headers[head + i]], [rows[head + i]])
+
+        # the same notes are in the same places now.  render the rows that look different, a run of them at a time.
+        changed = [idx for idx, row in enumerate(rows) if self.note_rows[idx].looks != row.looks]
+        self.note_headers[:] = headers
+        self.note_rows[:] = rows
+        i = 0
+        while i < len(changed):
+            start = changed[i]
+            while i + 1 < len(changed) and changed[i + 1] == changed[i] + 1:
+                i += 1
+            end = changed[i] + 1
+            i += 1
+            self.text.delete('%d.0' % (start + 1, ), '%d.0' % (end + 1, ))
+            self._insert_rows_text(start, end - start)
+        self.note_keys[:] = keys
+
+    def _delete_rows(self, start, end):
+        """ Delete rows from start up to end.  Not in virtual mode. """
+        self.text.delete('%d.0' % (start + 1, ), '%d.0' % (end + 1, ))
+        del self.note_keys[start:end]
+        del self.note_headers[start:end]
+        del self.note_rows[start:end]
+        self.row_end = len(self.note_keys)
+
+    def _insert_rows(self, idx, keys, headers, rows):
+        """ Insert rows above the idx'th row.  Not in virtual mode. """
+        self.note_keys[idx:idx] = keys
+        self.note_headers[idx:idx] = headers
+        self.note_rows[idx:idx] = rows
+        self.row_end = len(self.note_keys)
+        self._insert_rows_text(idx, len(keys))
+
+    def scroll_to(self, top, render=False):
+        """ Show the top'th note on the top row in virtual mode.
+
+        If the rows around it are not in the text widget yet, or render is True, the text widget is rendered again
+        with them.
+        """
+        count = self.get_number_of_notes()
+        visible = self.get_visible_rows()
+        top = max(0, min(top, count - visible + 1))
+        if render or top < self.row_start or min(top + visible, count) > self.row_end:
+            self._render_rows(max(0, top - self.VIRTUAL_MARGIN))
+        self.text.yview('%d.0' % (top - self.row_start + 1, ))
+        self._update_scrollbar()
+
+    def _render_rows(self, start):
+        """ Replace the rows in the text widget with rows from start. """
+        self.enable_text()
+        self.text.delete(1.0, tk.END)
+        self.row_start = start
+        self.row_end = min(self.get_number_of_notes(), start + self.get_window_size())
+        self._insert_rows_text(self.row_start, self.row_end - self.row_start)
+        self.disable_text()
+
+        if self.row_start <= self.selected_idx < self.row_end:
+            first, last = self.idx_to_index_range(self.selected_idx)
+            self.text.tag_add("selected", first, last)
+
+    def _schedule_scrollbar_update(self):
+        if not self._scrollbar_update_pending:
+            self._scrollbar_update_pending = True
+            self.after_idle(self._update_scrollbar)
+
+    def _update_scrollbar(self):
+        self._scrollbar_update_pending = False
+        count = self.get_number_of_notes()
+        if count == 0:
+            self.yscrollbar.set(0.0, 1.0)
+            return
+        top = self.get_top_idx()
+        self.yscrollbar.set(top / count, min(1.0, (top + self.get_visible_rows()) / count))
+
 
 tkinter_umlauts = ['odiaeresis', 'adiaeresis', 'udiaeresis', 'Odiaeresis', 'Adiaeresis', 'Udiaeresis', 'ssharp']
 
@@ -784,7 +1221,8 @@ class TriggeredcompleteEntry(tk.Entry):
     suggested part.
 
     To enable triggeredcompletion use set_completion_list(list) to define
-    a list of possible strings to hit.
+    a list of possible strings to hit, or set_completion_func(func) to look
+    them up on demand.
     To cycle through hits use CTRL <space> keys.
 
     @ivar cycle: if 1, then we're cycling through alternative completions.
@@ -793,12 +1231,19 @@ class TriggeredcompleteEntry(tk.Entry):
     def __init__(self, master, case_sensitive, **kw):
         tk.Entry.__init__(self, master, **kw)
         self.case_sensitive = case_sensitive
+        # completion_func(prefix, case_sensitive) returns the list of hits.
+        self._completion_func: typing.Optional[typing.Callable[[str, bool], typing.List[str]]] = None
         # make sure we're initialised, else the event handler could generate
         # exceptions checking for instance variables that don't exist yet.
         self.set_completion_list([])
         self.bind('<KeyRelease>', self.handle_keyrelease)
 
+    def set_completion_func(self, completion_func):
+        self.set_completion_list([])
+        self._completion_func = completion_func
+
     def set_completion_list(self, completion_list):
+        self._completion_func = None
         self._completion_list = completion_list
         self._hits = []
         self._hit_index = 0
@@ -828,6 +1273,8 @@ class TriggeredcompleteEntry(tk.Entry):
 
             # collect hits
             _hits = []
+            if self._completion_func is not None:
+                _hits = self._completion_func(self.get()[self.wstart:], bool(self.case_sensitive))
             for element in self._completion_list:
                 if self.case_sensitive == 0:
                     if element.lower().startswith(self.get()[self.wstart:].lower()):
@@ -879,6 +1326,8 @@ class TriggeredcompleteText(RedirectedText):
     def __init__(self, master, case_sensitive, **kwargs):
         RedirectedText.__init__(self, master, **kwargs)
         self.case_sensitive = case_sensitive
+        # completion_func(prefix, case_sensitive) returns the list of hits.
+        self._completion_func: typing.Optional[typing.Callable[[str, bool], typing.List[str]]] = None
         # make sure we're initialised, else the event handler could generate
         # exceptions checking for instance variables that don't exist yet.
         self.set_completion_list([])
@@ -887,7 +1336,12 @@ class TriggeredcompleteText(RedirectedText):
         self.old_cursor_pos = 0
         self.old_content = ""
 
+    def set_completion_func(self, completion_func):
+        self.set_completion_list([])
+        self._completion_func = completion_func
+
     def set_completion_list(self, completion_list):
+        self._completion_func = None
         self._completion_list = completion_list
         self._hits = []
         self._hit_index = 0
@@ -947,6 +1401,8 @@ class TriggeredcompleteText(RedirectedText):
 
             # collect hits
             hits = []
+            if self._completion_func is not None:
+                hits = self._completion_func(word_prefix, bool(self.case_sensitive))
             for element in self._completion_list:
                 if self.case_sensitive == 0:
                     if element.lower().startswith(word_prefix.lower()):
@@ -1014,13 +1470,20 @@ class View(utils.SubjectMixin):
     """Main user interface class.
     """
 
+    # Lines above and below the visible ones that are highlighted too, if only the visible lines are highlighted.
+    HIGHLIGHT_MARGIN = 100
+    # Texts of at least this many characters are matched in full on the match worker.
+    BACKGROUND_MATCH_SIZE = 100000
+
     def __init__(self, config: 'nvpy.Config', notes_list_model: 'nvpy.NotesListModel'):
         utils.SubjectMixin.__init__(self)
 
         self.config = config
-        self.taglist = None
+        # Source of tags for completion and the tag list.  See set_tag_catalog().
+        self.tag_catalog: typing.Optional['notes_db.NotesDB'] = None
 
         notes_list_model.add_observer('set:list', self.observer_notes_list)
+        notes_list_model.add_observer('extend:list', self.observer_notes_list)
         self.notes_list_model = notes_list_model
         self.timer_ids_lock = threading.Lock()
         self.timer_ids: typing.Set[typing.Any] = set()
@@ -1033,8 +1496,24 @@ class View(utils.SubjectMixin):
         # on Windows, tkinter uses system dialogs in any case
         self.root.option_add('*Dialog.msg.font', 'Helvetica 12')
 
-        self.text_tags_links: typing.List[str] = []
-        self.text_tags_search: typing.List[str] = []
+        # The values of the spans are the names of their tags.
+        self.link_highlighter = highlighting.PatternHighlighter(highlighting.LINK_RE,
+                                                                value=self._link_tag,
+                                                                lookback=highlighting.link_lookback)
+        self.search_highlighter = highlighting.PatternHighlighter(None)
+        self.markdown_highlighter = highlighting.PatternHighlighter(highlighting.MARKDOWN_RE,
+                                                                    value=lambda mo: 'md-bold')
+        # Offsets of the text whose highlights are shown, for notes larger than lazy_highlight_size.  None if all of
+        # them are shown.
+        self.highlight_window: typing.Optional[typing.Tuple[int, int]] = None
+        # Full passes of large texts run on the match worker.  Its results come back through the notify queue.  These
+        # highlighters have a pending job.
+        self.pending_matches: typing.Set[highlighting.PatternHighlighter] = set()
+        # (revision, edit, content) of the edits made while a job is pending, to bring its matches up to date.
+        self.match_edits: typing.List[typing.Tuple[int, highlighting.Edit, str]] = []
+        self.match_worker = highlighting.MatchWorker(lambda job, matches: self.notify_observers(
+            'found:matches', events.MatchesFoundEvent(job=job, matches=matches)))
+        self.add_observer('found:matches', self.observer_matches_found)
 
         self.search_entry.focus_set()
 
@@ -1146,8 +1625,9 @@ class View(utils.SubjectMixin):
         note, ensure that the first one is visible.
         """
 
-        if self.text_tags_search:
-            self.text_note.see(self.text_tags_search[0] + '.first')
+        # The first match might not have its tag yet.
+        if len(self.search_highlighter):
+            self.text_note.see(self.text_note.offset_index(self.search_highlighter.span(0)[0]))
 
     def select_note(self, idx, silent=False):
         """Programmatically select the note by idx
@@ -1160,13 +1640,6 @@ class View(utils.SubjectMixin):
 
         self.notes_list.select(idx, silent)
 
-    def select_note_by_name(self, name):
-        idx = self.notes_list.find_note_by_title(name)
-        if idx >= 0:
-            self.select_note(idx, silent=False)
-
-        return idx
-
     def set_note_status(self, status):
         """status is an object with ivars modified, saved and synced.
         """
@@ -1191,9 +1664,12 @@ class View(utils.SubjectMixin):
 
         self.statusbar.set_note_status('Current note %s' % (s, ))
 
-    def set_note_tally(self, filtered_notes, active_notes, total_notes):
-        self.statusbar.set_centre_status('Listing %d / %d active notes (%d total)' %
-                                         (filtered_notes, active_notes, total_notes))
+    def set_note_tally(self, filtered_notes, active_notes, total_notes, complete=True):
+        """
+        @param complete: False if more notes are still being added to the list.
+        """
+        self.statusbar.set_centre_status('Listing %d%s / %d active notes (%d total)' %
+                                         (filtered_notes, '' if complete else '+', active_notes, total_notes))
 
     def set_search_entry_text(self, text):
         self.search_entry_var.set(text)
@@ -1348,6 +1824,10 @@ class View(utils.SubjectMixin):
         self.pinned_checkbutton_var = tk.IntVar()
         note_menu.add_checkbutton(label='Pinned', onvalue=1, offvalue=0, variable=self.pinned_checkbutton_var)
 
+        note_menu.add_separator()
+
+        note_menu.add_command(label='Backlinks...', underline=0, command=self.cmd_backlinks)
+
         # NOTES ########################################################
         notes_menu = tk.Menu(menu, tearoff=False)
         menu.add_cascade(label='Notes', underline=1, menu=notes_menu)
@@ -1364,7 +1844,7 @@ class View(utils.SubjectMixin):
                                    variable=self.pinned_on_top_var)
 
         # SEARCH #######################################################
-        search_menu = tk.Menu(menu, tearoff=False)
+        search_menu = self.search_menu = tk.Menu(menu, tearoff=False)
         menu.add_cascade(label='Search', underline=0, menu=search_menu)
 
         self.search_mode_options = ("gstyle", "regexp")
@@ -1379,6 +1859,14 @@ class View(utils.SubjectMixin):
 
         search_menu.add_checkbutton(label='Case sensitive', onvalue=1, offvalue=0, variable=self.cs_checkbutton_var)
 
+        search_menu.add_separator()
+
+        search_menu.add_command(label='Save current search...', underline=0, command=self.cmd_save_search)
+        self.saved_searches_menu = tk.Menu(search_menu, tearoff=False)
+        search_menu.add_cascade(label='Saved searches', underline=1, menu=self.saved_searches_menu)
+        self.remove_saved_search_menu = tk.Menu(search_menu, tearoff=False)
+        search_menu.add_cascade(label='Delete saved search', underline=0, menu=self.remove_saved_search_menu)
+
         # TOOLS ########################################################
         tools_menu = tk.Menu(menu, tearoff=False)
         menu.add_cascade(label="Tools", underline=0, menu=tools_menu)
@@ -1387,6 +1875,8 @@ class View(utils.SubjectMixin):
 
         tools_menu.add_command(label="List tags", underline=0, command=self.cmd_list_tags)
 
+        tools_menu.add_command(label="Find similar notes...", underline=0, command=self.cmd_find_similar)
+
         # the internet thinks that multiple modifiers should work, but this didn't
         # want to.
         #self.root.bind_all("<Control-Shift-c>", lambda e: self.word_count())
@@ -1489,7 +1979,8 @@ class View(utils.SubjectMixin):
                                             layout=self.config.layout,
                                             hide_time=self.config.list_hide_time,
                                             hide_tags=self.config.list_hide_tags,
-                                            print_columns=self.config.print_columns)
+                                            print_columns=self.config.print_columns,
+                                            virtual=self.config.list_virtual)
 
         if self.config.layout == "horizontal":
             paned_window = tk.PanedWindow(self.root, orient=tk.HORIZONTAL)
@@ -1543,11 +2034,9 @@ class View(utils.SubjectMixin):
         tags_label.pack(side=tk.LEFT)
 
         def completion_func(searchWord):
-            if self.taglist is None:
+            if self.tag_catalog is None:
                 return []
-            tags = [tag for tag in self.taglist if searchWord in tag]
-            tags.sort(key=lambda x: x.upper())
-            return tags
+            return self.tag_catalog.find_tags(searchWord)
 
         self.tags_entry_var = tk.StringVar()
         self.tags_entry = SuggestionEntry(completion_func, note_tags_frame, textvariable=self.tags_entry_var)
@@ -1561,6 +2050,10 @@ class View(utils.SubjectMixin):
             yscrollbar = tk.Scrollbar(master)
             yscrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
+            def yscroll(first, last):
+                yscrollbar.set(first, last)
+                self.handler_text_yscroll()
+
             #f = tkFont.nametofont('TkFixedFont')
             f = tkFont.Font(family=self.config.font_family, size=self.config.font_size)
             # tkFont.families(root) returns list of available font family names
@@ -1573,7 +2066,7 @@ class View(utils.SubjectMixin):
                                          font=f,
                                          tabs=(4 * f.measure(0), 'left'),
                                          tabstyle='wordprocessor',
-                                         yscrollcommand=yscrollbar.set,
+                                         yscrollcommand=yscroll,
                                          undo=True,
                                          foreground=self.config.colors.text,
                                          background=self.config.colors.background,
@@ -1599,6 +2092,19 @@ class View(utils.SubjectMixin):
         self.text_note.tag_config('md-bold', font=bold_font)
         self.fonts.append(bold_font)
 
+        # All links and search results share a tag per kind.  Note links are never underlined.
+        for tag, underline in [('note-link', 0), ('web-link', int(self.config.underline_urls))]:
+            self.text_note.tag_config(tag,
+                                      foreground=self.config.colors.url,
+                                      selectbackground=self.config.colors.url_selection_background,
+                                      underline=underline)
+            # Hovering over link changes cursor to hand
+            self.text_note.tag_bind(tag, '<Enter>', lambda e: self.text_note.config(cursor="hand2"))
+            self.text_note.tag_bind(tag, '<Leave>', lambda e: self.text_note.config(cursor=""))
+            # Clicking link calls link handler method
+            self.text_note.tag_bind(tag, '<Button-1>', self.handler_click_link_tag)
+        self.text_note.tag_config('search', background=self.config.colors.highlight_background)
+
         # finish UI creation ###########################################
 
         # set the window to the same place that it was last time
@@ -1700,9 +2206,55 @@ class View(utils.SubjectMixin):
                               parent=self.root)
 
     def cmd_list_tags(self):
-        l = TagList(self.root, self.taglist, self)
+        taglist = self.tag_catalog.get_tags() if self.tag_catalog is not None else []
+        l = TagList(self.root, taglist, self)
         self.root.wait_window(l)
 
+    def cmd_save_search(self):
+        query = self.get_search_entry_text()
+        if not query:
+            self.set_status_text('Type a search string before saving it.')
+            return
+
+        name = tkSimpleDialog.askstring('Save search', 'Name:', initialvalue=query, parent=self.root)
+        if name:
+            self.notify_observers('add:saved_search', events.SavedSearchAddedEvent(name=name, query=query))
+
+    def set_saved_searches(self, searches: typing.List['notes_db.SavedSearch']):
+        """ Rebuild the saved searches submenus. """
+        for m in (self.saved_searches_menu, self.remove_saved_search_menu):
+            m.delete(0, tk.END)
+
+        for s in searches:
+            self.saved_searches_menu.add_command(label=s.name,
+                                                 command=lambda name=s.name: self.cmd_select_saved_search(name))
+            self.remove_saved_search_menu.add_command(label=s.name,
+                                                      command=lambda name=s.name: self.cmd_remove_saved_search(name))
+
+        state = tk.NORMAL if searches else tk.DISABLED
+        self.search_menu.entryconfigure('Saved searches', state=state)
+        self.search_menu.entryconfigure('Delete saved search', state=state)
+
+    def cmd_select_saved_search(self, name):
+        self.notify_observers('select:saved_search', events.SavedSearchSelectedEvent(name=name))
+
+    def cmd_remove_saved_search(self, name):
+        self.notify_observers('remove:saved_search', events.SavedSearchRemovedEvent(name=name))
+
+    def cmd_backlinks(self):
+        self.notify_observers('command:backlinks', None)
+
+    def cmd_find_similar(self):
+        self.notify_observers('command:find_similar', None)
+
+    def show_note_list(self, title, notes, empty_message):
+        """ Show a dialog listing notes.
+
+        @param notes: list of (LOCAL key, note title).
+        """
+        d = NoteListDialog(self.root, title, notes, empty_message, self)
+        self.root.wait_window(d)
+
     def cmd_help_bindings(self):
         h = HelpBindings()
         self.root.wait_window(h)
@@ -1801,29 +2353,17 @@ class View(utils.SubjectMixin):
         if self.notes_list.selected_idx < 0:
             return
 
-        t = self.text_note
-
-        # remove all existing tags
-        for tag in self.text_tags_search:
-            t.tag_remove(tag, '1.0', 'end')
-
-        del self.text_tags_search[:]
-
-        pat = self.notes_list_model.match_regexp
-        if pat is None:
-            return
-
-        for mo in pat.finditer(t.get('1.0', 'end')):
-
-            # start creating a new tkinter text tag
-            tag = 'search-%d' % (len(self.text_tags_search), )
-            t.tag_config(tag, background=self.config.colors.highlight_background)
+        self._set_search_pattern(self.notes_list_model.match_regexp)
+        self._match_all(self.search_highlighter)
 
-            # mo.start(), mo.end() or mo.span() in one go
-            t.tag_add(tag, '1.0+%dc' % (mo.start(), ), '1.0+%dc' % (mo.end(), ))
-
-            # record the tag name so we can delete it later
-            self.text_tags_search.append(tag)
+    def _set_search_pattern(self, pat):
+        """ Remove all search highlights, and highlight pat from now on. """
+        self.text_note.tag_remove('search', '1.0', tk.END)
+        # Patterns of literal words can be updated around each edit, others are matched again in full.
+        self.search_highlighter = highlighting.PatternHighlighter(pat,
+                                                                  value=lambda mo: 'search',
+                                                                  line_local=pat is not None
+                                                                  and highlighting.is_line_local(pat))
 
     def activate_links(self):
         """
@@ -1831,77 +2371,148 @@ class View(utils.SubjectMixin):
         http://www.regexguru.com/2008/11/detecting-urls-in-a-block-of-text/
         (mine is slightly modified)
         """
+        self._match_all(self.link_highlighter)
+
+    @staticmethod
+    def _link_tag(mo):
+        # Any Match in Group 0 is a Note Link
+        return 'note-link' if mo.groups()[0] is not None else 'web-link'
 
+    def handler_click_link_tag(self, evt):
+        """ Open the link under the mouse.  It is looked up in the spans of the link highlighter. """
         t = self.text_note
+        span = self.link_highlighter.span_at(t.get_offset(tk.CURRENT))
+        if span is not None:
+            # The whole match is the link.
+            self.handler_click_link(t.content[span[0]:span[1]])
 
-        # Remove all existing tags
-        for tag in self.text_tags_links:
-            t.tag_remove(tag, '1.0', 'end')
-
-        del self.text_tags_links[:]
-
-        # List of Regex patterns to match various link types to be activated
-        re_list = [
-            r"(\[\[[^][]*\]\])",  # Inter-note Links
-            r"\b((https?|ftp|file)://[-\w+&@#/%?=~|!:,.;]*[\w+&@#/%=~|])",  # Http(s) / FTP / File Links
-            r"(mailto:[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+)",  # Mailto Links
-            r"((?:tel|mid):[^\s]+)",  # Tel / Mid Links
-            r"((?:thunderlink|irc|ircs|irc6)://[^\s]+)",  # Thunderbird and IRC Links
-            r"(message:(?://)?(?:%3c|<).*(?:%3e|>))"  # Leopard Mail Message Links
-        ]
-
-        # Compile Regex into single pattern
-        pat = re.compile('|'.join(re_list))
-
-        for mo in re.finditer(pat, t.get('1.0', 'end')):
-            # Any Match in Group 0 is a Note Link
-            if mo.groups()[0] is not None:
-                link = mo.groups()[0]
-                ul = 0
-            else:
-                link = list(filter(None, mo.groups()))[0]
-                ul = int(self.config.underline_urls)
+    def activate_markdown_highlighting(self):
+        self._match_all(self.markdown_highlighter)
 
-            # Create a new Tkinter Tag
-            tag = 'web-%d' % (len(self.text_tags_links), )
-            t.tag_config(tag,
-                         foreground=self.config.colors.url,
-                         selectbackground=self.config.colors.url_selection_background,
-                         underline=ul)
+    def _highlighters(self):
+        """ Return (highlighter, tags) of each highlighter, where tags are the tags of its spans. """
+        return [(self.link_highlighter, ('note-link', 'web-link')), (self.search_highlighter, ('search', )),
+                (self.markdown_highlighter, ('md-bold', ))]
 
-            # Hovering over link changes cursor to hand
-            t.tag_bind(tag, '<Enter>', lambda e: t.config(cursor="hand2"))
-            t.tag_bind(tag, '<Leave>', lambda e: t.config(cursor=""))
+    def _match_all(self, highlighter: highlighting.PatternHighlighter, content=None):
+        """ Match the whole text, which is content if it is not the current text, and show the highlights.
 
-            # Clicking link calls link handler method
-            t.tag_bind(tag, '<Button-1>', lambda e, link=link: self.handler_click_link(link))
+        Large texts are matched on the match worker instead.  The spans are updated around edits until the matches
+        of the current text arrive.
+        """
+        t = self.text_note
+        if content is None:
+            content = t.content
+        if len(content) < self.BACKGROUND_MATCH_SIZE:
+            self._show_highlights(highlighter, highlighter.highlight(content), dict(self._highlighters())[highlighter])
+        elif highlighter not in self.pending_matches:
+            self.pending_matches.add(highlighter)
+            self.match_worker.submit(highlighting.MatchJob(highlighter, t.content, t.revision))
+
+    def _update_highlights(self, highlighter: highlighting.PatternHighlighter, tags, content, edit):
+        """ Update the highlights after edit, which gave content. """
+        if highlighter in self.pending_matches:
+            # The spans are brought up to date when the matches arrive.  Until then the old tags follow the edit.
+            highlighter.clear()
+        elif len(content) >= self.BACKGROUND_MATCH_SIZE and highlighter.needs_full_pass(content, edit):
+            # The old spans do not follow the edit, but their tags do.  They are shown until the matches arrive.
+            highlighter.clear()
+            self._match_all(highlighter, content)
+        else:
+            self._show_highlights(highlighter, highlighter.update(content, edit), tags)
+
+    def observer_matches_found(self, view, evt_type, evt: events.MatchesFoundEvent):
+        highlighter = evt.job.highlighter
+        self.pending_matches.discard(highlighter)
+        edits = [(edit, content) for revision, edit, content in self.match_edits if revision > evt.job.revision]
+        if not self.pending_matches:
+            self.match_edits = []
+        tags = dict(self._highlighters()).get(highlighter)
+        if tags is None:
+            # The search pattern has changed.  _set_search_pattern() removed the highlights already.
+            return
 
-            # record the tag name so we can delete it later
-            self.text_tags_links.append(tag)
+        if any(
+                len(content) >= self.BACKGROUND_MATCH_SIZE and highlighter.needs_full_pass(content, edit)
+                for edit, content in edits):
+            # The text was changed too much in the meantime.  Match it again.
+            self._match_all(highlighter)
+            return
+        # Replay the edits that were made in the meantime on the matches.
+        highlighter.highlight(evt.job.content, evt.matches)
+        for edit, content in edits:
+            highlighter.update(content, edit)
+        self._show_highlights(highlighter, highlighting.Change(0, len(self.text_note.content), [], []), tags)
 
-            # mo.start(), mo.end() or mo.span() in one go
-            t.tag_add(tag, '1.0+%dc' % (mo.start(), ), '1.0+%dc' % (mo.end(), ))
+    def _show_highlights(self, highlighter: highlighting.PatternHighlighter, change: highlighting.Change, tags):
+        """ Apply the change of highlighter to the tags of the note.
 
-    def activate_markdown_highlighting(self):
+        tags are all tags of the spans of highlighter.  They are set again from change.start to change.end, but only
+        in the highlight window.  Spans at the edges of the window are tagged up to them.
+        """
         t = self.text_note
-        content = t.get('1.0', 'end')
+        start, end = change.start, change.end
+        if self.highlight_window is not None:
+            start, end = max(start, self.highlight_window[0]), min(end, self.highlight_window[1])
+        if start >= end:
+            return
+
+        for tag in tags:
+            t.tag_remove(tag, t.offset_index(start), t.offset_index(end))
+        for span_start, span_end, value in highlighter.spans(start, end):
+            t.tag_add(value, t.offset_index(max(span_start, start)), t.offset_index(min(span_end, end)))
+
+    def _show_all_highlights(self, start, end):
+        """ Tag the spans of all highlighters from start to end. """
+        for highlighter, tags in self._highlighters():
+            self._show_highlights(highlighter, highlighting.Change(start, end, [], []), tags)
+
+    def reset_highlight_window(self, size):
+        """ Show the highlights of a new text of size characters in full, or only around the visible lines if it is
+        larger than lazy_highlight_size. """
+        lazy_size = self.config.lazy_highlight_size
+        self.highlight_window = (0, 0) if 0 < lazy_size < size else None
+
+    def _move_highlight_window(self, edit: highlighting.Edit):
+        """ Move the highlight window with the text after edit. """
+        if self.highlight_window is None:
+            return
 
-        # we have multiple tags with the same name, e.g. md-bold
-        # this will remove all of them.
-        t.tag_remove('md-bold', '1.0', 'end')
+        def move(pos, inside):
+            if pos <= edit.start:
+                return pos
+            if pos >= edit.start + edit.removed:
+                return pos + len(edit.inserted) - edit.removed
+            return inside
 
-        # first just use our standard regular expression for finding the first
-        # non whitespace line, wherever it is:
-        mo = utils.note_title_re.match(content)
-        if mo:
-            t.tag_add('md-bold', '1.0+{0}c'.format(mo.start()), '1.0+{0}c'.format(mo.end()))
+        start, end = self.highlight_window
+        self.highlight_window = (move(start, edit.start), move(end, edit.start + len(edit.inserted)))
 
-        # then do headings
-        pat = re.compile(r"^#.*$", re.MULTILINE)
+    def handler_text_yscroll(self):
+        """ Extend the highlight window to the visible lines, plus HIGHLIGHT_MARGIN lines above and below. """
+        if self.highlight_window is None:
+            return
+        t = self.text_note
+        window_start, window_end = self.highlight_window
+        bottom = '@0,%d' % (t.winfo_height(), )
+        if window_start <= t.get_offset('@0,0 linestart') and t.get_offset(bottom + ' lineend') <= window_end:
+            return
 
-        for mo in pat.finditer(content):
-            # mo.start(), mo.end() or mo.span() in one go
-            t.tag_add('md-bold', '1.0+{0}c'.format(mo.start()), '1.0+{0}c'.format(mo.end()))
+        start = t.get_offset('@0,0 -%d lines linestart' % (self.HIGHLIGHT_MARGIN, ))
+        end = t.get_offset('%s +%d lines lineend' % (bottom, self.HIGHLIGHT_MARGIN))
+        if end < window_start or window_end < start:
+            # Far away from the window.  Start a new one, instead of highlighting everything in between.
+            for _, tags in self._highlighters():
+                for tag in tags:
+                    t.tag_remove(tag, t.offset_index(window_start), t.offset_index(window_end))
+            self.highlight_window = (start, end)
+            self._show_all_highlights(start, end)
+        else:
+            self.highlight_window = (min(start, window_start), max(end, window_end))
+            if start < window_start:
+                self._show_all_highlights(start, window_start)
+            if window_end < end:
+                self._show_all_highlights(window_end, end)
 
     def handler_control_backspace(self, evt):
         # TODO: Logic is too complex. add test cases
@@ -1959,12 +2570,24 @@ class View(utils.SubjectMixin):
 
     def handler_text_change(self, evt):
         self.notify_observers('change:text', None)
-        # FIXME: consider having this called from the housekeeping
-        # handler, so that the poor regexp doesn't have to do every
-        # single keystroke.
-        self.activate_links()
-        self.activate_search_string_highlights()
-        self.activate_markdown_highlighting()
+        # Only the text around each edit is highlighted again.
+        t = self.text_note
+        pat = self.notes_list_model.match_regexp if self.notes_list.selected_idx >= 0 else None
+        search_changed = pat is not self.search_highlighter.pattern
+        if search_changed:
+            self._set_search_pattern(pat)
+        edits = t.take_edits()
+        revision = t.revision - len(edits)
+        for edit, content in edits:
+            revision += 1
+            if self.pending_matches:
+                self.match_edits.append((revision, edit, content))
+            self._move_highlight_window(edit)
+            for highlighter, tags in self._highlighters():
+                if not (search_changed and highlighter is self.search_highlighter):
+                    self._update_highlights(highlighter, tags, content, edit)
+        if search_changed:
+            self._match_all(self.search_highlighter)
 
     def handler_text_copy(self, event):
         first = self.text_note.index('sel.first')
@@ -2007,6 +2630,8 @@ class View(utils.SubjectMixin):
         if evt_type == 'set:list':
             # re-render!
             self.set_notes(notes_list_model.list)
+        elif evt_type == 'extend:list':
+            self.append_notes(evt)
 
     def main_loop(self):
         self.root.mainloop()
@@ -2067,6 +2692,7 @@ class View(utils.SubjectMixin):
 
         if note is not None:
             if not content_unchanged:
+                self.reset_highlight_window(len(note['content']))
                 self.text_note.insert(tk.END, note['content'])
 
             # default to an empty array for tags
@@ -2099,39 +2725,39 @@ class View(utils.SubjectMixin):
     def set_notes(self, notes: typing.List['notes_db.NoteInfo']):
         # this method is called by View.observer_notes_list()
 
-        # clear the notes list
-        self.notes_list.clear()
-        taglist = []
-        titlelist = []
-
-        for o in notes:
-            tags = o.note.get('tags')
-            if tags:
-                taglist += tags
-
-            nc = NoteConfig(tagfound=o.tagfound, match_regexp=self.notes_list_model.match_regexp)
-            self.notes_list.append(o.note, nc)
-            # find first non-empty line, and append to titlelist.
-            for title in o.note["content"].splitlines():
-                slim_title = title.strip()
-                if slim_title:
-                    titlelist.append(slim_title)
-                    break
-
-        titlelist = list(set(titlelist))
-        self.text_note.set_completion_list(titlelist)
-
-        if self.taglist is None:
-            # first time we get called, so we need to initialise
-            self.taglist = list(set(taglist))
-            self.search_entry.set_completion_list(self.taglist)
+        # only the rows that have changed are rendered again.
+        match_regexp = self.notes_list_model.match_regexp
+        self.notes_list.set_rows([(o.key, o.note,
+                                   NoteConfig(tagfound=o.tagfound,
+                                              match_regexp=match_regexp,
+                                              match_offset=o.match_offset)) for o in notes])
+
+    def append_notes(self, notes: typing.List['notes_db.NoteInfo']):
+        match_regexp = self.notes_list_model.match_regexp
+        self.notes_list.extend([(o.key, o.note,
+                                 NoteConfig(tagfound=o.tagfound, match_regexp=match_regexp,
+                                            match_offset=o.match_offset)) for o in notes])
+
+    def update_note_row(self, idx):
+        """ Render the idx'th row of the notes list again, if its note looks different now. """
+        o = self.notes_list_model.list[idx]
+        self.notes_list.update_row(
+            idx, o.key, o.note,
+            NoteConfig(tagfound=o.tagfound,
+                       match_regexp=self.notes_list_model.match_regexp,
+                       match_offset=o.match_offset))
+
+    def set_tag_catalog(self, tag_catalog: 'notes_db.NotesDB'):
+        """ Use tags of tag_catalog for completion and the tag list.
+
+        Tags are looked up on demand, so the view does not keep its own copy of them.
+        """
+        self.tag_catalog = tag_catalog
+        self.search_entry.set_completion_func(tag_catalog.complete_tag)
 
-        else:
-            # only set completion list if the new combined taglist is larger.
-            taglist = list(set(self.taglist + taglist))
-            if len(taglist) > len(self.taglist):
-                self.taglist = taglist
-                self.search_entry.set_completion_list(self.taglist)
+    def set_title_catalog(self, title_catalog: 'notes_db.NotesDB'):
+        """ Complete [[note links]] with titles of all notes in title_catalog. """
+        self.text_note.set_completion_func(title_catalog.complete_title)
 
     def show_error(self, title, msg):
         tkMessageBox.showerror(title, msg)
@@ -35,6 +35,8 @@ setup(
         'simplenote>=2.1.4',
     ],
     extras_require={
+        # Optional.  It speeds up searching in large databases.
+        'numpy': ['numpy'],
         # development and test requirements.
         'dev': [
             'mock',
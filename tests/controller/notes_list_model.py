@@ -0,0 +1,31 @@
+import unittest
+
+from nvpy.nvpy import NotesListModel
+from nvpy.notes_db import NoteInfo
+
+
+def note_infos(*keys):
+    return [NoteInfo(key=k, note={'content': k}, tagfound=0) for k in keys]
+
+
+class NotesListModelIndex(unittest.TestCase):
+
+    def test_get_idx(self):
+        model = NotesListModel()
+        self.assertEqual(model.get_idx('a'), -1)
+
+        model.set_list(note_infos('a', 'b', 'c'))
+        self.assertEqual([model.get_idx(k) for k in 'abcd'], [0, 1, 2, -1])
+        self.assertEqual(model.get('b').key, 'b')
+        with self.assertRaises(KeyError):
+            model.get('d')
+
+        model.extend_list(note_infos('d', 'a'))
+        self.assertEqual([model.get_idx(k) for k in 'abcd'], [0, 1, 2, 3])
+
+        model.set_list(note_infos('c', 'd'))
+        self.assertEqual([model.get_idx(k) for k in 'abcd'], [-1, -1, 0, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,4 @@
+import copy
 import os
 import shutil
 from pathlib import Path
@@ -31,6 +32,17 @@ class DBMixin:
     def _db(self, notes_as_txt=False, simplenote_sync=False):
         return NotesDB(self._mock_config(notes_as_txt, simplenote_sync))
 
+    def _db_with(self, notes):
+        """ Return a NotesDB holding a copy of notes. """
+        db = self._db()
+        db.notes = copy.deepcopy(notes)
+        return db
+
+    def _filter_keys(self, db, search_string):
+        """ Return local keys of the notes that filter_notes() finds for search_string, in display order. """
+        filtered_notes, _, _ = db.filter_notes(search_string)
+        return [o.key for o in filtered_notes]
+
     def _json_files(self):
         path = Path(self._mock_config().db_path)
         yield from (f.name for f in path.iterdir())
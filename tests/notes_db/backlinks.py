@@ -0,0 +1,66 @@
+import unittest
+from unittest.mock import patch
+
+from ._mixin import DBMixin
+
+notes = {
+    'a': {
+        'modifydate': 1,
+        'tags': [],
+        'content': 'Projects\nsee [[Ideas]] and [[ Todo ]]',
+    },
+    'b': {
+        'modifydate': 2,
+        'content': 'Ideas\nback to [[Projects]]',
+    },
+    'c': {
+        'modifydate': 3,
+        'content': 'Todo\n[[Ideas]] [[Ideas]] [[]]',
+    },
+    'd': {
+        'modifydate': 4,
+        'content': 'Old\n[[Ideas]]',
+        'deleted': 1,
+    },
+}
+
+
+class Backlinks(DBMixin, unittest.TestCase):
+
+    def test_backlinks(self):
+        db = self._db_with(notes)
+        self.assertEqual(db.get_backlinks('b'), ['c', 'a'])
+        self.assertEqual(db.get_backlinks('a'), ['b'])
+        self.assertEqual(db.get_backlinks('c'), ['a'])
+
+    def test_graph_follows_changes(self):
+        db = self._db_with(notes)
+        db.set_note_content('c', 'Todo\nnothing')
+        self.assertEqual(db.get_backlinks('b'), ['a'])
+
+        # renaming the target keeps links pointing to the old title
+        db.set_note_content('b', 'Ideas 2\nback to [[Projects]]')
+        self.assertEqual(db.get_backlinks('b'), [])
+
+        db.delete_note('b')
+        self.assertEqual(db.get_backlinks('a'), [])
+
+    def test_links_are_parsed_once_per_content_change(self):
+        db = self._db_with(notes)
+        db.get_backlinks('b')
+        with patch.object(db._link_graph, 'parse_links', return_value=[]) as parse_links:
+            db.set_note_pinned('a', 1)
+            db.add_note_tags('a', 'foo')
+            db.get_backlinks('b')
+            self.assertFalse(parse_links.called)
+
+            # links are parsed when backlinks are looked up, not on every change.
+            db.set_note_content('a', 'Projects\nchanged')
+            db.set_note_content('a', 'Projects\nchanged again')
+            self.assertFalse(parse_links.called)
+            self.assertEqual(db.get_backlinks('b'), ['c'])
+            self.assertEqual(parse_links.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
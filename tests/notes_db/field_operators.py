@@ -0,0 +1,122 @@
+import datetime
+import unittest
+from unittest.mock import patch
+
+from nvpy import indexes
+from ._mixin import DBMixin
+
+
+def _stamp(date):
+    return datetime.datetime.strptime(date, '%Y-%m-%d').timestamp()
+
+
+NOW = _stamp('2024-03-01') + 12 * 3600
+
+notes = {
+    'old': {
+        'modifydate': _stamp('2023-12-31'),
+        'createdate': _stamp('2023-06-01'),
+        'tags': [],
+        'systemtags': ['markdown'],
+        'content': 'old note',
+    },
+    'new': {
+        'modifydate': _stamp('2024-02-20'),
+        'createdate': _stamp('2024-02-10'),
+        'tags': ['foo'],
+        'systemtags': ['pinned'],
+        'content': 'new note',
+    },
+    'newyear': {
+        'modifydate': _stamp('2024-01-01') + 3600,
+        'createdate': _stamp('2023-01-01'),
+        'tags': [],
+        'content': 'new year note',
+    },
+    'deleted': {
+        'modifydate': _stamp('2024-02-20'),
+        'createdate': _stamp('2024-02-10'),
+        'tags': [],
+        'deleted': 1,
+        'content': 'deleted note',
+    },
+}
+
+
+class FieldOperators(DBMixin, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        patcher = patch('time.time', side_effect=lambda: NOW)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_absolute_dates(self):
+        db = self._db_with(notes)
+        self.assertEqual(self._filter_keys(db, 'modified:>2024-01-01'), ['new'])
+        self.assertEqual(self._filter_keys(db, 'modified:>=2024-01-01'), ['new', 'newyear'])
+        self.assertEqual(self._filter_keys(db, 'modified:2024-01-01'), ['newyear'])
+        self.assertEqual(self._filter_keys(db, 'modified:<2024-01-01'), ['old'])
+        self.assertEqual(self._filter_keys(db, 'modified:<=2024-01-01'), ['newyear', 'old'])
+
+    def test_relative_dates(self):
+        db = self._db_with(notes)
+        self.assertEqual(self._filter_keys(db, 'created:<30d'), ['new'])
+        self.assertEqual(self._filter_keys(db, 'created:>30d'), ['newyear', 'old'])
+        self.assertEqual(self._filter_keys(db, 'created:<40w'), ['new', 'old'])
+
+    def test_system_tags(self):
+        db = self._db_with(notes)
+        self.assertEqual(self._filter_keys(db, 'pinned:yes'), ['new'])
+        self.assertEqual(self._filter_keys(db, 'pinned:no'), ['newyear', 'old'])
+        self.assertEqual(self._filter_keys(db, 'markdown:yes'), ['old'])
+
+    def test_combined_with_words_and_tags(self):
+        db = self._db_with(notes)
+        self.assertEqual(self._filter_keys(db, 'new modified:>=2024-01-01 pinned:no'), ['newyear'])
+        self.assertEqual(self._filter_keys(db, 'modified:>2023-01-01 created:<1w'), [])
+        filtered_notes, _, _ = db.filter_notes_gstyle('tag:foo modified:>2024-01-01')
+        self.assertEqual([(o.key, o.tagfound) for o in filtered_notes], [('new', 1)])
+
+    def test_invalid_operator_is_searched_as_word(self):
+        db = self._db_with(notes)
+        db.set_note_content('old', 'old note pinned:maybe')
+        self.assertEqual(self._filter_keys(db, 'pinned:maybe'), ['old'])
+        self.assertEqual(self._filter_keys(db, 'modified:>2024-13-01'), [])
+
+    def test_indexes_follow_changes(self):
+        db = self._db_with(notes)
+        self.assertEqual(self._filter_keys(db, 'pinned:yes'), ['new'])
+        db.set_note_pinned('old', 1)
+        self.assertEqual(self._filter_keys(db, 'pinned:yes'), ['old', 'new'])
+
+        db.set_note_content('newyear', 'edited note')
+        self.assertEqual(self._filter_keys(db, 'modified:2024-03-01'), ['old', 'newyear'])
+        self.assertEqual(self._filter_keys(db, 'modified:2024-01-01'), [])
+
+    def test_relative_date_is_not_cached(self):
+        db = self._db_with(notes)
+        self.assertEqual(self._filter_keys(db, 'created:<30d'), ['new'])
+        with patch('time.time', side_effect=lambda: NOW + 30 * 86400):
+            self.assertEqual(self._filter_keys(db, 'created:<30d'), [])
+
+
+class DateIndex(unittest.TestCase):
+
+    def test_range(self):
+        index = indexes.DateIndex('modifydate')
+        for key, stamp in [('a', 3), ('b', 1), ('c', 2), ('d', 2)]:
+            index.update(key, {'modifydate': stamp})
+        index.update('e', {})
+        self.assertEqual(len(index), 4)
+        self.assertEqual(index.keys(indexes.DateRange(lo=2, hi=3)), ['c', 'd'])
+        self.assertEqual(index.keys(indexes.DateRange(lo=2, hi=3, include_lo=False, include_hi=True)), ['a'])
+        self.assertEqual(index.count(indexes.DateRange(hi=2)), 1)
+
+        index.update('c', {'modifydate': 4})
+        index.update('a', None)
+        self.assertEqual(index.keys(indexes.DateRange()), ['b', 'd', 'c'])
+
+
+if __name__ == '__main__':
+    unittest.main()
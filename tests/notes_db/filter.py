@@ -82,6 +82,22 @@ class FilterGstyle(DBMixin, unittest.TestCase):
         self.assertEqual(match_regexp, re.compile(r'note\ 1|active', re.I))  # Should ignore for tag pattern
         self.assertEqual(active_notes, 3)
 
+    def test_match_offset(self):
+        db = self._db()
+        db.notes = copy.deepcopy(notes)
+        filtered_notes, _, _ = db.filter_notes_gstyle('note 1 active')
+        self.assertEqual(filtered_notes[0].match_offset, notes['1']['content'].index('active'))
+        filtered_notes, _, _ = db.filter_notes_gstyle('tag:foo')
+        self.assertEqual(filtered_notes[0].match_offset, None)
+
+    def test_match_offset_after_characters_that_lower_lengthens(self):
+        db = self._db()
+        db.config.case_sensitive = 0
+        content = 'İstanbul trip\nvisit the Bazaar'
+        db.notes = {'1': {'content': content, 'modifydate': 1}}
+        filtered_notes, _, _ = db.filter_notes_gstyle('bazaar')
+        self.assertEqual(filtered_notes[0].match_offset, content.index('Bazaar'))
+
 
 class FilterRegexp(DBMixin, unittest.TestCase):
 
@@ -112,3 +128,9 @@ class FilterRegexp(DBMixin, unittest.TestCase):
         self.assertEqual(len(filtered_notes), 3)
         self.assertEqual(match_regexp, re.compile('foo| [12]', re.M))
         self.assertEqual(active_notes, 3)
+
+    def test_match_offset(self):
+        db = self._db()
+        db.notes = copy.deepcopy(notes)
+        filtered_notes, _, _ = db.filter_notes_regexp('note [12]')
+        self.assertEqual(sorted(o.match_offset for o in filtered_notes), [notes['1']['content'].index('note 1')] * 2)
@@ -0,0 +1,81 @@
+import unittest
+from unittest.mock import patch
+
+from nvpy import indexes
+from nvpy import nvpy
+from nvpy.notes_db import Note
+from ._mixin import DBMixin
+
+notes = {
+    'saved': {
+        'modifydate': 10,
+        'createdate': 1,
+        'savedate': 13,
+        'syncdate': 12,
+        'content': 'saved and synced',
+    },
+    'modified': {
+        'modifydate': 20,
+        'createdate': 3,
+        'savedate': 11,
+        'syncdate': 12,
+        'content': 'modified',
+        'systemtags': ['pinned'],
+    },
+    'synced': {
+        'modifydate': 10,
+        'createdate': 2,
+        'savedate': 11,
+        'syncdate': 15,
+        'content': 'synced after save',
+    },
+    'deleted': {
+        'modifydate': 30,
+        'createdate': 4,
+        'savedate': 11,
+        'syncdate': 12,
+        'content': 'deleted',
+        'deleted': 1,
+    },
+}
+
+
+@unittest.skipUnless(indexes.HAVE_NUMPY, 'NumPy is not installed')
+class MetadataStore(DBMixin, unittest.TestCase):
+
+    def _need_save(self, db):
+        return sorted(k for k, n in db.notes.items() if Note(n).need_save)
+
+    def test_need_save_and_sync(self):
+        db = self._db_with(notes)
+        self.assertEqual(sorted(db._metadata.need_save()), ['deleted', 'modified', 'synced'])
+        self.assertEqual(sorted(db._metadata.need_save()), self._need_save(db))
+        self.assertEqual(sorted(db._metadata.need_sync(now=40, idle=3)), ['deleted', 'modified'])
+        self.assertEqual(sorted(db._metadata.need_sync(now=25, idle=3)), ['modified'])
+
+        with patch('time.time', side_effect=lambda: 50):
+            db.set_note_content('saved', 'changed')
+        self.assertEqual(sorted(db._metadata.need_save()), self._need_save(db))
+        self.assertEqual(sorted(db._metadata.need_sync(now=60, idle=3)), ['deleted', 'modified', 'saved'])
+
+        db.notes = {}
+        self.assertEqual(db._metadata.need_save(), [])
+
+    def test_keys_by_date(self):
+        db = self._db_with(notes)
+        self.assertEqual(db._metadata.keys_by_date('modifydate'), ['modified', 'saved', 'synced'])
+        self.assertEqual(db._metadata.keys_by_date('createdate'), ['modified', 'synced', 'saved'])
+        db.set_note_pinned('saved', 1)
+        self.assertEqual(db._metadata.keys_by_date('createdate', pinned_first=True), ['modified', 'saved', 'synced'])
+
+    def test_sorted_order_is_built_from_dates(self):
+        db = self._db_with(notes)
+        db.config.sort_mode = nvpy.SortMode.CREATION_DATE
+        with patch.object(db._metadata, 'keys_by_date', wraps=db._metadata.keys_by_date) as keys_by_date:
+            filtered_notes, _, _ = db.filter_notes()
+        self.assertEqual(keys_by_date.call_count, 1)
+        self.assertEqual([o.key for o in filtered_notes], ['modified', 'synced', 'saved'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import copy
+import unittest
+from unittest.mock import patch
+
+from ._mixin import DBMixin
+
+notes = {
+    '1': {
+        'modifydate': 1111111222,
+        'tags': [],
+        'createdate': 1111111111,
+        'syncdate': 0,
+        'content': 'active note 1',
+        'savedate': 0,
+    },
+    '2': {
+        'modifydate': 1111111333,
+        'tags': ['foo'],
+        'createdate': 1111111111,
+        'syncdate': 0,
+        'content': 'active note 2',
+        'savedate': 0,
+    },
+}
+
+
+class QueryCache(DBMixin, unittest.TestCase):
+
+    def test_unchanged_database_returns_cached_result(self):
+        db = self._db_with(notes)
+        with patch.object(db, '_compile_query', wraps=db._compile_query) as compile_query:
+            self.assertEqual(self._filter_keys(db, 'note'), ['2', '1'])
+            self.assertEqual(compile_query.call_count, 1)
+            self.assertEqual(self._filter_keys(db, 'note'), ['2', '1'])
+            self.assertEqual(compile_query.call_count, 1)
+
+            # a changed note bypasses the cache.
+            db.set_note_content('1', 'active note 1 changed')
+            self.assertEqual(self._filter_keys(db, 'note'), ['1', '2'])
+            self.assertEqual(compile_query.call_count, 2)
+
+    def test_cached_list_is_not_shared_with_caller(self):
+        db = self._db_with(notes)
+        filtered_notes, _, _ = db.filter_notes('note')
+        filtered_notes.clear()
+        self.assertEqual(self._filter_keys(db, 'note'), ['2', '1'])
+
+    def test_mutators_invalidate_cached_result(self):
+        db = self._db_with(notes)
+        self.assertEqual(self._filter_keys(db, 'bar'), [])
+
+        db.set_note_content('1', 'active note 1 bar')
+        self.assertEqual(self._filter_keys(db, 'bar'), ['1'])
+
+        db.add_note_tags('1', 'baz')
+        self.assertEqual(self._filter_keys(db, 't:baz'), ['1'])
+        db.delete_note_tag('1', 'baz')
+        self.assertEqual(self._filter_keys(db, 't:baz'), [])
+
+        db.delete_note('1')
+        self.assertEqual(self._filter_keys(db, 'bar'), [])
+
+        key = db.create_note('new bar')
+        self.assertEqual(self._filter_keys(db, 'bar'), [key])
+
+    def test_replacing_notes_invalidates_cached_result(self):
+        db = self._db_with(notes)
+        self.assertEqual(self._filter_keys(db, 'note'), ['2', '1'])
+        db.notes = {}
+        self.assertEqual(self._filter_keys(db, 'note'), [])
+
+    def test_config_is_part_of_cache_key(self):
+        db = self._db_with(notes)
+        db.config.case_sensitive = 1
+        self.assertEqual(self._filter_keys(db, 'NOTE'), [])
+        db.config.case_sensitive = 0
+        self.assertEqual(self._filter_keys(db, 'NOTE'), ['2', '1'])
+
+    def test_least_recently_used_entry_is_evicted(self):
+        db = self._db_with(notes)
+        db.QUERY_CACHE_SIZE = 2
+        db.filter_notes('1')
+        db.filter_notes('2')
+        db.filter_notes('1')
+        db.filter_notes('note')
+        self.assertEqual([k[0] for k in db._query_cache], ['1', 'note'])
+
+
+class NoteGenerations(DBMixin, unittest.TestCase):
+
+    def test_only_search_relevant_changes_bump_note_generation(self):
+        db = self._db_with(notes)
+        generation = db.get_generation()
+        self.assertLessEqual(db.get_note_generation('1'), generation)
+
+        db.notes['1']['savedate'] = 1111111444
+        db._on_note_dates_changed('1')
+        self.assertEqual(db.get_generation(), generation)
+        self.assertLessEqual(db.get_note_generation('1'), generation)
+
+        db.set_note_content('1', 'active note 1 bar')
+        self.assertGreater(db.get_note_generation('1'), generation)
+        self.assertLessEqual(db.get_note_generation('2'), generation)
+        self.assertEqual(db.get_note_generation('1'), db.get_generation())
+
+        db.notes = copy.deepcopy(notes)
+        self.assertEqual(db.get_note_generation('1'), db.get_generation())
+        self.assertEqual(db.get_note_generation('2'), db.get_generation())
+
+
+if __name__ == '__main__':
+    unittest.main()
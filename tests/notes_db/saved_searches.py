@@ -0,0 +1,106 @@
+import os
+import unittest
+from unittest.mock import patch
+
+from nvpy.nvpy import SavedSearch
+from ._mixin import DBMixin
+
+notes = {
+    '1': {
+        'modifydate': 1111111222,
+        'tags': [],
+        'createdate': 1111111111,
+        'syncdate': 0,
+        'content': 'active note 1',
+        'savedate': 0,
+    },
+    '2': {
+        'modifydate': 1111111333,
+        'tags': ['foo'],
+        'createdate': 1111111111,
+        'syncdate': 0,
+        'content': 'active note 2',
+        'savedate': 0,
+    },
+}
+
+
+class SavedSearches(DBMixin, unittest.TestCase):
+
+    def _db_with_notes(self):
+        db = self._db_with(notes)
+        db.add_saved_search('Foo', 'tag:foo')
+        return db
+
+    def _saved_search_keys(self, db, name):
+        filtered_notes, _, _ = db.filter_saved_search(name)
+        return [o.key for o in filtered_notes]
+
+    def test_filter_saved_search(self):
+        db = self._db_with_notes()
+        self.assertEqual(self._saved_search_keys(db, 'Foo'), ['2'])
+        filtered_notes, match_regexp, active_notes = db.filter_saved_search('Foo')
+        self.assertEqual(filtered_notes[0].tagfound, 1)
+        self.assertIsNone(match_regexp)
+        self.assertEqual(active_notes, 2)
+
+    def test_only_changed_note_is_evaluated(self):
+        db = self._db_with_notes()
+        self.assertEqual(self._saved_search_keys(db, 'Foo'), ['2'])
+        with patch.object(db, '_compile_query', wraps=db._compile_query) as compile_query:
+            db.add_note_tags('1', 'foo')
+            self.assertEqual(self._saved_search_keys(db, 'Foo'), ['1', '2'])
+            db.delete_note('2')
+            self.assertEqual(self._saved_search_keys(db, 'Foo'), ['1'])
+            key = db.create_note('new note')
+            db.add_note_tags(key, 'foo')
+            self.assertEqual(self._saved_search_keys(db, 'Foo'), [key, '1'])
+        self.assertFalse(compile_query.called)
+
+    def test_changed_notes_are_evaluated_when_view_is_read(self):
+        db = self._db_with({str(i): {'modifydate': i, 'tags': [], 'content': 'note %d' % i} for i in range(10)})
+        db.add_saved_search('Notes', 'note')
+        self.assertEqual(len(self._saved_search_keys(db, 'Notes')), 10)
+        with patch.object(db, '_helper_gstyle_mswordmatch', wraps=db._helper_gstyle_mswordmatch) as mswordmatch:
+            db.set_note_content('3', 'changed')
+            db.set_note_content('3', 'changed again')
+            self.assertEqual(mswordmatch.call_count, 0)
+            self.assertEqual(self._saved_search_keys(db, 'Notes'), ['9', '8', '7', '6', '5', '4', '2', '1', '0'])
+            self.assertEqual(mswordmatch.call_count, 1)
+
+    def test_view_is_rebuilt_when_search_options_change(self):
+        db = self._db_with_notes()
+        db.add_saved_search('Upper', 'NOTE')
+        self.assertEqual(self._saved_search_keys(db, 'Upper'), [])
+        db.config.case_sensitive = 0
+        self.assertEqual(self._saved_search_keys(db, 'Upper'), ['2', '1'])
+
+    def test_view_is_rebuilt_when_notes_are_replaced(self):
+        db = self._db_with_notes()
+        self.assertEqual(self._saved_search_keys(db, 'Foo'), ['2'])
+        db.notes = {}
+        self.assertEqual(self._saved_search_keys(db, 'Foo'), [])
+
+    def test_add_and_remove(self):
+        db = self._db_with_notes()
+        db.add_saved_search('Bar', 'bar')
+        db.add_saved_search('Foo', 'tag:foo note')
+        self.assertEqual(db.get_saved_searches(), [
+            SavedSearch(name='Foo', query='tag:foo note'),
+            SavedSearch(name='Bar', query='bar'),
+        ])
+        db.remove_saved_search('Foo')
+        self.assertEqual(db.get_saved_searches(), [SavedSearch(name='Bar', query='bar')])
+
+    def test_config_round_trip(self):
+        db = self._db()
+        db.config.settings_file = os.path.join(self.BASE_DIR, 'nvpy_settings')
+        self.assertEqual(db.config.read_saved_searches(), [])
+
+        searches = [SavedSearch(name='Todo', query='tag:todo 100%'), SavedSearch(name='todo', query='"a b"')]
+        db.config.write_saved_searches(searches)
+        self.assertEqual(db.config.read_saved_searches(), searches)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+from unittest.mock import patch
+
+from nvpy import indexes
+from ._mixin import DBMixin
+
+notes = {
+    '1': {
+        'modifydate': 1111111222,
+        'tags': [],
+        'createdate': 1111111111,
+        'content': 'Shopping list\neggs, milk',
+    },
+    '2': {
+        'modifydate': 1111111333,
+        'tags': [],
+        'createdate': 1111111111,
+        'content': 'Meeting notes\nDiscuss the budget',
+    },
+    '3': {
+        'modifydate': 1111111444,
+        'tags': [],
+        'createdate': 1111111111,
+        'content': 'deleted budget',
+        'deleted': 1,
+    },
+}
+
+
+class SignaturePrefilter(DBMixin, unittest.TestCase):
+
+    def _assert_results(self, db):
+        self.assertEqual(self._filter_keys(db, 'budget'), ['2'])
+        self.assertEqual(self._filter_keys(db, 'milk eggs'), ['1'])
+        self.assertEqual(self._filter_keys(db, '"the budget" notes'), ['2'])
+        self.assertEqual(self._filter_keys(db, 'budget milk'), [])
+        # too short for the prefilter
+        self.assertEqual(self._filter_keys(db, 'e'), ['2', '1'])
+
+        db.set_note_content('1', 'Shopping list\nbudget')
+        self.assertEqual(self._filter_keys(db, 'budget'), ['1', '2'])
+        self.assertEqual(self._filter_keys(db, 'milk'), [])
+
+    @unittest.skipUnless(indexes.HAVE_NUMPY, 'NumPy is not installed')
+    def test_prefilter(self):
+        db = self._db_with(notes)
+        self.assertIsNotNone(db._signature_index)
+        self._assert_results(db)
+
+    @unittest.skipUnless(indexes.HAVE_NUMPY, 'NumPy is not installed')
+    def test_case_insensitive(self):
+        db = self._db_with(notes)
+        self.assertEqual(self._filter_keys(db, 'BUDGET'), [])
+        db.config.case_sensitive = 0
+        self.assertEqual(self._filter_keys(db, 'BUDGET'), ['2'])
+
+    @unittest.skipUnless(indexes.HAVE_NUMPY, 'NumPy is not installed')
+    def test_rejected_notes_are_not_checked(self):
+        db = self._db_with(notes)
+        with patch.object(db, '_helper_gstyle_mswordmatch', return_value=0) as mswordmatch:
+            self.assertEqual(self._filter_keys(db, 'budget'), ['2'])
+        self.assertEqual(mswordmatch.call_count, 1)
+
+    def test_fallback_without_numpy(self):
+        with patch.object(indexes, 'HAVE_NUMPY', False):
+            db = self._db_with(notes)
+        self.assertIsNone(db._signature_index)
+        self._assert_results(db)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+from unittest.mock import patch
+
+from nvpy import indexes
+from ._mixin import DBMixin
+
+TEXT = ('Meeting notes\nWe discussed the budget for next year and agreed to move the offsite to spring. '
+        'Action items: book the venue, collect travel requests, and send the agenda before the end of the month.')
+
+notes = {
+    'a': {
+        'modifydate': 1,
+        'content': TEXT,
+    },
+    'b': {
+        'modifydate': 2,
+        'content': TEXT.replace('spring', 'summer'),
+    },
+    'c': {
+        'modifydate': 3,
+        'content': 'Shopping list\neggs, milk, bread, butter and some cheese for the weekend',
+    },
+    'd': {
+        'modifydate': 4,
+        'content': TEXT,
+        'deleted': 1,
+    },
+    'e': {
+        'modifydate': 5,
+        'content': '',
+    },
+}
+
+
+class SimilarNotes(DBMixin, unittest.TestCase):
+
+    def test_find_similar_notes(self):
+        db = self._db_with(notes)
+        self.assertEqual(db.find_similar_notes(), [['b', 'a']])
+        self.assertEqual(db.find_similar_notes(threshold=1.0), [])
+
+    def test_index_follows_changes(self):
+        db = self._db_with(notes)
+        db.set_note_content('c', TEXT + ' Thanks!')
+        self.assertEqual(db.find_similar_notes(), [['c', 'b', 'a']])
+
+        db.delete_note('b')
+        db.set_note_content('c', 'Shopping list\neggs')
+        self.assertEqual(db.find_similar_notes(), [])
+
+    def test_signatures_are_computed_once_per_content_change(self):
+        db = self._db_with(notes)
+        db.find_similar_notes()
+        with patch.object(db._minhash_index, 'signature', return_value=None) as signature:
+            db.set_note_pinned('a', 1)
+            db.find_similar_notes()
+            self.assertFalse(signature.called)
+            db.set_note_content('a', 'Meeting notes\nchanged')
+            db.find_similar_notes()
+            self.assertEqual(signature.call_count, 1)
+
+
+class MinHashIndex(unittest.TestCase):
+
+    def test_signature_does_not_depend_on_numpy(self):
+        sig = indexes.MinHashIndex.signature(TEXT)
+        self.assertEqual(len(sig), indexes.MinHashIndex.NUM_PERM)
+        with patch.object(indexes, 'HAVE_NUMPY', False):
+            self.assertEqual(indexes.MinHashIndex.signature(TEXT), sig)
+        self.assertIsNone(indexes.MinHashIndex.signature(' ,. '))
+
+    def test_similarity(self):
+        sig1 = indexes.MinHashIndex.signature(TEXT)
+        sig2 = indexes.MinHashIndex.signature(TEXT.replace('spring', 'summer'))
+        sig3 = indexes.MinHashIndex.signature('something else entirely')
+        self.assertEqual(indexes.MinHashIndex.similarity(sig1, sig1), 1.0)
+        self.assertGreater(indexes.MinHashIndex.similarity(sig1, sig2), 0.8)
+        self.assertLess(indexes.MinHashIndex.similarity(sig1, sig3), 0.2)
+
+    def test_clusters_do_not_depend_on_bucket_members(self):
+        index = indexes.MinHashIndex()
+        # a and b agree on all rows of the first 4 bands and on 3 of 4 rows of the others; similarity 52/64.  c only
+        # shares the first 4 bands with them.
+        sig_a = tuple(range(64))
+        sig_b = tuple(1000 + i if i >= 16 and i % 4 == 3 else i for i in range(64))
+        sig_c = tuple(2000 + i if i >= 16 else i for i in range(64))
+        for key, sig in [('C', sig_c), ('B', sig_b), ('A', sig_a)]:
+            index._set_signature(key, sig)
+        self.assertEqual([sorted(c) for c in index.clusters({}, 0.8)], [['A', 'B']])
+
+
+if __name__ == '__main__':
+    unittest.main()
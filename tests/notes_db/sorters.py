@@ -1,9 +1,11 @@
 import unittest
 
+from unittest.mock import patch
+
+from nvpy import indexes
 from nvpy import notes_db
 from nvpy import nvpy
-
-Nullable = notes_db.AlphaNumSorter.Nullable
+from ._mixin import DBMixin
 
 
 def create_note(title, createdate=1, modifydate=2) -> notes_db.NoteInfo:
@@ -18,74 +20,19 @@ def create_note(title, createdate=1, modifydate=2) -> notes_db.NoteInfo:
     )
 
 
-class AlphaNumSorter_Nullable(unittest.TestCase):
-
-    def test_nullable_can_compare_with_int_and_int(self):
-        a = Nullable(2)
-        b = Nullable(1)
-        c = Nullable(2)
-        self.assertFalse(a < b)
-        self.assertFalse(a == b)
-        self.assertTrue(a == c)
-        self.assertTrue(a > b)
-
-    def test_nullable_can_compare_with_int_and_none(self):
-        a = Nullable(2)
-        b = Nullable(None)
-        self.assertFalse(a < b)
-        self.assertFalse(a == b)
-        self.assertTrue(a > b)
-
-    def test_nullable_can_compare_with_none_and_int(self):
-        a = Nullable(None)
-        b = Nullable(2)
-        self.assertTrue(a < b)
-        self.assertFalse(a == b)
-        self.assertFalse(a > b)
-
-    def test_nullable_can_reprable(self):
-        a = Nullable(None)
-        b = Nullable(1)
-        c = Nullable('c')
-        self.assertEqual(repr(a), 'Nullable(None)')
-        self.assertEqual(repr(b), 'Nullable(1)')
-        self.assertEqual(repr(c), "Nullable('c')")
-
-
 class AlphaNumSorter(unittest.TestCase):
 
     def make_sort_key(self, title):
         return notes_db.AlphaNumSorter()(create_note(title))
 
     def test_sort_keys(self):
-        Element = notes_db.AlphaNumSorter.Element
-
-        self.assertTupleEqual(
-            self.make_sort_key('foo'),
-            (Element(digits=Nullable(None), letters=Nullable('foo'), other=Nullable(None)), ),
-        )
-        self.assertTupleEqual(
-            self.make_sort_key('123'),
-            (Element(digits=Nullable(123), letters=Nullable(None), other=Nullable(None)), ),
-        )
-        self.assertTupleEqual(
-            self.make_sort_key('123-foo'),
-            (
-                Element(digits=Nullable(123), letters=Nullable(None), other=Nullable(None)),
-                Element(digits=Nullable(None), letters=Nullable(None), other=Nullable('-')),
-                Element(digits=Nullable(None), letters=Nullable('foo'), other=Nullable(None)),
-            ),
-        )
-        self.assertTupleEqual(
-            self.make_sort_key('foo#123@bar'),
-            (
-                Element(digits=Nullable(None), letters=Nullable('foo'), other=Nullable(None)),
-                Element(digits=Nullable(None), letters=Nullable(None), other=Nullable('#')),
-                Element(digits=Nullable(123), letters=Nullable(None), other=Nullable(None)),
-                Element(digits=Nullable(None), letters=Nullable(None), other=Nullable('@')),
-                Element(digits=Nullable(None), letters=Nullable('bar'), other=Nullable(None)),
-            ),
-        )
+        self.assertTupleEqual(self.make_sort_key(''), ())
+        self.assertTupleEqual(self.make_sort_key('foo'), (1, 'foo'))
+        self.assertTupleEqual(self.make_sort_key('123'), (2, 123))
+        self.assertTupleEqual(self.make_sort_key('123-foo'), (2, 123, 0, '-', 1, 'foo'))
+        self.assertTupleEqual(self.make_sort_key('foo#123@bar'), (1, 'foo', 0, '#', 2, 123, 0, '@', 1, 'bar'))
+        # Unicode digits, numbers that are not digits, and underscores.
+        self.assertTupleEqual(self.make_sort_key('x٣²_'), (1, 'x', 2, 3, 1, '²', 0, '_'))
 
     def test_sort_order(self):
         sorter = notes_db.AlphaNumSorter()
@@ -120,6 +67,20 @@ class AlphaNumSorter(unittest.TestCase):
         )
 
 
+class CollationSorter(unittest.TestCase):
+
+    def test_sort_order(self):
+        sorter = notes_db.CollationSorter()
+        notes = [
+            notes_db.NoteInfo(key=title, note={'content': title}, tagfound=0)
+            for title in ['banana', 'Apple', 'cherry', 'apple']
+        ]
+        # Emulate a locale that ignores case.
+        with patch('locale.strxfrm', side_effect=lambda s: s.casefold() + s):
+            ordered = sorted(notes, key=sorter)
+        self.assertEqual([o.key for o in ordered], ['Apple', 'apple', 'banana', 'cherry'])
+
+
 class DateSorter(unittest.TestCase):
 
     def test_sort_by_modification_date(self):
@@ -165,3 +126,88 @@ class DateSorter(unittest.TestCase):
             notes_db.DateSorter(2)
         with self.assertRaises(ValueError):
             notes_db.DateSorter('creation_date')
+
+
+class SortedOrder(DBMixin, unittest.TestCase):
+
+    def _db_with_notes(self):
+        db = self._db_with({
+            'a': {
+                'modifydate': 1,
+                'content': 'note 10',
+            },
+            'b': {
+                'modifydate': 2,
+                'content': 'note 9',
+            },
+        })
+        db.config.sort_mode = nvpy.SortMode.ALPHA_NUM
+        return db
+
+    def _sorted_keys(self, db):
+        db._query_cache.clear()
+        return self._filter_keys(db, None)
+
+    def test_config_returns_same_sorter_until_options_change(self):
+        config = self._mock_config()
+        config.sort_mode = nvpy.SortMode.ALPHA_NUM
+        sorter = config.sorter
+        self.assertIs(config.sorter, sorter)
+        config.pinned_ontop = 0
+        self.assertIsNot(config.sorter, sorter)
+
+    def test_keys_are_computed_once_per_change(self):
+        db = self._db_with_notes()
+        self.assertEqual(self._sorted_keys(db), ['b', 'a'])
+        with patch.object(notes_db.AlphaNumSorter, 'sort_key', return_value=()) as sort_key:
+            self.assertEqual(self._sorted_keys(db), ['b', 'a'])
+            self.assertFalse(sort_key.called)
+
+        db.set_note_content('b', 'note 11')
+        self.assertEqual(self._sorted_keys(db), ['a', 'b'])
+        db.set_note_pinned('b', 1)
+        self.assertEqual(self._sorted_keys(db), ['b', 'a'])
+
+        db.config.sort_mode = nvpy.SortMode.MODIFICATION_DATE
+        db.set_note_pinned('b', 0)
+        self.assertEqual(self._sorted_keys(db), ['b', 'a'])
+
+    def test_collation_keys_are_computed_once_per_change(self):
+        db = self._db_with_notes()
+        db.config.sort_mode = nvpy.SortMode.COLLATION
+        with patch('locale.strxfrm', side_effect=str.upper) as strxfrm:
+            self.assertEqual(self._sorted_keys(db), ['a', 'b'])
+            self.assertEqual(self._sorted_keys(db), ['a', 'b'])
+            self.assertEqual(strxfrm.call_count, 2)
+            db.set_note_content('a', 'note 99')
+            self.assertEqual(self._sorted_keys(db), ['b', 'a'])
+            self.assertEqual(strxfrm.call_count, 3)
+
+    def test_search_results_are_not_sorted_again(self):
+        db = self._db_with_notes()
+        db.create_note('note 1')
+        with patch.object(db, '_sort_notes') as sort_notes:
+            self.assertEqual(self._sorted_keys(db)[1:], ['b', 'a'])
+            db._query_cache.clear()
+            filtered_notes, _, _ = db.filter_notes('note')
+        self.assertFalse(sort_notes.called)
+        self.assertEqual(len(filtered_notes), 3)
+
+    def test_order_follows_changes(self):
+        order = indexes.SortedOrder(lambda key, note: notes_db.NoteInfo(key, note, 0))
+        sorter = notes_db.DateSorter(nvpy.SortMode.MODIFICATION_DATE)
+        order.update('x', {'modifydate': 0})
+        self.assertIsNone(order.sorter)
+
+        order.rebuild(sorter, {'a': {'modifydate': 1}, 'b': {'modifydate': 2}, 'c': {'modifydate': 2}})
+        self.assertEqual(order.keys(), ['b', 'c', 'a'])
+        order.update('a', {'modifydate': 3})
+        self.assertEqual(order.keys(), ['a', 'b', 'c'])
+        # ties are kept in the order they were added.
+        order.update('b', {'modifydate': 2})
+        self.assertEqual(order.keys(), ['a', 'c', 'b'])
+        order.update('c', None)
+        order.update('d', {'modifydate': 0})
+        self.assertEqual(order.keys(), ['a', 'b', 'd'])
+        self.assertEqual(order.sort_key('d'), -0.0)
+        self.assertIsNone(order.sort_key('c'))
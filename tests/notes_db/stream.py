@@ -0,0 +1,48 @@
+import unittest
+from unittest.mock import patch
+
+from ._mixin import DBMixin
+
+notes = {str(i): {'modifydate': i, 'tags': [], 'content': 'note %d' % i} for i in range(5)}
+
+
+class FilterNotesStream(DBMixin, unittest.TestCase):
+
+    def _chunk_keys(self, stream):
+        return [[o.key for o in chunk] for chunk in stream.chunks]
+
+    def test_chunks_are_in_display_order(self):
+        db = self._db_with(notes)
+        stream = db.filter_notes_stream('note', chunk_size=2)
+        self.assertEqual(stream.active_notes, 5)
+        self.assertEqual(self._chunk_keys(stream), [['4', '3'], ['2', '1'], ['0']])
+
+        stream = db.filter_notes_stream('note')
+        self.assertEqual(self._chunk_keys(stream), [['4', '3', '2', '1', '0']])
+
+    def test_rest_is_filtered_on_demand(self):
+        db = self._db_with(notes)
+        stream = db.filter_notes_stream('note', chunk_size=2)
+        with patch.object(db, '_helper_gstyle_mswordmatch', wraps=db._helper_gstyle_mswordmatch) as mswordmatch:
+            self.assertEqual([o.key for o in next(stream.chunks)], ['4', '3'])
+            self.assertEqual(mswordmatch.call_count, 2)
+            # the complete result is cached only after all notes have been filtered.
+            self.assertEqual(len(db._query_cache), 0)
+            list(stream.chunks)
+            self.assertEqual(mswordmatch.call_count, 5)
+        self.assertEqual(len(db._query_cache), 1)
+
+    def test_consumed_stream_is_cached(self):
+        db = self._db_with(notes)
+        with patch.object(db, '_compile_query', wraps=db._compile_query) as compile_query:
+            self._chunk_keys(db.filter_notes_stream('note', chunk_size=2))
+            self.assertEqual(compile_query.call_count, 1)
+            self.assertEqual(self._chunk_keys(db.filter_notes_stream('note', chunk_size=3)),
+                             [['4', '3', '2'], ['1', '0']])
+            filtered_notes, _, _ = db.filter_notes('note')
+            self.assertEqual(compile_query.call_count, 1)
+        self.assertEqual([o.key for o in filtered_notes], ['4', '3', '2', '1', '0'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,5 @@
 import unittest
+from unittest.mock import patch
 
 from ._mixin import DBMixin
 
@@ -39,6 +40,83 @@ class Tags(DBMixin, unittest.TestCase):
 
         self.assertEqual(notes_db.notes['9']['tags'], ['aTag', 'anotherTag'])
 
+    def test_catalog_follows_tag_changes(self):
+        notes_db = self._db()
+        notes_db.notes = {
+            '1': {
+                'tags': ['work', 'Workshop'],
+                'content': 'note 1',
+            },
+            '2': {
+                'tags': ['work'],
+                'content': 'note 2',
+            },
+            '3': {
+                'tags': ['wombat'],
+                'content': 'deleted note',
+                'deleted': 1,
+            },
+        }
+        self.assertEqual(notes_db.get_tags(), [('work', 2), ('Workshop', 1)])
+
+        notes_db.delete_note_tag('2', 'work')
+        notes_db.add_note_tags('2', 'home,workday')
+        self.assertEqual(notes_db.get_tags(), [('home', 1), ('work', 1), ('workday', 1), ('Workshop', 1)])
+
+        notes_db.delete_note('1')
+        self.assertEqual(notes_db.get_tags(), [('home', 1), ('workday', 1)])
+
+    def test_complete_tag(self):
+        notes_db = self._db()
+        notes_db.notes = {
+            '1': {
+                'tags': ['work', 'Workshop', 'home'],
+                'content': 'note 1',
+            },
+        }
+        self.assertEqual(notes_db.complete_tag('wo'), ['work'])
+        self.assertEqual(notes_db.complete_tag('wo', case_sensitive=False), ['work', 'Workshop'])
+        self.assertEqual(notes_db.complete_tag('x'), [])
+        self.assertEqual(notes_db.complete_tag(''), ['home', 'work', 'Workshop'])
+
+    def test_find_tags(self):
+        notes_db = self._db()
+        notes_db.notes = {
+            '1': {
+                'tags': ['work', 'Workshop', 'homework'],
+                'content': 'note 1',
+            },
+        }
+        self.assertEqual(notes_db.find_tags('work'), ['homework', 'work'])
+        self.assertEqual(notes_db.find_tags('o'), ['homework', 'work', 'Workshop'])
+        self.assertEqual(notes_db.find_tags('x'), [])
+
+    def test_filter_by_tag_prefixes(self):
+        notes_db = self._db()
+        notes_db.notes = {
+            '1': {
+                'tags': ['work', 'urgent'],
+                'content': 'note 1',
+            },
+            '2': {
+                'tags': ['workshop'],
+                'content': 'note 2',
+            },
+            '3': {
+                'tags': ['urgent'],
+                'content': 'note 3',
+            },
+        }
+        filtered_notes, _, _ = notes_db.filter_notes_gstyle('t:work')
+        self.assertEqual(sorted(o.key for o in filtered_notes), ['1', '2'])
+        # Candidates from the tag catalog are not matched against the tag patterns again.
+        with patch.object(notes_db, '_helper_gstyle_tagmatch') as tagmatch:
+            filtered_notes, _, _ = notes_db.filter_notes_gstyle('t:work tag:urg')
+        self.assertFalse(tagmatch.called)
+        self.assertEqual([(o.key, o.tagfound) for o in filtered_notes], [('1', 1)])
+        filtered_notes, _, _ = notes_db.filter_notes_gstyle('t:Work')
+        self.assertEqual(filtered_notes, [])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+
+from ._mixin import DBMixin
+
+notes = {
+    '1': {
+        'modifydate': 1,
+        'content': 'Shopping list\neggs',
+    },
+    '2': {
+        'modifydate': 2,
+        'content': '  shopping  \nmilk',
+    },
+    '3': {
+        'modifydate': 3,
+        'content': 'Shopping list\nbread',
+    },
+    '4': {
+        'modifydate': 4,
+        'content': 'Shop notes',
+        'deleted': 1,
+    },
+}
+
+
+class Titles(DBMixin, unittest.TestCase):
+
+    def test_find_notes_by_title(self):
+        db = self._db_with(notes)
+        self.assertEqual(db.find_notes_by_title('Shopping list'), ['3', '1'])
+        self.assertEqual(db.find_notes_by_title('shopping'), ['2'])
+        self.assertEqual(db.find_notes_by_title('Shop notes'), [])
+
+    def test_complete_title(self):
+        db = self._db_with(notes)
+        self.assertEqual(db.complete_title('Shop'), ['Shopping list'])
+        self.assertEqual(db.complete_title('shop', case_sensitive=False), ['shopping', 'Shopping list'])
+        self.assertEqual(db.complete_title('x'), [])
+
+    def test_index_follows_changes(self):
+        db = self._db_with(notes)
+        db.set_note_content('1', 'Groceries\neggs')
+        self.assertEqual(db.find_notes_by_title('Shopping list'), ['3'])
+        self.assertEqual(db.find_notes_by_title('Groceries'), ['1'])
+
+        db.delete_note('3')
+        self.assertEqual(db.complete_title('Shop'), [])
+
+        key = db.create_note('Shopping list')
+        self.assertEqual(db.find_notes_by_title('Shopping list'), [key])
+
+
+if __name__ == '__main__':
+    unittest.main()
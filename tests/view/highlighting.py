@@ -0,0 +1,141 @@
+import queue
+import random
+import re
+import unittest
+
+from nvpy import highlighting
+
+
+def _links():
+    return highlighting.PatternHighlighter(highlighting.LINK_RE,
+                                           value=lambda mo: mo.group(0),
+                                           lookback=highlighting.link_lookback)
+
+
+def _markdown():
+    return highlighting.PatternHighlighter(highlighting.MARKDOWN_RE, value=lambda mo: mo.group(0))
+
+
+def _search():
+    return highlighting.PatternHighlighter(re.compile(r'foo|a\ b', re.I), value=lambda mo: mo.group(0))
+
+
+class PatternHighlighter(unittest.TestCase):
+
+    def _edit(self, highlighter, content, start, removed, inserted):
+        content = content[:start] + inserted + content[start + removed:]
+        change = highlighter.update(content, highlighting.Edit(start, removed, inserted))
+        full = highlighter.__class__(highlighter.pattern, highlighter.value)
+        full.highlight(content)
+        self.assertEqual(highlighter.spans(), full.spans(), repr(content))
+        return content, change
+
+    def test_links_follow_edits(self):
+        highlighter = _links()
+        highlighter.FULL_PASS_RATIO = 0
+        content = 'Title\n[[Other\nnote see http://example.com\nend\n'
+        highlighter.highlight(content)
+        self.assertEqual([v for _, _, v in highlighter.spans()], ['http://example.com'])
+
+        # closing the note link two lines down makes it swallow the url.
+        content, change = self._edit(highlighter, content, content.index('end'), 0, ']]')
+        self.assertEqual(change.removed, ['http://example.com'])
+        self.assertEqual([v for _, _, v in change.added], ['[[Other\nnote see http://example.com\n]]'])
+
+        content, change = self._edit(highlighter, content, content.index(']]'), 2, '')
+        self.assertEqual([v for _, _, v in highlighter.spans()], ['http://example.com'])
+
+    def test_unchanged_spans_are_kept(self):
+        highlighter = _links()
+        highlighter.FULL_PASS_RATIO = 0
+        content = 'see [[a]] and [[b]]\nand [[c]]\n'
+        highlighter.highlight(content)
+        content, change = self._edit(highlighter, content, content.index(' and'), 0, 'xyz')
+        self.assertEqual(change.removed, [])
+        self.assertEqual(change.added, [])
+        self.assertEqual(highlighter.spans(), [(4, 9, '[[a]]'), (17, 22, '[[b]]'), (27, 32, '[[c]]')])
+
+    def test_same_spans_as_full_pass(self):
+        words = ['a', 'b', ' ', '\n', '[', ']', '[[', ']]', '#', 'foo', 'http://x.y', 'mailto:a@b.c', 'tel:1']
+        rng = random.Random(0)
+        for make in [_links, _markdown, _search]:
+            content = ''.join(rng.choice(words) for _ in range(50)) + '\n'
+            highlighter = make()
+            highlighter.FULL_PASS_RATIO = 0
+            highlighter.highlight(content)
+            for _ in range(500):
+                start = rng.randint(0, len(content) - 1)
+                removed = rng.choice([0, 0, 1, 3])
+                removed = min(removed, len(content) - 1 - start)
+                inserted = ''.join(rng.choice(words) for _ in range(rng.randint(0, 2)))
+                content, change = self._edit(highlighter, content, start, removed, inserted)
+
+    def test_span_at(self):
+        highlighter = _links()
+        highlighter.FULL_PASS_RATIO = 0
+        content = 'see [[a]] and [[b]]\n'
+        highlighter.highlight(content)
+        content, _ = self._edit(highlighter, content, 0, 0, 'xx')
+        self.assertEqual(highlighter.span_at(5), None)
+        self.assertEqual(highlighter.span_at(6), (6, 11, '[[a]]'))
+        self.assertEqual(highlighter.span_at(10), (6, 11, '[[a]]'))
+        self.assertEqual(highlighter.span_at(11), None)
+        self.assertEqual(highlighter.span_at(20), (16, 21, '[[b]]'))
+
+    def test_is_line_local(self):
+        self.assertTrue(highlighting.is_line_local(re.compile('|'.join(re.escape(w) for w in ['a b', 'c.d', '[x]']))))
+        self.assertFalse(highlighting.is_line_local(re.compile(re.escape('a\nb'))))
+        self.assertFalse(highlighting.is_line_local(re.compile(r'a\sb')))
+        self.assertFalse(highlighting.is_line_local(re.compile('a.*b')))
+
+
+class LineTable(unittest.TestCase):
+
+    def test_indices(self):
+        content = 'ab\n\ncd\n'
+        lines = highlighting.LineTable(content)
+        self.assertEqual([lines.index(offset, content) for offset in range(7)],
+                         ['1.0', '1.1', '1.2', '2.0', '3.0', '3.1', '3.2'])
+        self.assertEqual(lines.index(7, content), '4.0')
+        self.assertEqual([lines.offset(lines.index(offset, content), content) for offset in range(8)], list(range(8)))
+
+    def test_characters_outside_bmp_take_two_columns(self):
+        content = 'a\U0001f600b\U0001f600\U0001f600c\nd\U0001f600e\n'
+        lines = highlighting.LineTable(content)
+        self.assertEqual([lines.index(offset, content) for offset in range(len(content) + 1)],
+                         ['1.0', '1.1', '1.3', '1.4', '1.6', '1.8', '1.9', '2.0', '2.1', '2.3', '2.4', '3.0'])
+        self.assertEqual([lines.offset(lines.index(offset, content), content) for offset in range(len(content) + 1)],
+                         list(range(len(content) + 1)))
+
+    def test_same_lines_as_new_table(self):
+        rng = random.Random(0)
+        content = '\n'
+        lines = highlighting.LineTable(content)
+        for _ in range(500):
+            start = rng.randint(0, len(content) - 1)
+            removed = rng.randint(0, len(content) - 1 - start)
+            inserted = ''.join(rng.choice('a\n') for _ in range(rng.randint(0, 5)))
+            content = content[:start] + inserted + content[start + removed:]
+            lines.update(highlighting.Edit(start, removed, inserted))
+            self.assertEqual(lines.starts, highlighting.LineTable(content).starts, repr(content))
+
+
+class MatchWorker(unittest.TestCase):
+
+    def test_matches_are_found_in_background(self):
+        results = queue.Queue()
+        worker = highlighting.MatchWorker(lambda job, matches: results.put((job, matches)))
+        highlighter = _links()
+        content = 'see [[a]] and http://example.com\n'
+        worker.submit(highlighting.MatchJob(highlighter, content, 3))
+        job, matches = results.get(timeout=10)
+        self.assertEqual(job.revision, 3)
+        self.assertEqual(highlighter.spans(), [])
+
+        change = highlighter.highlight(job.content, matches)
+        self.assertEqual(change.added, [(4, 9, '[[a]]'), (14, 32, 'http://example.com')])
+        self.assertEqual(highlighter.spans(), change.added)
+
+
+if __name__ == '__main__':
+    unittest.main()
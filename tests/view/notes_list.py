@@ -0,0 +1,168 @@
+import unittest
+import os
+import shutil
+from unittest.mock import patch
+
+from mock import Mock
+
+from nvpy import utils
+from nvpy.view import View, NoteConfig
+from nvpy.nvpy import NotesListModel
+from nvpy.nvpy import Config
+from nvpy.notes_db import NoteInfo
+
+
+class VirtualNotesList(unittest.TestCase):
+
+    def setUp(self):
+        if os.path.isdir('/tmp/.nvpyUnitTests'):
+            shutil.rmtree('/tmp/.nvpyUnitTests')
+
+    def __mock_config(self):
+        app_dir = os.path.abspath('nvpy')
+
+        mockConfig = Config(app_dir, [])
+        mockConfig.sn_username = ''
+        mockConfig.sn_password = ''
+        mockConfig.db_path = '/tmp/.nvpyUnitTests'
+        mockConfig.txt_path = '/tmp/.nvpyUnitTests/notes'
+        mockConfig.simplenote_sync = 0
+        mockConfig.list_virtual = 1
+
+        return mockConfig
+
+    def __view_with_notes(self, count):
+        mockNotesListModel = NotesListModel()
+        mockNotesListModel.add_observer = Mock()
+        view = View(self.__mock_config(), mockNotesListModel)
+        view.set_notes([
+            NoteInfo(key=f'key{i}',
+                     note={
+                         'content': f'note {i}',
+                         'modifydate': 12345,
+                         'createdate': 12333,
+                         'tags': [],
+                     },
+                     tagfound=0) for i in range(count)
+        ])
+        return view
+
+    def __text_lines(self, notes_list):
+        return notes_list.text.get('1.0', 'end-1c').splitlines()
+
+    def test_only_window_is_rendered(self):
+        view = self.__view_with_notes(1000)
+        notes_list = view.notes_list
+        self.assertEqual(notes_list.get_number_of_notes(), 1000)
+        lines = self.__text_lines(notes_list)
+        self.assertEqual(len(lines), notes_list.get_window_size())
+        self.assertTrue(lines[0].startswith('note 0'))
+        view.close()
+
+    def test_select_renders_the_row(self):
+        view = self.__view_with_notes(1000)
+        notes_list = view.notes_list
+
+        notes_list.select(900)
+        self.assertEqual(notes_list.selected_idx, 900)
+        self.assertLessEqual(notes_list.row_start, 900)
+        self.assertLess(900, notes_list.row_end)
+        start, end = notes_list.idx_to_index_range(900)
+        self.assertTrue(notes_list.text.get(start, end).startswith('note 900'))
+        self.assertEqual(notes_list.text.tag_ranges('selected')[0].string, start)
+
+        notes_list.select_next(delta=10)
+        self.assertEqual(notes_list.selected_idx, 910)
+        notes_list.select_prev(delta=1000)
+        self.assertEqual(notes_list.selected_idx, 0)
+        self.assertEqual(notes_list.row_start, 0)
+        view.close()
+
+    def test_scrollbar_moves_the_window(self):
+        view = self.__view_with_notes(1000)
+        notes_list = view.notes_list
+
+        notes_list.cmd_yview('moveto', '0.5')
+        self.assertEqual(notes_list.get_top_idx(), 500)
+        self.assertTrue(notes_list.text.get('@0,0 linestart', '@0,0 lineend').startswith('note 500'))
+        notes_list.cmd_yview('scroll', '1', 'units')
+        self.assertEqual(notes_list.get_top_idx(), 501)
+        view.close()
+
+
+class NotesListDiff(unittest.TestCase):
+
+    def setUp(self):
+        if os.path.isdir('/tmp/.nvpyUnitTests'):
+            shutil.rmtree('/tmp/.nvpyUnitTests')
+
+    def __mock_config(self):
+        app_dir = os.path.abspath('nvpy')
+
+        mockConfig = Config(app_dir, [])
+        mockConfig.sn_username = ''
+        mockConfig.sn_password = ''
+        mockConfig.db_path = '/tmp/.nvpyUnitTests'
+        mockConfig.txt_path = '/tmp/.nvpyUnitTests/notes'
+        mockConfig.simplenote_sync = 0
+        mockConfig.list_hide_time = 1
+
+        return mockConfig
+
+    def __rows(self, notes, keys):
+        return [(k, notes[k], NoteConfig(tagfound=0, match_regexp=None)) for k in keys]
+
+    def test_only_changed_rows_are_rendered(self):
+        mockNotesListModel = NotesListModel()
+        mockNotesListModel.add_observer = Mock()
+        view = View(self.__mock_config(), mockNotesListModel)
+        notes_list = view.notes_list
+        notes = {f'key{i}': {'content': f'note {i}', 'modifydate': 1, 'createdate': 1} for i in range(10)}
+
+        notes_list.set_rows(self.__rows(notes, [f'key{i}' for i in range(10)]))
+        notes_list.select(5)
+
+        notes['key7']['content'] = 'note 7 edited'
+        keys = ['key7', 'key0', 'key1', 'key2', 'key4', 'key5', 'key6', 'key8', 'key9', 'key10']
+        notes['key10'] = {'content': 'note 10', 'modifydate': 1, 'createdate': 1}
+        with patch.object(notes_list, '_insert_rows_text', wraps=notes_list._insert_rows_text) as insert_rows_text:
+            notes_list.set_rows(self.__rows(notes, keys))
+        # key7 has been moved and key10 has been inserted.
+        self.assertEqual([c.args for c in insert_rows_text.call_args_list], [(0, 1), (9, 1)])
+
+        self.assertEqual(notes_list.text.get('1.0', 'end-1c').splitlines(), [notes[k]['content'] for k in keys])
+        self.assertEqual(notes_list.note_keys, keys)
+        # the selection follows key5.
+        self.assertEqual(notes_list.selected_idx, 5)
+        self.assertEqual(notes_list.text.tag_ranges('selected')[0].string, '6.0')
+        view.close()
+
+    def test_fields_are_cached_per_revision(self):
+        mockNotesListModel = NotesListModel()
+        mockNotesListModel.add_observer = Mock()
+        view = View(self.__mock_config(), mockNotesListModel)
+        notes_list = view.notes_list
+        notes = {f'key{i}': {'content': f'note {i}', 'modifydate': 1, 'createdate': 1} for i in range(10)}
+        keys = sorted(notes)
+
+        notes_list.set_rows(self.__rows(notes, keys))
+        with patch('nvpy.utils.get_note_title', wraps=utils.get_note_title) as get_note_title:
+            notes_list.set_rows(self.__rows(notes, list(reversed(keys))))
+            self.assertEqual(get_note_title.call_count, 0)
+
+            notes['key3']['content'] = 'note 3 edited'
+            notes['key3']['modifydate'] = 2
+            notes_list.set_rows(self.__rows(notes, keys))
+            self.assertEqual(get_note_title.call_count, 1)
+        self.assertEqual(notes_list.get_title(3), 'note 3 edited')
+
+        # notes that leave the list are forgotten.
+        notes_list.set_rows(self.__rows(notes, keys[:4]))
+        self.assertEqual(set(notes_list._fields_cache), set(keys[:4]))
+        notes_list.clear()
+        self.assertEqual(notes_list._fields_cache, {})
+        view.close()
+
+
+if __name__ == '__main__':
+    unittest.main()